@@ -1,6 +1,6 @@
 import os
 
-from flask import Flask, request, jsonify, send_from_directory, session, current_app, make_response, redirect, g
+from flask import Flask, request, jsonify, send_from_directory, session, current_app, make_response, redirect, g, Response, stream_with_context
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_migrate import Migrate
@@ -8,19 +8,20 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from urllib.parse import urlparse
 from datetime import datetime, timedelta, date
-from collections import Counter
 import json
+import base64
 import traceback
+import time
 import uuid
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 
 # Import db, User, ClothingItem, Outfit from models.
-from models import db, User, ClothingItem, Outfit, UserActivity, Notification, NegativePrompt, Brand
+from models import db, User, ClothingItem, Outfit, UserActivity, Notification, NegativePrompt, Brand, OutfitJob, StyleProfile
 from utils.auth import get_actual_user
 from sqlalchemy.orm import selectinload
-from sqlalchemy import func
+from sqlalchemy import func, cast, tuple_
 from utils.limiter import limiter, get_user_specific_limit
 from utils.decorators import premium_required
 
@@ -35,6 +36,8 @@ def create_app():
     # --- Application Configuration ---
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_fallback_secret_key_for_dev_only')
     app.config['UPLOAD_FOLDER'] = 'uploads'
+    # Only ever turned off for load tests (see loadtest/)
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'true').lower() != 'false'
 
     # --- Session Configuration (CRITICAL for Cross-Site HTTPS) ---
     # Default to production/secure settings. Only use relaxed settings if FLASK_ENV is explicitly 'development'.
@@ -149,6 +152,8 @@ def create_app():
                 api_secret = parsed_url.password,
                 secure=True
             )
+            if os.environ.get('CLOUDINARY_UPLOAD_PREFIX'):
+                cloudinary.config(upload_prefix=os.environ['CLOUDINARY_UPLOAD_PREFIX'])
             print("✅ Cloudinary configured successfully!")
         except Exception as e:
             print(f"⚠️ Failed to configure Cloudinary from URL: {e}")
@@ -188,13 +193,50 @@ def create_app():
     from utils.laundry_service import LaundryIntelligenceService
     from utils.wardrobe_intelligence import WardrobeIntelligenceService, AnalyticsService
     from utils.email_service import EmailService
+    from utils.search_service import WardrobeSearchService
+    from utils.brand_index import BrandIndex
+    from utils.brand_service import BrandResolutionService
+    from utils.suggestion_cache import OutfitSuggestionCache
+    from utils.outfit_jobs import OutfitJobService
+    from utils.style_profile import StyleProfileService
+    from utils.geocoding_cache import GeocodingCache
+    from utils.weather_cache import WeatherCache
 
     app.ai_service = AIOutfitService(os.environ.get('OPENAI_API_KEY'))
-    app.weather_service = WeatherService(os.environ.get('WEATHER_API_KEY'))
+    app.weather_service = WeatherService(
+        os.environ.get('WEATHER_API_KEY'),
+        geocoding_cache=GeocodingCache(),
+        weather_cache=WeatherCache(ttl=int(os.environ.get('WEATHER_CACHE_TTL', 600)))
+    )
     app.laundry_service = LaundryIntelligenceService()
     app.email_service = EmailService(os.environ.get('BREVO_API_KEY'))
     app.wardrobe_intelligence_service = WardrobeIntelligenceService()
     app.analytics_service = AnalyticsService()
+    app.search_service = WardrobeSearchService()
+    app.brand_index = BrandIndex()
+    app.brand_service = BrandResolutionService()
+    app.suggestion_cache = OutfitSuggestionCache()
+    app.outfit_jobs = OutfitJobService(
+        app,
+        int(os.environ.get('OUTFIT_JOB_WORKERS', 4)),
+        # Crashed and stale jobs give back the generation reserved at submit
+        on_failed=lambda job: _refund_generation(job.user_id)
+    )
+    app.style_profile_service = StyleProfileService()
+
+    # Warm the brand typeahead index; a database without tables yet builds it on first search
+    try:
+        with app.app_context():
+            app.brand_index.refresh()
+    except Exception as e:
+        print(f"Brand index not built at startup: {e}")
+
+    # Backfill the SQLite search index for items written while it was missing or out of sync
+    try:
+        with app.app_context():
+            app.search_service.sync_index()
+    except Exception as e:
+        print(f"Search index not checked at startup: {e}")
 
     try:
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -260,6 +302,7 @@ def create_app():
                 print("🔄 Initializing database tables...")
             with app.app_context():
                 db.create_all()
+                app.search_service.ensure_index()
             with app.app_context():
                 users_count = User.query.count()
                 items_count = ClothingItem.query.count()
@@ -649,7 +692,7 @@ def create_app():
             "export_date": datetime.utcnow().isoformat(),
             "profile_settings": user.settings,
             "wardrobe_items": [item.to_dict() for item in items],
-            "outfit_history": [outfit.to_dict() for outfit in outfits]
+            "outfit_history": Outfit.serialize_many(outfits)
         }
         
         response = jsonify(data_export)
@@ -680,6 +723,7 @@ def create_app():
                 # Manually delete related items first if cascade is not fully trusted
                 Outfit.query.filter_by(user_id=user_to_delete.id).delete()
                 ClothingItem.query.filter_by(user_id=user_to_delete.id).delete()
+                current_app.search_service.remove_user_items(user_to_delete.id)
                 
                 db.session.delete(user_to_delete)
                 db.session.commit()
@@ -707,6 +751,7 @@ def create_app():
             outfits_to_delete = Outfit.query.filter_by(user_id=user.id).all()
             for outfit in outfits_to_delete:
                 db.session.delete(outfit)
+            current_app.style_profile_service.reset_outfits(user.id)
             db.session.commit()
             return jsonify({'message': 'Your outfit history and AI personalization have been successfully reset.'})
         except Exception as e:
@@ -787,10 +832,8 @@ def create_app():
             cost = data.get('purchase_cost')
             purchase_cost = float(cost) if cost is not None and cost != '' else None
 
-            brand_name = data.get('brand')
-            brand_obj = None
-            if brand_name:
-                brand_obj = Brand.query.filter(func.lower(Brand.name) == func.lower(brand_name)).first()
+            brand_id = current_app.brand_service.resolve_id(data.get('brand'))
+            brand_obj = db.session.get(Brand, brand_id) if brand_id else None
 
             item = ClothingItem(
                 user_id=user.id,
@@ -802,16 +845,16 @@ def create_app():
                 fit=data.get('fit'),
                 season=data.get('season', 'all'),
                 fabric=data.get('fabric', ''),
-                mood_tags=json.dumps(data.get('mood_tags', [])),
+                mood_tags=data.get('mood_tags', []),
                 brand=brand_obj,
                 condition=data.get('condition', 'good'),
                 is_clean=data.get('is_clean', True),
                 image_url=image_url,
-                custom_tags=json.dumps(data.get('custom_tags', [])),
+                custom_tags=data.get('custom_tags', []),
                 # New fields
                 purchase_date=purchase_date,
                 purchase_cost=purchase_cost,
-                care_instructions=json.dumps(data.get('care_instructions', {})),
+                care_instructions=data.get('care_instructions', {}),
                 wash_temperature=data.get('wash_temperature'),
                 dry_clean_only=data.get('dry_clean_only', False),
                 needs_repair=data.get('needs_repair', False),
@@ -819,6 +862,8 @@ def create_app():
                 retirement_candidate=data.get('retirement_candidate', False)
             )
             db.session.add(item)
+            db.session.flush()
+            current_app.style_profile_service.add_item(item)
             db.session.commit()
             return jsonify({'message': 'Item added successfully', 'item': item.to_dict()})
         except Exception as e:
@@ -827,6 +872,29 @@ def create_app():
             db.session.rollback()
             return jsonify({'error': f'Failed to add item: {str(e)}'}), 500
 
+    WARDROBE_PAGE_SIZE = 50
+    WARDROBE_MAX_PAGE_SIZE = 200
+
+    def encode_wardrobe_cursor(created_at, item_id):
+        """Opaque cursor pointing just past an item in the (created_at, id) ordering."""
+        payload = json.dumps([created_at, item_id])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_wardrobe_cursor(cursor):
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(item_id)
+
+    def encode_search_cursor(offset):
+        """Opaque cursor pointing at a position in the ranked search results."""
+        payload = json.dumps({'offset': offset})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_search_cursor(cursor):
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))['offset'])
+        if offset < 0:
+            raise ValueError('Negative offset')
+        return offset
+
     @app.route('/api/get-wardrobe', methods=['GET'])
     @login_required
     def get_wardrobe():
@@ -834,26 +902,112 @@ def create_app():
             user = get_actual_user()
             search_term = request.args.get('search', type=str)
             item_type = request.args.get('type', type=str)
-
-            query = ClothingItem.query.options(selectinload(ClothingItem.owner)).filter_by(user_id=user.id)
-
+            view = request.args.get('view', type=str)
+            fields_param = request.args.get('fields', type=str)
+            cursor = request.args.get('cursor', type=str)
+            limit = request.args.get('limit', type=int)
+
+            # --- Field projection: `fields=a,b,c` or `view=summary` ---
+            fields = None
+            if fields_param:
+                fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+                unknown_fields = [field for field in fields if field not in ClothingItem.PROJECTABLE_FIELDS]
+                if unknown_fields:
+                    return jsonify({'error': f'Unknown or non-projectable fields: {", ".join(unknown_fields)}'}), 400
+                if 'id' not in fields:
+                    fields.insert(0, 'id')
+            elif view == 'summary':
+                fields = list(ClothingItem.SUMMARY_FIELDS)
+
+            query = ClothingItem.query.filter_by(user_id=user.id)
+
+            ranked_ids = None
             if search_term:
-                search_filter = f"%{search_term.lower()}%"
-                query = query.filter(
-                    db.or_(
-                        func.lower(ClothingItem.name).ilike(search_filter),
-                        func.lower(ClothingItem.color).ilike(search_filter),
-                        func.lower(ClothingItem.style).ilike(search_filter),
-                        func.lower(ClothingItem.type).ilike(search_filter),
-                        func.lower(ClothingItem.custom_tags).ilike(search_filter)
+                ranked_ids = current_app.search_service.search(user.id, search_term)
+                if ranked_ids is not None:
+                    query = query.filter(ClothingItem.id.in_(ranked_ids))
+                else:
+                    # Search index not available on this database; match substrings instead
+                    search_filter = f"%{search_term.lower()}%"
+                    query = query.filter(
+                        db.or_(
+                            func.lower(ClothingItem.name).ilike(search_filter),
+                            func.lower(ClothingItem.color).ilike(search_filter),
+                            func.lower(ClothingItem.style).ilike(search_filter),
+                            func.lower(ClothingItem.type).ilike(search_filter),
+                            func.lower(cast(ClothingItem.custom_tags, db.Text)).ilike(search_filter)
+                        )
                     )
-                )
             
             if item_type:
                 query = query.filter(func.lower(ClothingItem.type) == item_type.lower())
 
-            items = query.all()
-            return jsonify({'items': [item.to_dict() for item in items]})
+            if ranked_ids is not None:
+                # Ranked search results come back best match first; like the listing below they
+                # are only paged (by position in the ranking) when `limit` or `cursor` is given
+                paginate = bool(cursor) or limit is not None
+                offset = 0
+                if paginate:
+                    limit = max(1, min(limit or WARDROBE_PAGE_SIZE, WARDROBE_MAX_PAGE_SIZE))
+                if cursor:
+                    try:
+                        offset = decode_search_cursor(cursor)
+                    except (ValueError, TypeError, KeyError):
+                        return jsonify({'error': 'Invalid cursor'}), 400
+
+                if item_type:
+                    matching_ids = {row[0] for row in query.with_entities(ClothingItem.id)}
+                    ranked_ids = [item_id for item_id in ranked_ids if item_id in matching_ids]
+                page_ids = ranked_ids[offset:offset + limit] if paginate else ranked_ids
+
+                page_query = ClothingItem.query.filter_by(user_id=user.id).filter(ClothingItem.id.in_(page_ids))
+                items = ClothingItem.project(page_query, fields) if fields else ClothingItem.serialize_many(
+                    page_query.options(selectinload(ClothingItem.owner)).all(), owner=user
+                )
+                rank = {item_id: position for position, item_id in enumerate(page_ids)}
+                items.sort(key=lambda item: rank[item['id']])
+
+                if not paginate:
+                    return jsonify({'items': items})
+                next_offset = offset + limit
+                next_cursor = encode_search_cursor(next_offset) if next_offset < len(ranked_ids) else None
+                return jsonify({'items': items, 'next_cursor': next_cursor})
+
+            # Stable order for keyset pagination; served by ix_clothing_item_user_created
+            query = query.order_by(ClothingItem.created_at.asc(), ClothingItem.id.asc())
+
+            # --- Keyset pagination: opt in with `limit` and/or `cursor` ---
+            paginate = bool(cursor) or limit is not None
+            if paginate:
+                limit = max(1, min(limit or WARDROBE_PAGE_SIZE, WARDROBE_MAX_PAGE_SIZE))
+                if cursor:
+                    try:
+                        after_created_at, after_id = decode_wardrobe_cursor(cursor)
+                    except (ValueError, TypeError):
+                        return jsonify({'error': 'Invalid cursor'}), 400
+                    query = query.filter(
+                        tuple_(ClothingItem.created_at, ClothingItem.id) > tuple_(after_created_at, after_id)
+                    )
+                # Fetch one extra row to learn whether another page exists
+                query = query.limit(limit + 1)
+                if fields and 'created_at' not in fields:
+                    fields.append('created_at')
+
+            if fields:
+                items = ClothingItem.project(query, fields)
+            else:
+                items = ClothingItem.serialize_many(
+                    query.options(selectinload(ClothingItem.owner)).all(), owner=user
+                )
+
+            if not paginate:
+                return jsonify({'items': items})
+
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                next_cursor = encode_wardrobe_cursor(items[-1]['created_at'], items[-1]['id'])
+            return jsonify({'items': items, 'next_cursor': next_cursor})
         except Exception as e:
             if app.debug:
                 print(f"Get wardrobe error: {str(e)}")
@@ -881,6 +1035,7 @@ def create_app():
                 if field in data and data.get(field) and len(data[field]) > limit:
                     return jsonify({'error': f'The "{field}" field cannot exceed {limit} characters.'}), 400
 
+            profile_attributes = StyleProfile.item_attributes(item)
             item.name = data.get('name', item.name)
             item.type = data.get('type', item.type)
             item.style = data.get('style', item.style)
@@ -889,16 +1044,13 @@ def create_app():
             item.fit = data.get('fit', item.fit)
             item.season = data.get('season', item.season)
             item.fabric = data.get('fabric', item.fabric)
-            item.mood_tags = json.dumps(data.get('mood_tags', json.loads(item.mood_tags or '[]')))
+            item.mood_tags = data.get('mood_tags', item.mood_tags or [])
             if 'brand' in data:
-                brand_name = data.get('brand')
-                brand_obj = None
-                if brand_name:
-                    brand_obj = Brand.query.filter(func.lower(Brand.name) == func.lower(brand_name)).first()
-                item.brand = brand_obj
+                brand_id = current_app.brand_service.resolve_id(data.get('brand'))
+                item.brand = db.session.get(Brand, brand_id) if brand_id else None
             item.condition = data.get('condition', item.condition)
             item.is_clean = data.get('is_clean', item.is_clean)
-            item.custom_tags = json.dumps(data.get('custom_tags', json.loads(item.custom_tags or '[]')))
+            item.custom_tags = data.get('custom_tags', item.custom_tags or [])
             if 'image_url' in data:
                 image_url = data['image_url']
                 if image_url and not is_valid_cloudinary_url(image_url):
@@ -923,7 +1075,7 @@ def create_app():
 
 
             if 'care_instructions' in data:
-                item.care_instructions = json.dumps(data.get('care_instructions', {}))
+                item.care_instructions = data.get('care_instructions', {})
             
             if 'wash_temperature' in data:
                 item.wash_temperature = data.get('wash_temperature')
@@ -940,6 +1092,7 @@ def create_app():
             if 'retirement_candidate' in data:
                 item.retirement_candidate = data.get('retirement_candidate', False)
 
+            current_app.style_profile_service.update_item(item, profile_attributes)
             db.session.commit()
             return jsonify({'message': 'Item updated successfully', 'item': item.to_dict()})
         except Exception as e:
@@ -963,6 +1116,7 @@ def create_app():
                         os.remove(image_path)
                     except:
                         pass
+            current_app.style_profile_service.remove_item(item)
             db.session.delete(item)
             db.session.commit()
             return jsonify({'message': 'Item deleted successfully'})
@@ -1080,6 +1234,206 @@ def create_app():
         return suggestion, suggested_items
 
 
+    # Polling /api/outfit-jobs/<id> is the main way to follow an async outfit job.
+    # The SSE stream only covers the first few seconds, since it holds a worker
+    # for as long as it is open, then sends the client back to polling.
+    OUTFIT_JOB_STREAM_TIMEOUT = 5
+    OUTFIT_JOB_POLL_INTERVAL = 2
+
+    def _sse(event, payload):
+        """One server-sent event frame."""
+        return f"event:{event}\ndata:{json.dumps(payload)}\n\n"
+
+    def _generation_limit_error(user):
+        """
+        Resets a free user's daily counter when the day has changed and returns the
+        error body if they have used up today's generations, otherwise None.
+        """
+        if user.is_premium:
+            return None
+
+        today = date.today()
+        # Reset counter if it's a new day. Handles None case on first run.
+        if user.last_generation_date is None or user.last_generation_date < today:
+            user.last_generation_date = today
+            user.outfit_generations_today = 0
+
+        # Check the limit
+        if user.outfit_generations_today >= 2:
+            return {
+                "error": "generation_limit_reached",
+                "message": "You've used your 2 free outfit generations for today. Upgrade to Premium for unlimited suggestions."
+            }
+        return None
+
+    def _reserve_generation(user_id):
+        """
+        Takes one of a free user's generations for today, locking the user row so
+        concurrent requests can't both take the last one. Returns the limit error
+        body instead when none are left. The caller commits.
+        """
+        user = User.query.filter_by(id=user_id).with_for_update().populate_existing().one()
+        limit_error = _generation_limit_error(user)
+        if limit_error:
+            return limit_error
+        if not user.is_premium:
+            user.outfit_generations_today += 1
+        return None
+
+    def _refund_generation(user_id):
+        """Gives back a generation reserved today whose outfit was never delivered. The caller commits."""
+        user = User.query.filter_by(id=user_id).with_for_update().populate_existing().one()
+        if not user.is_premium and user.last_generation_date == date.today() and user.outfit_generations_today > 0:
+            user.outfit_generations_today -= 1
+
+    def _prepare_outfit_request(user, mood, exclude_ids, collection_slug):
+        """
+        Loads the clean wardrobe, weather and cache key for a generation request.
+        Returns (context, None), or (None, (error body, status code)).
+        """
+        # Let the backend determine the season for reliability
+        season = _get_current_season()
+
+        wardrobe = []
+        if collection_slug:
+            collection_data = current_app.wardrobe_intelligence_service.get_single_smart_collection(user.id, collection_slug)
+            if not collection_data:
+                return None, ({'error': 'Collection not found'}, 404)
+            # The items are already dicts, just filter for clean ones
+            wardrobe = [item for item in collection_data.get('items', []) if item.get('is_clean', True)]
+        else:
+            all_items = ClothingItem.query.filter_by(user_id=user.id, is_clean=True).all()
+            wardrobe = [item.to_dict() for item in all_items]
+
+        if not wardrobe:
+            error_message = "That collection needs a few more pieces to create a full look. Try adding another item!" if collection_slug else "Add some clothes to your wardrobe first or do some laundry!"
+            return None, ({
+                'error': 'No clean clothes available',
+                'message': error_message,
+            }, 400)
+
+        weather_data = None
+        weather_str = "mild weather"
+        weather_advice = "General weather conditions"
+
+        if user.location:
+            weather_data = current_app.weather_service.get_current_weather(user.location)
+            weather_str = current_app.weather_service.get_weather_description(weather_data)
+            weather_advice = current_app.weather_service.get_outfit_weather_advice(weather_data)
+
+        # Fetch user's negative prompts
+        negative_prompts = [p.prompt_text for p in user.negative_prompts]
+
+        # Keyed on the full clean wardrobe so exclude_ids picks among cached alternatives
+        cache_key = current_app.suggestion_cache.make_key(
+            user.id, wardrobe, weather_data, mood, season, negative_prompts, collection_slug
+        )
+
+        if exclude_ids:
+            wardrobe = [item for item in wardrobe if item.get('id') not in exclude_ids]
+
+        return {
+            'mood': mood,
+            'season': season,
+            'wardrobe': wardrobe,
+            'weather_str': weather_str,
+            'weather_data': weather_data,
+            'weather_advice': weather_advice,
+            'negative_prompts': negative_prompts,
+            'cache_key': cache_key,
+        }, None
+
+    def _outfit_model_inputs(user, context):
+        """Keyword arguments for AIOutfitService.generate_outfit_suggestion / stream_outfit_suggestion."""
+        # Fetch recent "liked" outfits to help the AI learn
+        outfit_history = Outfit.query.filter_by(user_id=user.id, was_actually_worn=True)\
+                                   .order_by(Outfit.date.desc())\
+                                   .limit(20).all()
+        style_profile = current_app.style_profile_service.get(user.id)
+        return {
+            'available_items': context['wardrobe'],
+            'weather': context['weather_str'],
+            'mood': context['mood'],
+            'season': context['season'],
+            'outfit_history': Outfit.serialize_many(outfit_history),
+            'negative_prompts': context['negative_prompts'],
+            'style_dna': current_app.ai_service.summarize_style_dna(style_profile.weighted_counts(context['mood']))
+        }
+
+    def _finish_outfit_suggestion(context, suggestion, from_cache):
+        """Validates and corrects a suggestion, caches it and builds the response body."""
+        wardrobe, mood = context['wardrobe'], context['mood']
+
+        # --- Post-AI Validation and Correction ---
+        suggestion, suggested_items_list = _validate_and_correct_outfit(suggestion, wardrobe, mood)
+
+        # The local fallback is cheap (and is what we get while the model is failing),
+        # only model responses are worth keeping
+        if not from_cache and suggestion.get('source') != 'local' and suggested_items_list:
+            current_app.suggestion_cache.put(context['cache_key'], suggestion)
+
+        return {
+            'suggestion': suggestion,
+            'items': suggested_items_list,
+            'weather': context['weather_str'],
+            'weather_data': context['weather_data'],
+            'weather_advice': context['weather_advice'],
+            'mood': mood,
+            'wardrobe_count': len(wardrobe),
+            'clean_items_count': len(wardrobe) # Already filtered for clean
+        }, 200
+
+    def _spends_generation(body, status):
+        """
+        The generation-quota policy shared by /api/get-outfit, ?async=1 and the
+        stream: a free generation is spent on a successful model (or cached)
+        suggestion, never on an error or the local fallback.
+        """
+        return status == 200 and body['suggestion'].get('source') != 'local'
+
+    def _build_outfit_suggestion(user, mood, exclude_ids, collection_slug):
+        """
+        Runs the wardrobe, weather and AI pipeline for a user.
+        Returns (response body, status code); does not touch the generation quota.
+        """
+        context, error = _prepare_outfit_request(user, mood, exclude_ids, collection_slug)
+        if error:
+            return error
+
+        suggestion = current_app.suggestion_cache.get(context['cache_key'], exclude_ids)
+        from_cache = suggestion is not None
+        if not from_cache:
+            # --- AI Suggestion Call ---
+            suggestion = current_app.ai_service.generate_outfit_suggestion(**_outfit_model_inputs(user, context))
+
+        return _finish_outfit_suggestion(context, suggestion, from_cache)
+
+    def _run_outfit_job(job_id):
+        """
+        Background worker body for async outfit generation. The generation was
+        reserved when the job was submitted; it is given back when the job fails
+        or _spends_generation says the result is free.
+        """
+        job = OutfitJob.query.get(job_id)
+        if not job or job.status != 'pending':
+            return
+        job.status = 'running'
+        db.session.commit()
+
+        params = job.params or {}
+        body, status = _build_outfit_suggestion(
+            job.user, params.get('mood', 'casual'), params.get('exclude_ids', []), params.get('collection')
+        )
+
+        if not _spends_generation(body, status):
+            _refund_generation(job.user_id)
+
+        job.status = 'succeeded' if status == 200 else 'failed'
+        job.status_code = status
+        job.result = body
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+
     @app.route('/api/get-outfit', methods=['POST'])
     @login_required
     @limiter.limit(get_user_specific_limit)
@@ -1089,100 +1443,187 @@ def create_app():
             mood = data.get('mood', 'casual')
             exclude_ids = data.get('exclude_ids', [])
             collection_slug = request.args.get('collection') # Read from query params
+            run_async = request.args.get('async') in ('1', 'true')
 
-            # Let the backend determine the season for reliability
-            season = _get_current_season()
             user = get_actual_user()
 
-            # --- Usage Tracking & Limiting for Free Users ---
-            if not user.is_premium:
-                today = date.today()
-                # Reset counter if it's a new day. Handles None case on first run.
-                if user.last_generation_date is None or user.last_generation_date < today:
-                    user.last_generation_date = today
-                    user.outfit_generations_today = 0
-                
-                # Check the limit
-                if user.outfit_generations_today >= 2:
-                    return jsonify({
-                        "error": "generation_limit_reached",
-                        "message": "You've used your 2 free outfit generations for today. Upgrade to Premium for unlimited suggestions."
-                    }), 403
-            
-            wardrobe = []
-            if collection_slug:
-                collection_data = current_app.wardrobe_intelligence_service.get_single_smart_collection(user.id, collection_slug)
-                if not collection_data:
-                    return jsonify({'error': 'Collection not found'}), 404
-                # The items are already dicts, just filter for clean ones
-                wardrobe = [item for item in collection_data.get('items', []) if item.get('is_clean', True)]
-            else:
-                all_items = ClothingItem.query.filter_by(user_id=user.id, is_clean=True).all()
-                wardrobe = [item.to_dict() for item in all_items]
-
-            if not wardrobe:
-                error_message = "That collection needs a few more pieces to create a full look. Try adding another item!" if collection_slug else "Add some clothes to your wardrobe first or do some laundry!"
+            if run_async:
+                # Reserve the generation now, so queued and running jobs count against the
+                # daily limit, and hand the weather + AI pipeline to the worker pool
+                limit_error = _reserve_generation(user.id)
+                if limit_error:
+                    db.session.rollback()
+                    return jsonify(limit_error), 403
+                job = OutfitJob(
+                    user_id=user.id,
+                    params={'mood': mood, 'exclude_ids': exclude_ids, 'collection': collection_slug}
+                )
+                db.session.add(job)
+                db.session.commit()
+                current_app.outfit_jobs.submit(job.id, _run_outfit_job)
                 return jsonify({
-                    'error': 'No clean clothes available',
-                    'message': error_message,
-                }), 400
-
-            weather_data = None
-            weather_str = "mild weather"
-            weather_advice = "General weather conditions"
-            
-            if user.location:
-                weather_data = current_app.weather_service.get_current_weather(user.location)
-                weather_str = current_app.weather_service.get_weather_description(weather_data)
-                weather_advice = current_app.weather_service.get_outfit_weather_advice(weather_data)
-            
-            # Fetch recent "liked" outfits to help the AI learn
-            outfit_history = Outfit.query.filter_by(user_id=user.id, was_actually_worn=True)\
-                                       .order_by(Outfit.date.desc())\
-                                       .limit(20).all()
-            outfit_history_data = [outfit.to_dict() for outfit in outfit_history]
-
-            # Fetch user's negative prompts
-            negative_prompts = [p.prompt_text for p in user.negative_prompts]
-
-            if exclude_ids:
-                wardrobe = [item for item in wardrobe if item.get('id') not in exclude_ids]
+                    'job_id': job.id,
+                    'status': job.status,
+                    'status_url': f'/api/outfit-jobs/{job.id}',
+                    'poll_interval': OUTFIT_JOB_POLL_INTERVAL,
+                    'stream_url': f'/api/outfit-jobs/{job.id}/stream'
+                }), 202
 
-            # --- AI Suggestion Call ---
-            suggestion = current_app.ai_service.generate_outfit_suggestion(
-                available_items=wardrobe,
-                weather=weather_str,
-                mood=mood,
-                season=season,
-                outfit_history=outfit_history_data,
-                negative_prompts=negative_prompts
-            )
+            # --- Usage Tracking & Limiting for Free Users ---
+            limit_error = _generation_limit_error(user)
+            if limit_error:
+                return jsonify(limit_error), 403
 
-            # --- Post-AI Validation and Correction ---
-            suggestion, suggested_items_list = _validate_and_correct_outfit(suggestion, wardrobe, mood)
+            body, status = _build_outfit_suggestion(user, mood, exclude_ids, collection_slug)
+            if status != 200:
+                return jsonify(body), status
 
             # --- Increment counter on success for free user ---
-            if not user.is_premium:
+            if not user.is_premium and _spends_generation(body, status):
                 user.outfit_generations_today += 1
             
             db.session.commit()
             
-            return jsonify({
-                'suggestion': suggestion,
-                'items': suggested_items_list,
-                'weather': weather_str,
-                'weather_data': weather_data,
-                'weather_advice': weather_advice,
-                'mood': mood,
-                'wardrobe_count': len(wardrobe),
-                'clean_items_count': len(wardrobe) # Already filtered for clean
-            })
+            return jsonify(body)
         except Exception as e:
             if app.debug:
                 print(f"Get outfit error: {str(e)}")
                 traceback.print_exc()
             return jsonify({'error': f'Failed to generate outfit: {str(e)}'}), 500
 
+    @app.route('/api/outfit-jobs/<job_id>', methods=['GET'])
+    @login_required
+    def get_outfit_job(job_id):
+        """Polls an async outfit generation job; unfinished jobs say when to poll again (Retry-After)."""
+        user = get_actual_user()
+        job = OutfitJob.query.get(job_id)
+        if not job or job.user_id != user.id:
+            return jsonify({'error': 'Job not found'}), 404
+        current_app.outfit_jobs.expire_if_stale(job)
+        response = jsonify(job.to_dict())
+        if not job.is_finished:
+            response.headers['Retry-After'] = str(OUTFIT_JOB_POLL_INTERVAL)
+        return response
+
+    @app.route('/api/outfit-jobs/<job_id>/stream', methods=['GET'])
+    @login_required
+    def stream_outfit_job(job_id):
+        """
+        Server-sent events for an async outfit job: one event per status change,
+        closing when the job is done. After OUTFIT_JOB_STREAM_TIMEOUT seconds it
+        sends a `poll` event ({"status_url", "poll_interval"}) and closes, and the
+        client polls the status URL from there.
+        """
+        user = get_actual_user()
+        job = OutfitJob.query.get(job_id)
+        if not job or job.user_id != user.id:
+            return jsonify({'error': 'Job not found'}), 404
+
+        def event_stream():
+            last_status = None
+            deadline = time.monotonic() + OUTFIT_JOB_STREAM_TIMEOUT
+            while time.monotonic() < deadline:
+                # Drop the identity map so each poll sees the worker's latest commit
+                db.session.expire_all()
+                current = OutfitJob.query.get(job_id)
+                current_app.outfit_jobs.expire_if_stale(current)
+                if current.status != last_status:
+                    last_status = current.status
+                    yield _sse(current.status, current.to_dict())
+                if current.is_finished:
+                    return
+                db.session.rollback()
+                time.sleep(0.5)
+            yield _sse('poll', {'status_url': f'/api/outfit-jobs/{job_id}', 'poll_interval': OUTFIT_JOB_POLL_INTERVAL})
+
+        return Response(stream_with_context(event_stream()), mimetype='text/event-stream')
+
+    @app.route('/api/get-outfit/stream', methods=['POST'])
+    @login_required
+    @limiter.limit(get_user_specific_limit)
+    def stream_outfit_suggestion():
+        """
+        Streaming variant of /api/get-outfit over server-sent events:
+          items                 the picked item ids and their details, as soon as the model lists them;
+                                sent again before done when validation or the fallback changed the
+                                picks, in which case it replaces what the client rendered
+          reasoning, style_notes, color_story, weather_notes
+                                {"delta": text} as the model writes them
+          done                  the same body /api/get-outfit returns (after validation and correction)
+          error                 {"error": message}
+
+        A free user's generation is reserved before streaming starts, so a client
+        that disconnects mid-stream still spends it; it is given back on error or
+        when _spends_generation says the result is free, as on the other routes.
+        """
+        data = request.get_json() or {}
+        mood = data.get('mood', 'casual')
+        exclude_ids = data.get('exclude_ids', [])
+        collection_slug = request.args.get('collection')
+
+        user = get_actual_user()
+        user_id = user.id
+        limit_error = _reserve_generation(user_id)
+        if limit_error:
+            db.session.rollback()
+            return jsonify(limit_error), 403
+        db.session.commit()
+
+        context, error = _prepare_outfit_request(user, mood, exclude_ids, collection_slug)
+        if error:
+            _refund_generation(user_id)
+            db.session.commit()
+            body, status = error
+            return jsonify(body), status
+
+        def event_stream():
+            try:
+                suggestion = current_app.suggestion_cache.get(context['cache_key'], exclude_ids)
+                from_cache = suggestion is not None
+                streamed_ids = None
+                if not from_cache:
+                    items_by_id = {item['id']: item for item in context['wardrobe']}
+                    events = current_app.ai_service.stream_outfit_suggestion(**_outfit_model_inputs(user, context))
+                    for event, payload in events:
+                        if event == 'suggestion':
+                            suggestion = payload
+                        elif event == 'items':
+                            picked = [items_by_id[item_id] for item_id in payload if item_id in items_by_id]
+                            streamed_ids = [item['id'] for item in picked]
+                            yield _sse('items', {'selected_items': streamed_ids, 'items': picked})
+                        else:
+                            yield _sse(event, {'delta': payload})
+
+                body, status = _finish_outfit_suggestion(context, suggestion, from_cache)
+
+                if streamed_ids is not None and streamed_ids != body['suggestion'].get('selected_items'):
+                    # Validation added pieces or the fallback picked others; the client replaces its items
+                    yield _sse('items', {'selected_items': body['suggestion'].get('selected_items', []), 'items': body['items']})
+
+                if not _spends_generation(body, status):
+                    _refund_generation(user_id)
+                    db.session.commit()
+
+                yield _sse('done', body)
+            except Exception as e:
+                db.session.rollback()
+                if app.debug:
+                    print(f"Stream outfit error: {str(e)}")
+                    traceback.print_exc()
+                try:
+                    _refund_generation(user_id)
+                    db.session.commit()
+                except Exception as refund_error:
+                    db.session.rollback()
+                    print(f"Could not refund outfit generation for user {user_id}: {refund_error}")
+                yield _sse('error', {'error': 'Failed to generate outfit.'})
+
+        response = Response(stream_with_context(event_stream()), mimetype='text/event-stream')
+        # Stop reverse proxies from buffering the stream
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
     @app.route('/api/save-outfit', methods=['POST'])
     @login_required
     def save_outfit():
@@ -1196,16 +1637,7 @@ def create_app():
             if len(items) != len(item_ids):
                 return jsonify({'error': 'One or more clothing items not found or not owned by user.'}), 404
 
-            items_snapshot = []
-            for item in items:
-                snapshot = {
-                    'id': item.id,
-                    'name': item.name,
-                    'image_url': item.image_url,
-                    'type': item.type,
-                    'color': item.color
-                }
-                items_snapshot.append(snapshot)
+            items_snapshot = Outfit.build_items_snapshot(items)
 
             outfit = Outfit(
                 user_id=user.id,
@@ -1221,11 +1653,12 @@ def create_app():
             # Still associate with real items for other features, but snapshot preserves history
             outfit.clothing_items.extend(items)
 
-            for item in items:
-                current_app.laundry_service.increment_wear_count(item.id)
-
             db.session.add(outfit)
-            db.session.commit()
+            current_app.style_profile_service.record_outfit(outfit, items)
+
+            # Commits the outfit together with the wear counts
+            if not current_app.laundry_service.record_wear(user.id, [item.id for item in items]):
+                return jsonify({'error': 'Failed to save outfit'}), 500
             return jsonify({'message': 'Outfit saved successfully', 'outfit': outfit.to_dict()})
         except Exception as e:
             if app.debug:
@@ -1244,9 +1677,8 @@ def create_app():
             month = request.args.get('month', type=int)
 
             user = get_actual_user()
-            query = Outfit.query.options(
-                selectinload(Outfit.clothing_items).selectinload(ClothingItem.owner)
-            ).filter_by(user_id=user.id)
+            # Outfits carry an items snapshot, so history is a single-table read
+            query = Outfit.query.filter_by(user_id=user.id)
 
             # Date range filter (for list view)
             if start_date_str:
@@ -1272,7 +1704,7 @@ def create_app():
             if start_date_str or end_date_str or (year and month):
                 outfits = query.all()
                 return jsonify({
-                    'outfits': [outfit.to_dict() for outfit in outfits],
+                    'outfits': Outfit.serialize_many(outfits),
                     'total': len(outfits),
                     'pages': 1,
                     'current_page': 1
@@ -1283,7 +1715,7 @@ def create_app():
                 per_page = request.args.get('per_page', 10, type=int)
                 paginated_outfits = query.paginate(page=page, per_page=per_page, error_out=False)
                 return jsonify({
-                    'outfits': [outfit.to_dict() for outfit in paginated_outfits.items],
+                    'outfits': Outfit.serialize_many(paginated_outfits.items),
                     'total': paginated_outfits.total,
                     'pages': paginated_outfits.pages,
                     'current_page': page
@@ -1360,7 +1792,7 @@ def create_app():
 
             if item.is_clean:
                 # Mark as dirty
-                current_app.laundry_service.increment_wear_count(item_id)
+                current_app.laundry_service.record_wear(user.id, [item_id])
             else:
                 # Mark as clean
                 current_app.laundry_service.mark_items_washed([item_id])
@@ -1442,17 +1874,18 @@ def create_app():
     def get_style_dna():
         try:
             user = get_actual_user()
-            items = ClothingItem.query.filter_by(user_id=user.id).all()
-            outfits = Outfit.query.filter_by(user_id=user.id).all()
-            style_counts = Counter(item.style for item in items if item.style)
-            color_counts = Counter(item.color for item in items if item.color)
-            brand_counts = Counter(item.brand for item in items if item.brand)
+            counts = current_app.style_profile_service.get(user.id).weighted_counts()
+            style_counts, color_counts, brand_counts = counts['style'], counts['color'], counts['brand']
+            outfits = Outfit.query.filter_by(user_id=user.id)\
+                .order_by(Outfit.date.desc(), Outfit.id.desc())\
+                .limit(10).all()
             outfit_combos = []
-            for outfit in outfits[-10:]:
+            for outfit in reversed(outfits):
+                outfit_items_data = outfit.snapshot_items()
                 combo = {
                     'mood': outfit.mood,
-                    'items': [item.type for item in outfit.clothing_items],
-                    'colors': [item.color for item in outfit.clothing_items if item.color],
+                    'items': [item['type'] for item in outfit_items_data],
+                    'colors': [item['color'] for item in outfit_items_data if item['color']],
                     'date': outfit.date.isoformat()
                 }
                 outfit_combos.append(combo)
@@ -0,0 +1,51 @@
+"""
+One-off job: writes items_snapshot for outfits saved before snapshots existed,
+so outfit history and calendar reads never need the outfit_items join.
+Safe to re-run; outfits that already have a snapshot are skipped.
+
+    python backfill_outfit_snapshots.py
+"""
+from app import create_app, db
+from models import Outfit, ClothingItem, outfit_items
+
+BATCH_SIZE = 500
+
+def backfill_outfit_snapshots():
+    app = create_app()
+    with app.app_context():
+        print("Backfilling outfit item snapshots...")
+
+        last_id = 0
+        updated = 0
+        while True:
+            outfits = Outfit.query.filter(Outfit.id > last_id)\
+                .order_by(Outfit.id)\
+                .limit(BATCH_SIZE)\
+                .all()
+            if not outfits:
+                break
+            last_id = outfits[-1].id
+
+            legacy = {outfit.id: outfit for outfit in outfits if not outfit.items_snapshot}
+            if not legacy:
+                continue
+
+            rows = db.session.query(outfit_items.c.outfit_id, ClothingItem)\
+                .join(ClothingItem, ClothingItem.id == outfit_items.c.clothing_item_id)\
+                .filter(outfit_items.c.outfit_id.in_(legacy.keys()))\
+                .order_by(outfit_items.c.outfit_id, ClothingItem.id)\
+                .all()
+            items_by_outfit = {outfit_id: [] for outfit_id in legacy}
+            for outfit_id, item in rows:
+                items_by_outfit[outfit_id].append(item)
+
+            for outfit_id, outfit in legacy.items():
+                outfit.items_snapshot = Outfit.build_items_snapshot(items_by_outfit[outfit_id])
+            db.session.commit()
+            updated += len(legacy)
+            print(f"  ...{updated} outfits updated (through outfit {last_id})")
+
+        print(f"Backfill complete. {updated} outfits now have snapshots.")
+
+if __name__ == '__main__':
+    backfill_outfit_snapshots()
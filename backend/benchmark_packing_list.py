@@ -0,0 +1,117 @@
+"""
+Benchmarks the packing-list assembly stage (wardrobe load, name matching and
+essential preferences) for wardrobes of 50, 500 and 5,000 items, comparing the
+previous approach with the current one. The AI call itself is not included.
+
+Runs against a scratch SQLite database unless DATABASE_URL is already set:
+
+    python benchmark_packing_list.py [--sizes 50 500 5000] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'packing_benchmark.db')
+
+from app import create_app, db
+from models import User, ClothingItem, PackingListItem, UserEssentialPreference
+from utils.packing_service import ESSENTIALS, build_packing_items, essential_quantities
+
+TYPES = ['shirt', 't-shirt', 'sweater', 'jeans', 'pants', 'shorts', 'jacket', 'coat', 'shoes', 'boots', 'dress']
+SUGGESTIONS = 40
+TRIP_DURATION = 7
+
+def seed_user(size):
+    user = User(email=f'packing-benchmark-{size}@example.com', password_hash='x', is_verified=True, is_premium=True)
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all([
+        ClothingItem(user_id=user.id, name=f'Item {i}', type=TYPES[i % len(TYPES)], style='casual',
+                     color='navy', season='all', fabric='cotton', is_clean=True)
+        for i in range(size)
+    ])
+    db.session.add(UserEssentialPreference(user_id=user.id, item_type='socks', quantity=5))
+    db.session.commit()
+    return user
+
+def fake_ai_response(size):
+    """Mostly wardrobe items, spread across the wardrobe, plus a few extras."""
+    step = max(1, size // SUGGESTIONS)
+    names = [f'Item {i}' for i in range(0, size, step)][:SUGGESTIONS - 5]
+    return {
+        'Clothing': names,
+        'Extras': ['Passport', 'Phone charger', {'name': 'Toiletries'}, 'Socks', 'Sunglasses']
+    }
+
+def previous_assembly(user_id, generated_items):
+    """The assembly as it was: full to_dict(), linear name scan, one preference query per essential."""
+    available_items = ClothingItem.query.filter_by(user_id=user_id, is_clean=True).all()
+    [item.to_dict() for item in available_items]
+
+    final_items = {}
+    for category, items in generated_items.items():
+        for item_detail in items:
+            item_name = (item_detail['name'] if isinstance(item_detail, dict) else item_detail).strip()
+            normalized_name = item_name.lower()
+            clothing_item = next((item for item in available_items if item.name.lower() == normalized_name), None)
+            if normalized_name not in final_items:
+                final_items[normalized_name] = PackingListItem(
+                    item_name=item_name, quantity=1,
+                    clothing_item_id=clothing_item.id if clothing_item else None
+                )
+    for item_name, item_type in ESSENTIALS.items():
+        preference = UserEssentialPreference.query.filter_by(user_id=user_id, item_type=item_type).first()
+        quantity = preference.quantity if preference is not None else (1 if item_type == 'pajamas' else TRIP_DURATION)
+        if quantity > 0:
+            if item_name.lower() in final_items:
+                final_items[item_name.lower()].quantity = quantity
+            else:
+                final_items[item_name.lower()] = PackingListItem(item_name=item_name, quantity=quantity)
+    return final_items
+
+def current_assembly(user_id, generated_items):
+    wardrobe = ClothingItem.project(
+        ClothingItem.query.filter_by(user_id=user_id, is_clean=True), ClothingItem.PACKING_FIELDS
+    )
+    return build_packing_items(generated_items, wardrobe, essential_quantities(user_id, TRIP_DURATION))
+
+def best_of(repeat, fn, *args):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        db.session.expire_all()
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), result
+
+def summarize(items):
+    return sorted((key, item.quantity, item.clothing_item_id is not None) for key, item in items.items())
+
+def benchmark_packing_list(sizes, repeat):
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        app.search_service.ensure_index()
+        print(f"{'items':>6} {'previous ms':>12} {'current ms':>11} {'speedup':>8}")
+        for size in sizes:
+            user = seed_user(size)
+            generated = fake_ai_response(size)
+            previous_ms, previous = best_of(repeat, previous_assembly, user.id, generated)
+            current_ms, current = best_of(repeat, current_assembly, user.id, generated)
+            # Same items, quantities and wardrobe links either way
+            assert summarize(previous) == summarize(current), f"assembly results differ at {size} items"
+            print(f"{size:>6} {previous_ms:>12.1f} {current_ms:>11.1f} {previous_ms / current_ms:>7.1f}x")
+
+            ClothingItem.query.filter_by(user_id=user.id).delete()
+            db.session.delete(user)
+            db.session.commit()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    benchmark_packing_list(args.sizes, args.repeat)
@@ -0,0 +1,236 @@
+"""
+Offline micro-benchmarks for the service hot paths, against a scratch SQLite
+database seeded with synthetic users of 50, 500 and 5,000 items (each with
+10,000 outfits of history). No network or OpenAI access is needed.
+
+Timings (median of --repeat runs, in ms) are compared with a JSON baseline and
+the script exits non-zero when any path is more than --tolerance percent
+slower. Baselines are machine specific, so record one on the machine that
+will run the comparison:
+
+    python benchmark_services.py --save                # record the baseline
+    python benchmark_services.py [--tolerance 25]      # compare against it
+    python benchmark_services.py --sizes 50 500 --outfits 2000 --only laundry
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'service_benchmark.db')
+
+from app import create_app, db
+from models import User, ClothingItem, Outfit, outfit_items
+from utils.ai_service import AIOutfitService
+from utils.laundry_service import LaundryIntelligenceService
+from utils.wardrobe_intelligence import AnalyticsService, WardrobeIntelligenceService
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+TYPES = ['shirt', 't-shirt', 'sweater', 'jeans', 'pants', 'shorts', 'skirt', 'dress', 'jacket', 'coat',
+         'shoes', 'sneakers', 'boots', 'hat', 'scarf', 'belt']
+STYLES = ['casual', 'formal', 'business', 'sporty', 'bohemian', 'streetwear', 'minimalist']
+COLORS = ['black', 'white', 'navy', 'grey', 'beige', 'red', 'olive', 'light blue', 'burgundy', 'mustard',
+          'dark green', 'cream', 'pink', 'teal', 'brown']
+FABRICS = ['cotton', 'wool', 'linen', 'denim', 'silk', 'polyester', 'leather', 'cashmere']
+SEASONS = ['all', 'spring', 'summer', 'fall', 'winter']
+MOODS = ['casual', 'professional', 'sporty', 'cozy', 'date', 'party', 'elegant', 'trendy']
+URGENCY = ['none', 'none', 'low', 'medium', 'high', 'urgent']
+ITEMS_PER_OUTFIT = 3
+
+
+def seed_user(size, outfit_count, rng):
+    """A user with `size` items (about a third of them dirty) and `outfit_count` worn outfits over a year."""
+    now = datetime.utcnow()
+    user = User(email=f'service-benchmark-{size}@example.com', password_hash='x', is_verified=True,
+                is_premium=True, location='Paris')
+    db.session.add(user)
+    db.session.flush()
+
+    items = []
+    for i in range(size):
+        dirty = rng.random() < 0.3
+        worn = rng.randint(0, 60)
+        items.append(ClothingItem(
+            user_id=user.id, name=f'Item {i}', type=TYPES[i % len(TYPES)], style=rng.choice(STYLES),
+            color=rng.choice(COLORS), season=rng.choice(SEASONS), fabric=rng.choice(FABRICS),
+            mood_tags=rng.sample(MOODS, 2), is_clean=not dirty, needs_washing=dirty,
+            laundry_status='dirty' if dirty else 'clean', wash_urgency=rng.choice(URGENCY) if dirty else 'none',
+            wear_count=worn, wear_count_since_wash=rng.randint(0, 5) if dirty else 0,
+            last_worn=now - timedelta(days=rng.randint(0, 365)) if worn else None,
+            last_washed=now - timedelta(days=rng.randint(0, 90)),
+            purchase_cost=round(rng.uniform(10, 300), 2),
+            created_at=now - timedelta(days=rng.randint(0, 900))
+        ))
+    db.session.add_all(items)
+    db.session.flush()
+
+    # Outfits and their item links go in as bulk inserts; the ORM would take minutes at 10k
+    outfit_rows = []
+    chosen = []
+    for _ in range(outfit_count):
+        picked = rng.sample(items, min(ITEMS_PER_OUTFIT, size))
+        chosen.append(picked)
+        outfit_rows.append({
+            'user_id': user.id, 'mood': rng.choice(MOODS), 'weather': f'{rng.randint(-5, 32)}°C, clear',
+            'date': now - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 1440)),
+            'was_actually_worn': True, 'rating': rng.randint(1, 5),
+            'items_snapshot': Outfit.build_items_snapshot(picked)
+        })
+    db.session.execute(Outfit.__table__.insert(), outfit_rows)
+    outfit_ids = [row[0] for row in db.session.query(Outfit.id).filter_by(user_id=user.id).order_by(Outfit.id)]
+    db.session.execute(outfit_items.insert(), [
+        {'outfit_id': outfit_id, 'clothing_item_id': item.id}
+        for outfit_id, picked in zip(outfit_ids, chosen) for item in picked
+    ])
+    db.session.commit()
+    return user.id
+
+
+def hot_paths(user_id, ai_service):
+    """
+    (name, callable, queries the database) for every benchmarked path; setup
+    that isn't being measured happens here.
+    """
+    items = ClothingItem.query.filter_by(user_id=user_id).all()
+    serialized = [item.to_dict() for item in items]
+    clean = [data for data in serialized if data.get('is_clean', True)]
+    needing_wash = [data for data in serialized if not data.get('is_clean', True) or data.get('needs_washing')]
+    history = Outfit.serialize_many(
+        Outfit.query.filter_by(user_id=user_id, was_actually_worn=True).order_by(Outfit.date.desc()).limit(20).all()
+    )
+
+    def to_dict_all():
+        return [item.to_dict() for item in items]
+
+    return [
+        ('ClothingItem.to_dict', to_dict_all, False),
+        ('WardrobeIntelligenceService.get_smart_collections',
+         lambda: WardrobeIntelligenceService.get_smart_collections(user_id), True),
+        ('WardrobeIntelligenceService.get_wardrobe_gaps',
+         lambda: WardrobeIntelligenceService.get_wardrobe_gaps(user_id), True),
+        ('WardrobeIntelligenceService.get_enhanced_outfit_suggestions',
+         lambda: WardrobeIntelligenceService.get_enhanced_outfit_suggestions(user_id, 'casual', '18°C, clear'), True),
+        ('AnalyticsService.get_usage_analytics',
+         lambda: AnalyticsService.get_usage_analytics(user_id), True),
+        ('LaundryIntelligenceService.get_laundry_alerts',
+         lambda: LaundryIntelligenceService.get_laundry_alerts(user_id), True),
+        ('LaundryIntelligenceService._suggest_laundry_loads',
+         lambda: LaundryIntelligenceService._suggest_laundry_loads(needing_wash), False),
+        ('AIOutfitService._create_enhanced_outfit_prompt',
+         lambda: ai_service._create_enhanced_outfit_prompt(clean, '18°C, clear', 'casual', 'fall', history), False),
+    ]
+
+
+def median_ms(fn, repeat, cold_session):
+    """Median wall time of `repeat` calls after one warm-up call, optionally with a cold session each time."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        if cold_session:
+            db.session.expire_all()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(sizes, outfit_count, repeat, only):
+    rng = random.Random(42)
+    ai_service = AIOutfitService(api_key=None)
+    results = {}
+    for size in sizes:
+        print(f"Seeding {size} items and {outfit_count} outfits...")
+        user_id = seed_user(size, outfit_count, rng)
+        for name, fn, queries in hot_paths(user_id, ai_service):
+            if only and not any(word.lower() in name.lower() for word in only):
+                continue
+            key = f'{name}[{size}]'
+            results[key] = round(median_ms(fn, repeat, queries), 3)
+            print(f"  {key:<72} {results[key]:>10.2f} ms")
+        db.session.remove()
+    return results
+
+
+def compare(results, baseline, tolerance, noise_floor):
+    """Prints each path against the baseline and returns the ones that regressed past `tolerance` percent."""
+    regressions = []
+    print(f"\n{'path':<72} {'baseline':>10} {'now':>10} {'change':>8}")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:<72} {'-':>10} {current:>10.2f}      new")
+            continue
+        change = (current - previous) / previous * 100 if previous else 0.0
+        # Sub-millisecond paths jitter by more than any sensible percentage
+        regressed = change > tolerance and current - previous > noise_floor
+        print(f"{key:<72} {previous:>10.2f} {current:>10.2f} {change:>+7.1f}%{'  REGRESSED' if regressed else ''}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--outfits', type=int, default=10000, help='outfits of history per user')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help='only paths whose name contains one of these words')
+    parser.add_argument('--baseline', default=os.environ.get('BENCHMARK_BASELINE', DEFAULT_BASELINE))
+    parser.add_argument('--tolerance', type=float, default=float(os.environ.get('BENCHMARK_TOLERANCE', 25)),
+                        help='allowed slowdown in percent before a path counts as regressed')
+    parser.add_argument('--noise-floor', type=float, default=1.0,
+                        help='slowdowns smaller than this many ms are never regressions')
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        app.search_service.ensure_index()
+        results = run(args.sizes, args.outfits, args.repeat, args.only)
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get('results', {})
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'outfits_per_user': args.outfits,
+                'repeat': args.repeat,
+                'results': baseline
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('outfits_per_user') != args.outfits:
+        print(f"\nNote: the baseline was recorded with {baseline.get('outfits_per_user')} outfits per user, "
+              f"this run used {args.outfits}; history-heavy paths won't be comparable.")
+    regressions = compare(results, baseline.get('results', {}), args.tolerance, args.noise_floor)
+    if regressions:
+        print(f"\n{len(regressions)} path(s) more than {args.tolerance:g}% slower than the baseline.")
+        return 1
+    print(f"\nNo path more than {args.tolerance:g}% slower than the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Query plan check for the hot per-user queries.
+
+Runs EXPLAIN (PostgreSQL) or EXPLAIN QUERY PLAN (SQLite) against the configured
+database and exits non-zero if any of the queries below falls back to a full
+table scan. Run it after `flask db upgrade`:
+
+    python check_query_plans.py
+"""
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import Date, cast, distinct, func, select, text
+from app import create_app
+from models import db, ClothingItem, Outfit, Notification, UserActivity, outfit_items
+
+def hot_queries():
+    """(label, table, statement) for every query that must be index-backed."""
+    user_id = 1
+    since = datetime.utcnow() - timedelta(days=30)
+
+    return [
+        ('wardrobe page', 'clothing_item',
+         ClothingItem.query.filter_by(user_id=user_id)
+         .order_by(ClothingItem.created_at, ClothingItem.id).limit(50).statement),
+        ('clean items for get-outfit', 'clothing_item',
+         ClothingItem.query.filter_by(user_id=user_id, is_clean=True).statement),
+        ('outfit history', 'outfit',
+         Outfit.query.filter_by(user_id=user_id)
+         .filter(Outfit.date >= since).order_by(Outfit.date.desc()).statement),
+        ('notification list', 'notification',
+         Notification.query.filter_by(user_id=user_id)
+         .order_by(Notification.is_read.asc(), Notification.created_at.desc()).statement),
+        ('unread notifications', 'notification',
+         Notification.query.filter_by(user_id=user_id, is_read=False).statement),
+        ('daily active users', 'user_activity',
+         select(cast(UserActivity.timestamp, Date), func.count(distinct(UserActivity.user_id)))
+         .where(UserActivity.timestamp >= since)
+         .group_by(cast(UserActivity.timestamp, Date))),
+        ('outfits containing an item', 'outfit_items',
+         select(outfit_items.c.outfit_id).where(outfit_items.c.clothing_item_id == 1)),
+    ]
+
+def explain(statement):
+    """Returns the plan lines for a statement on the current dialect."""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+    if dialect.name == 'postgresql':
+        rows = db.session.execute(text(f'EXPLAIN {sql}'))
+        return [row[0] for row in rows]
+
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))
+    return [row[-1] for row in rows]
+
+def is_full_scan(plan, table):
+    for line in plan:
+        line = line.strip()
+        if line.startswith(f'SCAN {table}') and 'USING' not in line:
+            return True
+        if f'Seq Scan on {table}' in line:
+            return True
+    return False
+
+def check_query_plans():
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            # On near-empty tables the planner prefers a sequential scan even when a
+            # usable index exists; disable it so the plan shows whether one does.
+            db.session.execute(text('SET enable_seqscan = off'))
+
+        failures = []
+        for label, table, statement in hot_queries():
+            plan = explain(statement)
+            status = 'FULL SCAN' if is_full_scan(plan, table) else 'ok'
+            print(f"[{status}] {label}")
+            for line in plan:
+                print(f"    {line}")
+            if status != 'ok':
+                failures.append(label)
+
+        db.session.rollback()
+
+        if failures:
+            print(f"\n{len(failures)} hot queries regressed to a full table scan: {', '.join(failures)}")
+            return False
+
+        print("\nAll hot queries use an index.")
+        return True
+
+if __name__ == '__main__':
+    if not check_query_plans():
+        sys.exit(1)
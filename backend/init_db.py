@@ -26,6 +26,7 @@ def init_database():
             # Create all tables
             print("📋 Creating database tables...")
             db.create_all()
+            app.search_service.ensure_index()
             print("✅ All tables created successfully!")
             
             # List created tables
@@ -0,0 +1,7 @@
+"""
+Load-test harness: local stand-ins for the external services (fake_services),
+user scenarios (scenarios) and a runner that drives them against gunicorn
+(run). Start with:
+
+    python -m loadtest.run --help
+"""
@@ -0,0 +1,355 @@
+"""
+Local stand-ins for OpenAI, OpenWeather, Brevo, Cloudinary and Lemon Squeezy.
+
+Each service listens on its own port and answers the handful of endpoints the
+app calls with well-formed responses, after a configurable delay and with a
+configurable share of injected errors. `FakeServices.environ()` returns the
+environment variables that point the app at them.
+
+Run standalone (e.g. to point a dev server at them):
+
+    python -m loadtest.fake_services --latency openai=1500 --jitter openai=500 --error-rate openai=0.02
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SERVICES = ('openai', 'weather', 'brevo', 'cloudinary', 'lemonsqueezy')
+
+# Typical production latencies (ms), used when nothing else is configured
+DEFAULT_LATENCY_MS = {'openai': 1200, 'weather': 120, 'brevo': 150, 'cloudinary': 400, 'lemonsqueezy': 200}
+STREAM_CHUNK_CHARS = 12
+FAKE_CLOUD_NAME = 'loadtest'
+
+
+class FakeService:
+    """Latency and error-injection settings plus request counters for one service."""
+
+    def __init__(self, name, latency_ms=None, jitter_ms=0, error_rate=0.0, error_status=503):
+        self.name = name
+        self.latency_ms = DEFAULT_LATENCY_MS[name] if latency_ms is None else latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def delay(self):
+        delay_ms = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms))
+        time.sleep(delay_ms / 1000)
+
+    def should_fail(self):
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.errors += 1
+        return failed
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'injected_errors': self.errors}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    service = None  # set per server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        parsed = urlparse(self.path)
+        body = self._body() if method == 'POST' else b''
+        self.service.delay()
+        if self.service.should_fail():
+            self._send_json({'error': {'message': 'Injected failure', 'type': 'server_error'}},
+                            self.service.error_status)
+            return
+        handler = ROUTES[self.service.name]
+        handler(self, method, parsed.path, parse_qs(parsed.query), body)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+# --- OpenAI ---
+
+_OUTFIT_HEADER = 'AVAILABLE WARDROBE (one row per item'
+_OUTFIT_CATEGORIES = ('tops:', 'bottoms:', 'shoes:', 'outerwear:')
+_PACKING_ITEM = re.compile(r'"id":\s*(\d+),\s*"name":\s*"([^"]*)"')
+
+
+def _outfit_answer(prompt):
+    """Picks the first top, bottom, shoes and outerwear row from the prompt's wardrobe section."""
+    selected = []
+    category, taken = None, False
+    section = prompt.split(_OUTFIT_HEADER, 1)[1].split('REQUIREMENTS:', 1)[0]
+    for line in section.splitlines():
+        line = line.strip()
+        if line.lower().endswith(':'):
+            category = line.lower()
+            taken = False
+            continue
+        cell = line.split('|', 1)[0]
+        if category in _OUTFIT_CATEGORIES and not taken and cell.isdigit():
+            selected.append(int(cell))
+            taken = True
+    return {
+        'selected_items': selected,
+        'reasoning': 'A balanced look built from versatile pieces for the day ahead.',
+        'style_notes': 'Tuck the top in and keep accessories minimal.',
+        'color_story': 'Neutral base with one accent.',
+        'weather_notes': 'Comfortable for the forecast.',
+        'confidence': 0.8
+    }
+
+
+def _packing_answer(prompt):
+    items = [{'id': int(item_id), 'name': name} for item_id, name in _PACKING_ITEM.findall(prompt)[:12]]
+    return {
+        'reasoning': 'Mix-and-match basics that cover every day of the trip.',
+        'packing_list': {'Clothing': items, 'Essentials': ['Socks', 'Underwear', 'Pajamas']},
+        'special_activities': [],
+        'special_outfits': {}
+    }
+
+
+def _chat_answer(messages):
+    prompt = messages[-1].get('content', '') if messages else ''
+    system = ' '.join(message.get('content', '') for message in messages if message.get('role') == 'system')
+    if _OUTFIT_HEADER in prompt:
+        return _outfit_answer(prompt)
+    if '"add"' in prompt and '"remove"' in prompt:
+        return {'add': {}, 'remove': [], 'reasoning': 'Nothing to change.'}
+    if 'packing' in (prompt + system).lower():
+        return _packing_answer(prompt)
+    return {'reasoning': 'OK'}
+
+
+def _openai(handler, method, path, query, body):
+    if method != 'POST' or not path.endswith('/chat/completions'):
+        handler._send_json({'error': {'message': 'Not found'}}, 404)
+        return
+    request = json.loads(body or b'{}')
+    content = json.dumps(_chat_answer(request.get('messages', [])))
+    usage = {'prompt_tokens': len(body) // 4, 'completion_tokens': len(content) // 4,
+             'total_tokens': (len(body) + len(content)) // 4}
+    base = {'id': f'chatcmpl-{uuid.uuid4().hex[:12]}', 'created': int(time.time()),
+            'model': request.get('model', 'gpt-4o')}
+
+    if not request.get('stream'):
+        handler._send_json({**base, 'object': 'chat.completion', 'usage': usage, 'choices': [
+            {'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}
+        ]})
+        return
+
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'text/event-stream')
+    handler.send_header('Connection', 'close')
+    handler.end_headers()
+    handler.close_connection = True
+    chunk = {**base, 'object': 'chat.completion.chunk'}
+    for start in range(0, len(content), STREAM_CHUNK_CHARS):
+        delta = {'content': content[start:start + STREAM_CHUNK_CHARS]}
+        choices = [{'index': 0, 'delta': delta, 'finish_reason': None}]
+        handler.wfile.write(f"data: {json.dumps({**chunk, 'choices': choices})}\n\n".encode())
+    finish = [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]
+    handler.wfile.write(f"data: {json.dumps({**chunk, 'choices': finish})}\n\n".encode())
+    if (request.get('stream_options') or {}).get('include_usage'):
+        handler.wfile.write(f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage})}\n\n".encode())
+    handler.wfile.write(b'data: [DONE]\n\n')
+
+
+# --- OpenWeather ---
+
+def _weather(handler, method, path, query, body):
+    now = int(time.time())
+    city = (query.get('q') or ['Paris'])[0].split(',')[0]
+    if path.endswith('/geo/1.0/direct'):
+        handler._send_json([{'name': city, 'lat': 48.85, 'lon': 2.35, 'country': 'FR'}])
+    elif path.endswith('/2.5/weather'):
+        handler._send_json({
+            'name': city, 'visibility': 10000,
+            'main': {'temp': 17.2, 'feels_like': 16.4, 'humidity': 62, 'pressure': 1016},
+            'weather': [{'main': 'Clouds', 'description': 'scattered clouds', 'icon': '03d'}],
+            'wind': {'speed': 3.6}, 'sys': {'country': 'FR', 'sunrise': now - 20000, 'sunset': now + 20000}
+        })
+    elif path.endswith('/2.5/forecast'):
+        handler._send_json({'list': [
+            {'dt': now + 10800 * i, 'main': {'temp': 17 + i}, 'pop': 0.1,
+             'weather': [{'main': 'Clouds', 'description': 'broken clouds'}]}
+            for i in range(8)
+        ]})
+    elif path.endswith('/3.0/onecall'):
+        handler._send_json({'daily': [
+            {'dt': now + 86400 * i, 'temp': {'day': 18 + i % 3, 'min': 12, 'max': 22},
+             'weather': [{'main': 'Clear', 'description': 'clear sky'}]}
+            for i in range(8)
+        ]})
+    else:
+        handler._send_json({'message': 'Not found'}, 404)
+
+
+# --- Brevo ---
+
+def _brevo(handler, method, path, query, body):
+    if method == 'POST' and path.endswith('/smtp/email'):
+        handler._send_json({'messageId': f'<{uuid.uuid4().hex}@smtp-relay.mailin.fr>'}, 201)
+    else:
+        handler._send_json({'message': 'Not found'}, 404)
+
+
+# --- Cloudinary ---
+
+def _cloudinary(handler, method, path, query, body):
+    if method == 'POST' and path.endswith('/image/upload'):
+        public_id = f'virtual-wardrobe/{uuid.uuid4().hex[:20]}'
+        handler._send_json({
+            'public_id': public_id, 'version': int(time.time()), 'format': 'jpg', 'resource_type': 'image',
+            'width': 1000, 'height': 1000, 'bytes': len(body),
+            'secure_url': f'https://res.cloudinary.com/{FAKE_CLOUD_NAME}/image/upload/{public_id}.jpg',
+            'url': f'http://res.cloudinary.com/{FAKE_CLOUD_NAME}/image/upload/{public_id}.jpg'
+        })
+    else:
+        handler._send_json({'error': {'message': 'Not found'}}, 404)
+
+
+# --- Lemon Squeezy ---
+
+def _subscription(subscription_id, email):
+    return {'type': 'subscriptions', 'id': str(subscription_id), 'attributes': {
+        'status': 'active', 'user_email': email,
+        'urls': {'customer_portal': f'https://loadtest.lemonsqueezy.com/billing/{subscription_id}'}
+    }}
+
+
+def _lemonsqueezy(handler, method, path, query, body):
+    match = re.search(r'/v1/subscriptions/?(\w*)$', path)
+    if method != 'GET' or not match:
+        handler._send_json({'errors': [{'detail': 'Not found'}]}, 404)
+    elif match.group(1):
+        handler._send_json({'data': _subscription(match.group(1), 'user@example.com')})
+    else:
+        email = (query.get('filter[user_email]') or ['user@example.com'])[0]
+        handler._send_json({'data': [_subscription(abs(hash(email)) % 100000, email)]})
+
+
+ROUTES = {'openai': _openai, 'weather': _weather, 'brevo': _brevo,
+          'cloudinary': _cloudinary, 'lemonsqueezy': _lemonsqueezy}
+
+
+class FakeServices:
+    """Starts every stand-in on its own port (consecutive from `base_port`, or free ports when 0)."""
+
+    def __init__(self, services=None, host='127.0.0.1', base_port=0):
+        self.services = {name: (services or {}).get(name) or FakeService(name) for name in SERVICES}
+        self.host = host
+        self.base_port = base_port
+        self.servers = {}
+        self._threads = []
+
+    def start(self):
+        for offset, (name, service) in enumerate(self.services.items()):
+            handler = type(f'{name.title()}Handler', (_Handler,), {'service': service})
+            port = self.base_port + offset if self.base_port else 0
+            server = ThreadingHTTPServer((self.host, port), handler)
+            server.daemon_threads = True
+            thread = threading.Thread(target=server.serve_forever, name=f'fake-{name}', daemon=True)
+            thread.start()
+            self.servers[name] = server
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def url(self, name):
+        return f'http://{self.host}:{self.servers[name].server_address[1]}'
+
+    def environ(self):
+        """Environment variables that point the app (and its SDKs) at the stand-ins."""
+        return {
+            'OPENAI_API_KEY': 'sk-loadtest',
+            'OPENAI_BASE_URL': f"{self.url('openai')}/v1",
+            'WEATHER_API_KEY': 'loadtest',
+            'OPENWEATHER_API_URL': self.url('weather'),
+            'BREVO_API_KEY': 'loadtest',
+            'BREVO_API_URL': f"{self.url('brevo')}/v3",
+            'CLOUDINARY_URL': f'cloudinary://key:secret@{FAKE_CLOUD_NAME}',
+            'CLOUDINARY_UPLOAD_PREFIX': self.url('cloudinary'),
+            'LEMONSQUEEZY_API_KEY': 'loadtest',
+            'LEMONSQUEEZY_API_URL': self.url('lemonsqueezy'),
+        }
+
+    def stats(self):
+        return {name: service.stats() for name, service in self.services.items()}
+
+
+def parse_service_settings(pairs, cast):
+    """['openai=1500', 'weather=50'] -> {'openai': 1500, 'weather': 50}."""
+    settings = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        if name not in SERVICES or not value:
+            raise argparse.ArgumentTypeError(f"expected <service>=<value> with service in {', '.join(SERVICES)}: {pair}")
+        settings[name] = cast(value)
+    return settings
+
+
+def add_service_arguments(parser):
+    parser.add_argument('--latency', nargs='+', metavar='SERVICE=MS', help='mean response time per service')
+    parser.add_argument('--jitter', nargs='+', metavar='SERVICE=MS', help='uniform +/- jitter per service')
+    parser.add_argument('--error-rate', nargs='+', metavar='SERVICE=RATE', help='share of requests that fail (0-1)')
+    parser.add_argument('--error-status', type=int, default=503, help='status code of injected failures')
+
+
+def services_from_args(args):
+    latency = parse_service_settings(args.latency, float)
+    jitter = parse_service_settings(args.jitter, float)
+    error_rate = parse_service_settings(args.error_rate, float)
+    return {
+        name: FakeService(name, latency.get(name), jitter.get(name, 0), error_rate.get(name, 0.0), args.error_status)
+        for name in SERVICES
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8900, help='first port; services use consecutive ports')
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    fakes = FakeServices(services_from_args(args), base_port=args.port).start()
+    print("Fake services running. Export these for the app:\n")
+    for key, value in fakes.environ().items():
+        print(f"export {key}='{value}'")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fakes.stop()
@@ -0,0 +1,229 @@
+"""
+Drives the API under gunicorn with N concurrent virtual users while every
+external service (OpenAI, OpenWeather, Brevo, Cloudinary, Lemon Squeezy) is
+replaced by a local stand-in, and reports throughput and p50/p95/p99 latency
+per endpoint for each worker configuration and concurrency level.
+
+    python -m loadtest.run --users 10 25 50 --workers 2x1 4x1 2x8 \\
+        --scenarios morning-peak=8 trip-planning=1 signup=1 \\
+        --latency openai=1500 --jitter openai=500 --error-rate openai=0.02
+
+Worker configurations are WORKERSxTHREADS. The schema comes from the
+migrations, applied to a scratch SQLite database unless --database-url is
+given; use PostgreSQL for numbers that mean anything beyond a few workers,
+SQLite serializes every write. Rate limiting is disabled for the run.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import requests
+
+from loadtest.fake_services import FakeServices, add_service_arguments, services_from_args
+from loadtest.scenarios import SCENARIOS, Recorder
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ITEM_TYPES = ['shirt', 't-shirt', 'sweater', 'jeans', 'pants', 'skirt', 'dress', 'jacket', 'coat',
+              'shoes', 'sneakers', 'boots', 'scarf']
+COLORS = ['black', 'white', 'navy', 'grey', 'beige', 'red', 'olive', 'light blue', 'burgundy']
+STYLES = ['casual', 'formal', 'business', 'sporty', 'minimalist']
+PASSWORD = 'loadtest-password'
+STARTUP_TIMEOUT = 60
+
+
+def parse_workers(spec):
+    workers, _, threads = spec.lower().partition('x')
+    if not workers.isdigit() or (threads and not threads.isdigit()):
+        raise argparse.ArgumentTypeError(f'expected WORKERSxTHREADS, e.g. 4x2: {spec}')
+    return int(workers), int(threads or 1)
+
+
+def parse_mix(pairs):
+    """['morning-peak=8', 'signup'] -> ([scenario names], [weights])."""
+    names, weights = [], []
+    for pair in pairs:
+        name, _, weight = pair.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name}; choose from {', '.join(SCENARIOS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def prepare_database(env, user_count, items_per_user):
+    """Applies the migrations and seeds verified premium accounts with wardrobes."""
+    subprocess.run([sys.executable, '-m', 'flask', 'db', 'upgrade'], cwd=BACKEND_DIR,
+                   env={**env, 'FLASK_APP': 'app.py'}, check=True, capture_output=True)
+
+    os.environ.update(env)
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from models import db, ClothingItem, User
+
+    rng = random.Random(7)
+    accounts = []
+    app = create_app()
+    with app.app_context():
+        password_hash = generate_password_hash(PASSWORD)
+        for i in range(user_count):
+            email = f'loadtest-{i}@example.com'
+            user = User.query.filter_by(email=email).first()
+            if user is None:
+                user = User(email=email, password_hash=password_hash, is_verified=True, is_premium=True,
+                            location='Paris')
+                db.session.add(user)
+                db.session.flush()
+                db.session.add_all([
+                    ClothingItem(user_id=user.id, name=f'{color.title()} {item_type} {n}', type=item_type,
+                                 color=color, style=rng.choice(STYLES), season='all', fabric='cotton',
+                                 mood_tags=rng.sample(['casual', 'professional', 'cozy', 'date'], 2))
+                    for n in range(items_per_user)
+                    for item_type, color in [(rng.choice(ITEM_TYPES), rng.choice(COLORS))]
+                ])
+            accounts.append({'email': email, 'password': PASSWORD})
+        db.session.commit()
+    return accounts
+
+
+def start_gunicorn(env, workers, threads, port, log_path):
+    log = open(log_path, 'a')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--timeout', '120', 'wsgi:application'],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited during startup, see {log_path}')
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/health', timeout=2).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f'gunicorn did not become healthy within {STARTUP_TIMEOUT}s, see {log_path}')
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_level(base_url, accounts, users, iterations, mix, seed):
+    """Runs `iterations` scenario iterations for each of `users` concurrent virtual users."""
+    recorder = Recorder()
+    names, weights = mix
+
+    def virtual_user(index):
+        rng = random.Random(seed * 1000 + index)
+        account = accounts[index % len(accounts)]
+        for _ in range(iterations):
+            with requests.Session() as session:
+                SCENARIOS[rng.choices(names, weights)[0]](session, base_url, account, recorder, rng)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(virtual_user, range(users)))
+    return recorder.samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    """Per-endpoint request count, error count, throughput and latency percentiles."""
+    by_endpoint = {}
+    for endpoint, status, latency_ms, _ in samples:
+        by_endpoint.setdefault(endpoint, []).append((status, latency_ms))
+
+    summary = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = np.array([latency for _, latency in rows])
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(1 for status, _ in rows if status == 0 or status >= 400),
+            'throughput_rps': round(len(rows) / elapsed, 2),
+            'p50_ms': round(p50, 1), 'p95_ms': round(p95, 1), 'p99_ms': round(p99, 1),
+            'max_ms': round(float(latencies.max()), 1)
+        }
+    return summary
+
+
+def print_summary(label, summary, elapsed):
+    print(f"\n{label} ({elapsed:.1f}s)")
+    print(f"  {'endpoint':<36} {'reqs':>6} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, row in summary.items():
+        print(f"  {endpoint:<36} {row['requests']:>6} {row['errors']:>6} {row['throughput_rps']:>7.2f} "
+              f"{row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 25, 50], help='concurrent virtual users')
+    parser.add_argument('--workers', type=parse_workers, nargs='+', default=[(2, 1), (4, 1), (2, 8)],
+                        help='gunicorn configurations as WORKERSxTHREADS')
+    parser.add_argument('--iterations', type=int, default=3, help='scenario iterations per virtual user')
+    parser.add_argument('--scenarios', nargs='+', default=['morning-peak'],
+                        help=f"scenario[=weight] to mix; available: {', '.join(SCENARIOS)}")
+    parser.add_argument('--items', type=int, default=60, help='wardrobe size of each seeded account')
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite database')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--report', help='write the full results as JSON to this path')
+    add_service_arguments(parser)
+    args = parser.parse_args()
+    mix = parse_mix(args.scenarios)
+
+    workdir = tempfile.mkdtemp(prefix='wardrobe-loadtest-')
+    fakes = FakeServices(services_from_args(args)).start()
+    env = {
+        **os.environ,
+        **fakes.environ(),
+        'DATABASE_URL': args.database_url or 'sqlite:///' + os.path.join(workdir, 'loadtest.db'),
+        'FLASK_ENV': 'development',  # plain-HTTP session cookies
+        'RATELIMIT_ENABLED': 'false',
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'loadtest-secret'),
+    }
+
+    print(f"Preparing database and {max(args.users)} accounts...")
+    accounts = prepare_database(env, max(args.users), args.items)
+
+    results = []
+    log_path = os.path.join(workdir, 'gunicorn.log')
+    try:
+        for workers, threads in args.workers:
+            process = start_gunicorn(env, workers, threads, args.port, log_path)
+            try:
+                for users in args.users:
+                    samples, elapsed = run_level(f'http://127.0.0.1:{args.port}', accounts, users,
+                                                 args.iterations, mix, seed=users)
+                    summary = summarize(samples, elapsed)
+                    print_summary(f'{workers} workers x {threads} threads, {users} users', summary, elapsed)
+                    results.append({'workers': workers, 'threads': threads, 'users': users,
+                                    'elapsed_s': round(elapsed, 2), 'endpoints': summary})
+            finally:
+                stop_gunicorn(process)
+    finally:
+        fakes.stop()
+
+    print(f"\nExternal calls served by the stand-ins: {json.dumps(fakes.stats())}")
+    print(f"gunicorn log: {log_path}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'recorded_at': datetime.utcnow().isoformat(), 'scenarios': args.scenarios,
+                       'iterations': args.iterations, 'fake_services': fakes.stats(), 'runs': results}, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+User journeys for the load test. Each scenario runs one iteration for one
+virtual user on its own requests.Session and records every request in a
+Recorder under a stable endpoint label.
+"""
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+import requests
+
+# A 1x1 transparent PNG, enough for the upload path's type checks
+TINY_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082'
+)
+MOODS = ['casual', 'professional', 'sporty', 'cozy', 'date', 'party', 'elegant', 'trendy']
+REQUEST_TIMEOUT = 120
+
+
+class Recorder:
+    """Thread-safe list of (endpoint, status, latency ms, started at) samples."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def request(self, session, endpoint, method, url, **kwargs):
+        """Sends a request, records it under `endpoint` and returns the response (None on a connection error)."""
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 0
+        with self._lock:
+            self.samples.append((endpoint, status, (time.perf_counter() - started) * 1000, started))
+        return response
+
+
+def _login(session, base_url, account, recorder):
+    response = recorder.request(session, 'POST /api/login', 'POST', f'{base_url}/api/login',
+                                json={'email': account['email'], 'password': account['password']})
+    return response is not None and response.status_code == 200
+
+
+def morning_peak(session, base_url, account, recorder, rng):
+    """Log in, open the wardrobe, ask for today's outfit and save it."""
+    if not _login(session, base_url, account, recorder):
+        return
+    recorder.request(session, 'GET /api/get-wardrobe', 'GET', f'{base_url}/api/get-wardrobe')
+
+    response = recorder.request(session, 'POST /api/get-outfit', 'POST', f'{base_url}/api/get-outfit',
+                                json={'mood': rng.choice(MOODS)})
+    if response is None or response.status_code != 200:
+        return
+    body = response.json()
+    item_ids = (body.get('suggestion') or {}).get('selected_items') or [item['id'] for item in body.get('items', [])]
+    if item_ids:
+        recorder.request(session, 'POST /api/save-outfit', 'POST', f'{base_url}/api/save-outfit', json={
+            'item_ids': item_ids, 'mood': body.get('mood'), 'weather': body.get('weather'),
+            'reason_text': (body.get('suggestion') or {}).get('reasoning', '')
+        })
+
+
+def trip_planning(session, base_url, account, recorder, rng):
+    """Log in, create a trip and generate its packing list."""
+    if not _login(session, base_url, account, recorder):
+        return
+    start = date.today() + timedelta(days=rng.randint(3, 30))
+    response = recorder.request(session, 'POST /api/trips', 'POST', f'{base_url}/api/trips', json={
+        'destination': rng.choice(['Paris', 'Lisbon', 'Oslo', 'Rome']),
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(days=rng.randint(2, 7))).isoformat(),
+        'trip_type': rng.choice(['leisure', 'business'])
+    })
+    if response is None or response.status_code != 201:
+        return
+    trip_id = response.json().get('id')
+    recorder.request(session, 'GET /api/trips/<id>/packing-list', 'GET',
+                     f'{base_url}/api/trips/{trip_id}/packing-list')
+
+
+def signup(session, base_url, account, recorder, rng):
+    """Register a new account (verification email) and upload a photo (image host)."""
+    recorder.request(session, 'POST /api/register', 'POST', f'{base_url}/api/register', json={
+        'email': f'loadtest-signup-{uuid.uuid4().hex[:12]}@example.com', 'password': 'loadtest-password',
+        'location': 'Paris'
+    })
+    recorder.request(session, 'POST /api/upload-image', 'POST', f'{base_url}/api/upload-image',
+                     files={'file': ('photo.png', TINY_PNG, 'image/png')})
+
+
+SCENARIOS = {
+    'morning-peak': morning_peak,
+    'trip-planning': trip_planning,
+    'signup': signup,
+}
@@ -11,6 +11,7 @@ def migrate_database():
         
         print("Creating new tables with updated schema...")
         db.create_all()
+        app.search_service.ensure_index()
         
         print("Database migration completed successfully!")
         print("Note: All existing data has been cleared. You'll need to re-register and add items.")
@@ -0,0 +1,65 @@
+"""Store mood_tags, custom_tags and care_instructions as native JSON
+
+Revision ID: 16aa7ce1b878
+Revises: 1a589b184768
+Create Date: 2026-10-16 09:12:41.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '16aa7ce1b878'
+down_revision = '1a589b184768'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = ['mood_tags', 'custom_tags', 'care_instructions']
+TAG_COLUMNS = ['mood_tags', 'custom_tags']
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Empty strings were never valid JSON; clear them before converting.
+    for column in JSON_COLUMNS:
+        op.execute(f"UPDATE clothing_item SET {column} = NULL WHERE {column} = ''")
+
+    if bind.dialect.name == 'postgresql':
+        for column in JSON_COLUMNS:
+            op.alter_column(
+                'clothing_item', column,
+                existing_type=sa.Text(),
+                type_=postgresql.JSONB(),
+                postgresql_using=f'{column}::jsonb'
+            )
+        # GIN indexes back the `@>` containment filters in ClothingItem.has_tag
+        for column in TAG_COLUMNS:
+            op.create_index(f'ix_clothing_item_{column}', 'clothing_item', [column], postgresql_using='gin')
+    else:
+        # SQLite keeps JSON as text, so the stored values are already valid; only the
+        # declared type changes. Tag filters use JSON1's json_each() there.
+        with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+            for column in JSON_COLUMNS:
+                batch_op.alter_column(column, existing_type=sa.Text(), type_=sa.JSON())
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        for column in TAG_COLUMNS:
+            op.drop_index(f'ix_clothing_item_{column}', table_name='clothing_item')
+        for column in JSON_COLUMNS:
+            op.alter_column(
+                'clothing_item', column,
+                existing_type=postgresql.JSONB(),
+                type_=sa.Text(),
+                postgresql_using=f'{column}::text'
+            )
+    else:
+        with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+            for column in JSON_COLUMNS:
+                batch_op.alter_column(column, existing_type=sa.JSON(), type_=sa.Text())
@@ -0,0 +1,50 @@
+"""Add indexes for hot per-user queries
+
+Revision ID: 1dd6cc72d444
+Revises: aad0d6b7cc4b
+Create Date: 2026-10-16 11:48:09.112573
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1dd6cc72d444'
+down_revision = 'aad0d6b7cc4b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+        batch_op.create_index('ix_clothing_item_user_clean', ['user_id', 'is_clean'], unique=False)
+
+    with op.batch_alter_table('outfit', schema=None) as batch_op:
+        batch_op.create_index('ix_outfit_user_date', ['user_id', 'date'], unique=False)
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_read_created', ['user_id', 'is_read', 'created_at'], unique=False)
+
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.create_index('ix_user_activity_timestamp', ['timestamp'], unique=False)
+
+    with op.batch_alter_table('outfit_items', schema=None) as batch_op:
+        batch_op.create_index('ix_outfit_items_clothing_item_id', ['clothing_item_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('outfit_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_outfit_items_clothing_item_id')
+
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_activity_timestamp')
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_read_created')
+
+    with op.batch_alter_table('outfit', schema=None) as batch_op:
+        batch_op.drop_index('ix_outfit_user_date')
+
+    with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_clothing_item_user_clean')
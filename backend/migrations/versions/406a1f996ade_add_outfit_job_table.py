@@ -0,0 +1,40 @@
+"""Add outfit_job table for async outfit generation
+
+Revision ID: 406a1f996ade
+Revises: b7e2f0a91c3d
+Create Date: 2026-10-16 13:02:51.447310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '406a1f996ade'
+down_revision = 'b7e2f0a91c3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outfit_job',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('outfit_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_outfit_job_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('outfit_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_outfit_job_user_id'))
+
+    op.drop_table('outfit_job')
@@ -0,0 +1,83 @@
+"""Add canonical color_id to clothing_item
+
+Revision ID: 5c0e8d2b7a41
+Revises: 406a1f996ade
+Create Date: 2026-10-16 16:02:11.318274
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c0e8d2b7a41'
+down_revision = '406a1f996ade'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of utils/colors.py as of this revision (palette order = color_id),
+# so re-running the backfill always writes the same ids whatever the palette becomes
+PALETTE = [
+    'other', 'black', 'charcoal', 'grey', 'white', 'cream', 'ivory', 'beige', 'tan', 'brown',
+    'khaki', 'navy', 'denim', 'blue', 'sky blue', 'royal blue', 'indigo', 'red', 'burgundy',
+    'maroon', 'pink', 'rose', 'coral', 'orange', 'peach', 'yellow', 'mustard', 'gold', 'green',
+    'olive', 'lime', 'mint', 'teal', 'turquoise', 'aqua', 'purple', 'violet', 'lavender', 'magenta',
+    'dark'
+]
+ALIASES = {
+    'gray': 'grey', 'light grey': 'grey', 'light gray': 'grey', 'silver': 'grey', 'heather grey': 'grey',
+    'dark grey': 'charcoal', 'dark gray': 'charcoal', 'off white': 'cream', 'off-white': 'cream',
+    'camel': 'tan', 'sand': 'beige', 'nude': 'beige', 'chocolate': 'brown',
+    'dark blue': 'navy', 'light blue': 'sky blue', 'baby blue': 'sky blue', 'cobalt': 'royal blue',
+    'jeans': 'denim', 'wine': 'burgundy', 'dark red': 'burgundy', 'blush': 'pink', 'hot pink': 'pink',
+    'salmon': 'coral', 'rust': 'orange', 'khaki green': 'olive', 'forest green': 'green', 'emerald': 'green',
+    'sage': 'mint', 'lilac': 'lavender', 'plum': 'purple', 'fuchsia': 'magenta',
+}
+COLOR_IDS = {name: color_id for color_id, name in enumerate(PALETTE)}
+SCAN_PATTERNS = [
+    (re.compile(r'\b' + re.escape(text) + r'\b'), name)
+    for text, name in sorted(
+        [(name, name) for name in PALETTE if name != 'other'] + list(ALIASES.items()),
+        key=lambda pair: -len(pair[0])
+    )
+]
+
+
+def normalize_color(color):
+    """utils.colors.normalize_color as of this revision."""
+    if not color or not color.strip():
+        return None
+    text = color.strip().lower()
+    if text in COLOR_IDS:
+        return COLOR_IDS[text]
+    if text in ALIASES:
+        return COLOR_IDS[ALIASES[text]]
+    if re.search(r'\bdark\b', text):
+        return COLOR_IDS['dark']
+    for pattern, name in SCAN_PATTERNS:
+        if pattern.search(text):
+            return COLOR_IDS[name]
+    return COLOR_IDS['other']
+
+
+def upgrade():
+    with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('color_id', sa.SmallInteger(), nullable=True))
+
+    # One UPDATE per distinct color string rather than per item
+    bind = op.get_bind()
+    colors = bind.execute(sa.text(
+        "SELECT DISTINCT color FROM clothing_item WHERE color IS NOT NULL"
+    )).scalars().all()
+    for color in colors:
+        bind.execute(
+            sa.text("UPDATE clothing_item SET color_id = :color_id WHERE color = :color"),
+            {'color_id': normalize_color(color), 'color': color}
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+        batch_op.drop_column('color_id')
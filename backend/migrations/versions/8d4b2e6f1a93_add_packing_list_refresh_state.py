@@ -0,0 +1,28 @@
+"""Add generation context and refresh flag to packing_list
+
+Revision ID: 8d4b2e6f1a93
+Revises: e3a9c71f05b2
+Create Date: 2026-10-16 18:05:43.612904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4b2e6f1a93'
+down_revision = 'e3a9c71f05b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('packing_list', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('generation_context', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('needs_refresh', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('packing_list', schema=None) as batch_op:
+        batch_op.drop_column('needs_refresh')
+        batch_op.drop_column('generation_context')
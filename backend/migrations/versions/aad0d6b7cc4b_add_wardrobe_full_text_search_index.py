@@ -0,0 +1,59 @@
+"""Add full-text search index for wardrobe items
+
+Revision ID: aad0d6b7cc4b
+Revises: c56969b4c9be
+Create Date: 2026-10-16 11:20:54.604417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'aad0d6b7cc4b'
+down_revision = 'c56969b4c9be'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.add_column('clothing_item', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.create_index('ix_clothing_item_search_vector', 'clothing_item', ['search_vector'], postgresql_using='gin')
+        # Backfill with the same document WardrobeSearchService.index_item builds
+        op.execute("""
+            UPDATE clothing_item AS ci SET search_vector = to_tsvector('simple', concat_ws(' ',
+                ci.name, ci.color, ci.style, ci.type,
+                (SELECT b.name FROM brand AS b WHERE b.id = ci.brand_id),
+                (SELECT string_agg(tag, ' ') FROM jsonb_array_elements_text(
+                    coalesce(ci.mood_tags, '[]'::jsonb) || coalesce(ci.custom_tags, '[]'::jsonb)) AS tag)
+            ))
+        """)
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE clothing_item_fts "
+            "USING fts5(user_id UNINDEXED, name, color, style, type, brand, tags)"
+        )
+        op.execute("""
+            INSERT INTO clothing_item_fts (rowid, user_id, name, color, style, type, brand, tags)
+            SELECT ci.id, ci.user_id, ci.name, coalesce(ci.color, ''), coalesce(ci.style, ''), ci.type,
+                   coalesce((SELECT b.name FROM brand AS b WHERE b.id = ci.brand_id), ''),
+                   trim(
+                       coalesce((SELECT group_concat(value, ' ') FROM json_each(ci.mood_tags)), '') || ' ' ||
+                       coalesce((SELECT group_concat(value, ' ') FROM json_each(ci.custom_tags)), '')
+                   )
+            FROM clothing_item AS ci
+        """)
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_clothing_item_search_vector', table_name='clothing_item')
+        op.drop_column('clothing_item', 'search_vector')
+    else:
+        op.execute("DROP TABLE clothing_item_fts")
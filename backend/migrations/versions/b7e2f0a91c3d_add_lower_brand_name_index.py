@@ -0,0 +1,24 @@
+"""Add functional index on lower(brand.name)
+
+Revision ID: b7e2f0a91c3d
+Revises: 1dd6cc72d444
+Create Date: 2026-10-16 12:14:37.902146
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2f0a91c3d'
+down_revision = '1dd6cc72d444'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_brand_name_lower', 'brand', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_brand_name_lower', table_name='brand')
@@ -0,0 +1,31 @@
+"""Add geocoded_location table for the shared geocoding cache
+
+Revision ID: b7f31c9d2e58
+Revises: 8d4b2e6f1a93
+Create Date: 2026-10-16 20:12:08.331470
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f31c9d2e58'
+down_revision = '8d4b2e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('geocoded_location',
+    sa.Column('location', sa.String(length=200), nullable=False),
+    sa.Column('lat', sa.Float(), nullable=True),
+    sa.Column('lon', sa.Float(), nullable=True),
+    sa.Column('found', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('location')
+    )
+
+
+def downgrade():
+    op.drop_table('geocoded_location')
@@ -0,0 +1,26 @@
+"""Add (user_id, created_at, id) index for wardrobe keyset pagination
+
+Revision ID: c56969b4c9be
+Revises: 16aa7ce1b878
+Create Date: 2026-10-16 10:03:17.228904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c56969b4c9be'
+down_revision = '16aa7ce1b878'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+        batch_op.create_index('ix_clothing_item_user_created', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clothing_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_clothing_item_user_created')
@@ -0,0 +1,32 @@
+"""Add style_profile table for incremental Style DNA
+
+Revision ID: e3a9c71f05b2
+Revises: 5c0e8d2b7a41
+Create Date: 2026-10-16 16:41:27.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c71f05b2'
+down_revision = '5c0e8d2b7a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are built lazily on a user's first Style DNA read, so no backfill here
+    op.create_table('style_profile',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('wardrobe_counts', sa.JSON(), nullable=False),
+    sa.Column('outfit_counts', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('style_profile')
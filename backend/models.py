@@ -3,16 +3,25 @@ from flask_login import UserMixin
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON
 from datetime import datetime
-import json
+from collections import Counter, defaultdict
+from sqlalchemy import cast, func, or_, select
+from sqlalchemy.orm import validates
+import uuid
 from flask import current_app
 from itsdangerous import URLSafeTimedSerializer as Serializer
+from utils.colors import normalize_color
 
 db = SQLAlchemy()
 
+# Native JSONB on PostgreSQL (GIN-indexable), JSON1-backed JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
+
 # Association table for many-to-many relationship between outfits and clothing items
 outfit_items = db.Table('outfit_items',
     db.Column('outfit_id', db.Integer, db.ForeignKey('outfit.id'), primary_key=True),
-    db.Column('clothing_item_id', db.Integer, db.ForeignKey('clothing_item.id'), primary_key=True)
+    db.Column('clothing_item_id', db.Integer, db.ForeignKey('clothing_item.id'), primary_key=True),
+    # The composite PK leads with outfit_id, so lookups by item need their own index
+    db.Index('ix_outfit_items_clothing_item_id', 'clothing_item_id')
 )
 
 class User(UserMixin, db.Model):
@@ -112,6 +121,11 @@ class UserActivity(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref=db.backref('activities', cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        # Daily active user counts filter on a timestamp range
+        db.Index('ix_user_activity_timestamp', 'timestamp'),
+    )
+
 class ClothingItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -119,9 +133,11 @@ class ClothingItem(db.Model):
     type = db.Column(db.String(50), nullable=False)
     style = db.Column(db.String(50))
     color = db.Column(db.String(30))
+    # Canonical palette id for `color` (utils.colors), kept in sync on write
+    color_id = db.Column(db.SmallInteger, nullable=True)
     season = db.Column(db.String(20))
     fabric = db.Column(db.String(50))
-    mood_tags = db.Column(db.Text)
+    mood_tags = db.Column(JSONType)
     brand_id = db.Column(db.Integer, db.ForeignKey('brand.id'), nullable=True)
     brand = db.relationship('Brand', backref='clothing_items')
     fit = db.Column(db.String(50), nullable=True)
@@ -129,7 +145,7 @@ class ClothingItem(db.Model):
     condition = db.Column(db.String(20), default='good')
     is_clean = db.Column(db.Boolean, default=True)
     image_url = db.Column(db.String(255))
-    custom_tags = db.Column(db.Text)
+    custom_tags = db.Column(JSONType)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # NEW: Wear tracking fields
@@ -146,7 +162,7 @@ class ClothingItem(db.Model):
     wash_urgency = db.Column(db.String(20), default='none')  # none, low, medium, high, urgent
     
     # NEW: Care instructions
-    care_instructions = db.Column(db.Text)  # JSON string
+    care_instructions = db.Column(JSONType)
     wash_temperature = db.Column(db.String(20))  # cold, warm, hot
     dry_clean_only = db.Column(db.Boolean, default=False)
     
@@ -158,24 +174,122 @@ class ClothingItem(db.Model):
     # NEW: Content moderation fields
     status = db.Column(db.String(20), default='approved', nullable=False) # pending, approved, rejected
     reported_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # Keyset pagination of a user's wardrobe in (created_at, id) order
+        db.Index('ix_clothing_item_user_created', 'user_id', 'created_at', 'id'),
+        # Clean-item lookups for outfit generation and packing lists
+        db.Index('ix_clothing_item_user_clean', 'user_id', 'is_clean'),
+    )
+
+    # Plain columns that can be returned as-is by a column-restricted query
+    PROJECTABLE_FIELDS = (
+        'id', 'name', 'type', 'style', 'color', 'color_id', 'season', 'fabric', 'fit', 'pattern',
+        'condition', 'is_clean', 'image_url', 'created_at', 'wear_count',
+        'wear_count_since_wash', 'last_worn', 'last_washed', 'laundry_status',
+        'needs_washing', 'wash_urgency', 'status'
+    )
+    # What the wardrobe grid needs to render a card
+    SUMMARY_FIELDS = ('id', 'name', 'type', 'color', 'image_url')
+    # What the packing-list prompt and assembly need
+    PACKING_FIELDS = ('id', 'name', 'type', 'style', 'fabric', 'season')
+    _DATETIME_FIELDS = {'created_at', 'last_worn', 'last_washed'}
+
+    @validates('color')
+    def _normalize_color(self, key, color):
+        self.color_id = normalize_color(color)
+        return color
+
+    @classmethod
+    def has_tag(cls, column_name, tag):
+        """
+        SQL criterion matching items whose JSON array column (`mood_tags` or
+        `custom_tags`) contains `tag`. Uses the GIN index via `@>` on PostgreSQL
+        and a JSON1 `json_each` lookup on SQLite.
+        """
+        column = getattr(cls, column_name)
+        if db.engine.dialect.name == 'postgresql':
+            return column.op('@>')(cast([tag], JSONB))
+
+        elements = func.json_each(column).table_valued('value')
+        return select(elements.c.value).where(elements.c.value == tag).exists()
+
+    @classmethod
+    def has_any_tag(cls, column_name, tags):
+        """SQL criterion matching items tagged with at least one of `tags`."""
+        return or_(*[cls.has_tag(column_name, tag) for tag in tags])
+
+    @classmethod
+    def project(cls, query, fields):
+        """
+        Runs `query` selecting only the given columns and returns plain dicts.
+        No model instances are built, so JSON decoding and computed fields are skipped.
+        """
+        rows = query.with_entities(*[getattr(cls, field) for field in fields]).all()
+        datetime_fields = [field for field in fields if field in cls._DATETIME_FIELDS]
+
+        projected = []
+        for row in rows:
+            data = dict(zip(fields, row))
+            for field in datetime_fields:
+                if data[field]:
+                    data[field] = data[field].isoformat()
+            projected.append(data)
+        return projected
     
     def to_dict(self):
+        thresholds = self.owner.get_laundry_thresholds() if self.owner else None
+        owner_data = {
+            'id': self.owner.id,
+            'email': self.owner.email
+        } if self.owner else None
+        return self._serialize(thresholds, owner_data, {})
+
+    @classmethod
+    def serialize_many(cls, items, owner=None):
+        """
+        Serializes a list of items belonging to a single user.
+        The owner's laundry thresholds and the fabric-adjusted threshold for each
+        (type, fabric) pair are resolved once for the whole list instead of per item.
+        """
+        if not items:
+            return []
+
+        if owner is None:
+            owner = items[0].owner
+
+        thresholds = owner.get_laundry_thresholds() if owner else None
+        owner_data = {'id': owner.id, 'email': owner.email} if owner else None
+        threshold_cache = {}
+
+        return [item._serialize(thresholds, owner_data, threshold_cache) for item in items]
+
+    def _serialize(self, thresholds, owner_data, threshold_cache):
+        if thresholds is None:
+            wash_recommendation = 'none'
+        else:
+            key = (self.type, self.fabric)
+            if key not in threshold_cache:
+                threshold_cache[key] = self.get_wash_threshold(self.type, self.fabric, thresholds)
+            wash_recommendation = self.get_wash_urgency(self.wear_count_since_wash, threshold_cache[key])
+
         return {
             'id': self.id,
             'name': self.name,
             'type': self.type,
             'style': self.style,
             'color': self.color,
+            'color_id': self.color_id,
             'season': self.season,
             'fabric': self.fabric,
-            'mood_tags': json.loads(self.mood_tags) if self.mood_tags else [],
+            'mood_tags': self.mood_tags or [],
             'brand': self.brand.name if self.brand else None,
             'fit': self.fit,
             'pattern': self.pattern,
             'condition': self.condition,
             'is_clean': self.is_clean,
             'image_url': self.image_url,
-            'custom_tags': json.loads(self.custom_tags) if self.custom_tags else [],
+            'custom_tags': self.custom_tags or [],
             'created_at': self.created_at.isoformat() if self.created_at else None,
             
             # NEW: Wear tracking data
@@ -192,7 +306,7 @@ class ClothingItem(db.Model):
             'wash_urgency': self.wash_urgency or 'none',
             
             # NEW: Care instructions
-            'care_instructions': json.loads(self.care_instructions) if self.care_instructions else {},
+            'care_instructions': self.care_instructions or {},
             'wash_temperature': self.wash_temperature,
             'dry_clean_only': self.dry_clean_only or False,
             
@@ -204,15 +318,12 @@ class ClothingItem(db.Model):
             # NEW: Calculated fields
             'days_since_wash': self.get_days_since_wash(),
             'cost_per_wear': self.get_cost_per_wear(),
-            'wash_recommendation': self.get_wash_recommendation(),
+            'wash_recommendation': wash_recommendation,
             
             # NEW: Moderation data
             'status': self.status,
             'reported_count': self.reported_count,
-            'owner': {
-                'id': self.owner.id,
-                'email': self.owner.email
-            } if self.owner else None
+            'owner': owner_data
         }
     
     def get_days_since_wash(self):
@@ -260,19 +371,29 @@ class ClothingItem(db.Model):
             return 'none'
             
         thresholds = self.owner.get_laundry_thresholds()
+        threshold = self.get_wash_threshold(self.type, self.fabric, thresholds)
+        return self.get_wash_urgency(self.wear_count_since_wash, threshold)
 
-        threshold = thresholds.get(self.type.lower(), 3)
+    @staticmethod
+    def get_wash_threshold(item_type, fabric, thresholds):
+        """Number of wears before an item of this type and fabric needs washing."""
+        threshold = thresholds.get(item_type.lower(), 3)
       
-        if self.fabric:
-            fabric_lower = self.fabric.lower()
+        if fabric:
+            fabric_lower = fabric.lower()
             if 'cotton' in fabric_lower and 'blend' not in fabric_lower:
                 threshold = max(1, threshold - 1) 
             elif 'wool' in fabric_lower:
                 threshold = threshold + 2
             elif 'synthetic' in fabric_lower or 'polyester' in fabric_lower:
                 threshold = max(1, threshold - 1)
-        
-        wear_count = self.wear_count_since_wash or 0
+
+        return threshold
+
+    @staticmethod
+    def get_wash_urgency(wear_count_since_wash, threshold):
+        """Maps wears since the last wash against a threshold to an urgency level."""
+        wear_count = wear_count_since_wash or 0
         
         if threshold <= 0:
             return 'none'
@@ -303,14 +424,43 @@ class Outfit(db.Model):
     rating = db.Column(db.Integer)  # 1-5 star rating
     notes = db.Column(db.Text)  # User notes about the outfit
     
-    # Many-to-many relationship with clothing items
-    clothing_items = db.relationship('ClothingItem', secondary=outfit_items, lazy='subquery',
+    # Many-to-many relationship with clothing items. Loaded only on access:
+    # reads go through items_snapshot, which every saved outfit carries.
+    clothing_items = db.relationship('ClothingItem', secondary=outfit_items, lazy='select',
                                    backref=db.backref('outfits', lazy=True))
     
     # NEW: Store a snapshot of item details for historical accuracy
     items_snapshot = db.Column(JSON, nullable=True)
 
-    def to_dict(self):
+    __table_args__ = (
+        # Outfit history, calendar and analytics filter a user's outfits by date
+        db.Index('ix_outfit_user_date', 'user_id', 'date'),
+    )
+
+    @staticmethod
+    def build_items_snapshot(items) -> list:
+        """The per-item details kept on an outfit so history survives item edits and deletes."""
+        return [
+            {
+                'id': item.id,
+                'name': item.name,
+                'image_url': item.image_url,
+                'type': item.type,
+                'color': item.color
+            }
+            for item in items
+        ]
+
+    def snapshot_items(self) -> list:
+        """The outfit's item details, from the snapshot when there is one."""
+        return self.items_snapshot or Outfit.build_items_snapshot(self.clothing_items)
+
+    def to_dict(self, clothing_items=None):
+        if self.items_snapshot:
+            clothing_items = self.items_snapshot
+        elif clothing_items is None:
+            clothing_items = [item.to_dict() for item in self.clothing_items]
+
         return {
             'id': self.id,
             'weather': self.weather,
@@ -320,9 +470,31 @@ class Outfit(db.Model):
             'was_actually_worn': self.was_actually_worn or True,
             'rating': self.rating,
             'notes': self.notes,
-            'clothing_items': self.items_snapshot or [item.to_dict() for item in self.clothing_items]
+            'clothing_items': clothing_items
         }
 
+    @classmethod
+    def serialize_many(cls, outfits) -> list:
+        """
+        Serializes outfits from their snapshots. Only outfits saved before snapshots
+        existed touch outfit_items, and those are loaded in a single query.
+        """
+        legacy_ids = [outfit.id for outfit in outfits if not outfit.items_snapshot]
+        legacy_items = defaultdict(list)
+        if legacy_ids:
+            rows = db.session.query(outfit_items.c.outfit_id, ClothingItem)\
+                .join(ClothingItem, ClothingItem.id == outfit_items.c.clothing_item_id)\
+                .filter(outfit_items.c.outfit_id.in_(legacy_ids))\
+                .all()
+            serialized = ClothingItem.serialize_many([item for _, item in rows])
+            for (outfit_id, _), item_data in zip(rows, serialized):
+                legacy_items[outfit_id].append(item_data)
+
+        return [
+            outfit.to_dict(clothing_items=None if outfit.items_snapshot else legacy_items[outfit.id])
+            for outfit in outfits
+        ]
+
 class Trip(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     destination = db.Column(db.String(150), nullable=False)
@@ -355,6 +527,10 @@ class PackingList(db.Model):
     status = db.Column(db.String(20), default='active', nullable=False) # active, completed
     reasoning = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Trip and forecast the list was last generated for (see packing_service.forecast_context)
+    generation_context = db.Column(JSON, nullable=True)
+    # Set when the trip is edited; the next read brings the list up to date incrementally
+    needs_refresh = db.Column(db.Boolean, default=False, nullable=False)
     
     trip = db.relationship('Trip', backref=db.backref('packing_list', uselist=False, cascade="all, delete-orphan"))
     user = db.relationship('User', backref=db.backref('packing_lists', cascade="all, delete-orphan"))
@@ -438,6 +614,11 @@ class Notification(db.Model):
 
     user = db.relationship('User', backref=db.backref('notifications', cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        # Notification list (unread first, newest first) and unread counts
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -485,13 +666,125 @@ class NegativePrompt(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+class OutfitJob(db.Model):
+    """An outfit generation request run by the background worker pool (?async=1)."""
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='pending', nullable=False) # pending, running, succeeded, failed
+    params = db.Column(JSON, nullable=True)
+    result = db.Column(JSON, nullable=True)
+    status_code = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User', backref=db.backref('outfit_jobs', cascade="all, delete-orphan"))
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'status_code': self.status_code,
+            'result': self.result,
+            'created_at': self.created_at.isoformat(),
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+class StyleProfile(db.Model):
+    """
+    Running attribute counts behind a user's Style DNA. Updated incrementally
+    as items and worn outfits are saved, so reads never scan the wardrobe or
+    outfit history.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    # {'style': {'casual': 4, ...}, 'color': {...}, 'brand': {...}, 'fabric': {...}}
+    wardrobe_counts = db.Column(JSON, nullable=False, default=dict)
+    # Same shape per lowercased mood, counted over the items of worn outfits
+    outfit_counts = db.Column(JSON, nullable=False, default=dict)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = db.relationship('User', backref=db.backref('style_profile', uselist=False, cascade="all, delete-orphan"))
+
+    FIELDS = ('style', 'color', 'brand', 'fabric')
+    # Items worn in an outfit of the requested mood count this much more than owning them
+    OUTFIT_WEIGHT = 2
+
+    @classmethod
+    def item_attributes(cls, item):
+        """The counted attributes of a ClothingItem."""
+        return {
+            'style': item.style,
+            'color': item.color,
+            'brand': item.brand.name if item.brand else None,
+            'fabric': item.fabric
+        }
+
+    @classmethod
+    def _adjusted(cls, counts, attributes, delta):
+        # JSON columns aren't mutation-tracked, so always build a new dict
+        counts = {field: dict(values) for field, values in (counts or {}).items()}
+        for field in cls.FIELDS:
+            value = attributes.get(field)
+            if not value:
+                continue
+            values = counts.setdefault(field, {})
+            count = values.get(value, 0) + delta
+            if count > 0:
+                values[value] = count
+            else:
+                values.pop(value, None)
+        return counts
+
+    def add_item(self, attributes, delta=1):
+        self.wardrobe_counts = self._adjusted(self.wardrobe_counts, attributes, delta)
+
+    def remove_item(self, attributes):
+        self.add_item(attributes, -1)
+
+    def add_outfit(self, mood, items_attributes):
+        mood_key = (mood or '').lower()
+        outfit_counts = dict(self.outfit_counts or {})
+        counts = outfit_counts.get(mood_key, {})
+        for attributes in items_attributes:
+            counts = self._adjusted(counts, attributes, 1)
+        outfit_counts[mood_key] = counts
+        self.outfit_counts = outfit_counts
+
+    def weighted_counts(self, mood=None):
+        """Counter per field: the wardrobe plus weighted worn items for `mood`."""
+        counters = {field: Counter(self.wardrobe_counts.get(field, {})) for field in self.FIELDS}
+        if mood is not None:
+            mood_counts = (self.outfit_counts or {}).get(mood.lower(), {})
+            for field in self.FIELDS:
+                for value, count in mood_counts.get(field, {}).items():
+                    counters[field][value] += self.OUTFIT_WEIGHT * count
+        return counters
+
+class GeocodedLocation(db.Model):
+    """
+    Coordinates for a normalized location string, shared by every user. Rows
+    with `found` False remember places the geocoder didn't know.
+    """
+    location = db.Column(db.String(200), primary_key=True)
+    lat = db.Column(db.Float, nullable=True)
+    lon = db.Column(db.Float, nullable=True)
+    found = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
 class Brand(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     is_approved = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    __table_args__ = (db.Index('ix_brand_name', 'name'),)
+    __table_args__ = (
+        db.Index('ix_brand_name', 'name'),
+        # Case-insensitive lookups in BrandResolutionService
+        db.Index('ix_brand_name_lower', func.lower(name)),
+    )
 
     def to_dict(self):
         return {
@@ -110,6 +110,7 @@ def delete_user(user_id):
     )
     db.session.add(admin_action)
     
+    current_app.search_service.remove_user_items(user.id)
     db.session.delete(user)
     db.session.commit()
     return jsonify({'message': f'User {user.email} has been deleted.'})
@@ -271,7 +272,12 @@ def system_health():
         db_status = f'error: {e}'
 
     # External Services Check
-    ai_status = 'ok' if hasattr(current_app, 'ai_service') and current_app.ai_service.client_available else 'error: not configured'
+    if not (hasattr(current_app, 'ai_service') and current_app.ai_service.client_available):
+        ai_status = 'error: not configured'
+    elif not current_app.ai_service.model_available:
+        ai_status = 'degraded: circuit breaker open'
+    else:
+        ai_status = 'ok'
     weather_status = 'ok' if hasattr(current_app, 'weather_service') and hasattr(current_app.weather_service, 'api_key') and current_app.weather_service.api_key else 'error: not configured'
     email_status = 'ok' if hasattr(current_app, 'email_service') and hasattr(current_app.email_service, 'api_key') and current_app.email_service.api_key else 'error: not configured'
 
@@ -294,7 +300,11 @@ def system_health():
             'weather_service': weather_status,
             'email_service': email_status
         },
-        'database_stats': db_stats
+        'database_stats': db_stats,
+        'ai_prompt_stats': current_app.ai_service.get_prompt_stats_summary(),
+        'ai_client_stats': current_app.ai_service.get_client_stats(),
+        'geocoding_cache_stats': current_app.weather_service.geocoding_cache.get_stats(),
+        'weather_cache_stats': current_app.weather_service.weather_cache.get_stats()
     }
     return jsonify(health_status)
 
@@ -335,6 +345,7 @@ def moderate_content(item_id):
         details = f"Rejected item: {item.name} (ID: {item.id})"
     elif action == 'delete':
         details = f"Deleted item: {item.name} (ID: {item.id})"
+        current_app.style_profile_service.remove_item(item)
         db.session.delete(item)
     
     admin_action = AdminAction(
@@ -469,6 +480,8 @@ def approve_brand(brand_id):
     )
     db.session.add(admin_action)
     db.session.commit()
+    current_app.brand_index.refresh()
+    current_app.brand_service.invalidate()
 
     return jsonify({'message': f"Brand '{brand.name}' has been approved.", 'brand': brand.to_dict()})
 
@@ -489,7 +502,11 @@ def reject_brand(brand_id):
     )
     db.session.add(admin_action)
     
+    # Style DNA counts brands by name; drop the profiles that still count this one
+    current_app.style_profile_service.drop_for_brand(brand.id)
     db.session.delete(brand)
     db.session.commit()
+    current_app.brand_index.refresh()
+    current_app.brand_service.invalidate()
 
     return jsonify({'message': f"Brand submission '{brand_name}' has been rejected and deleted."})
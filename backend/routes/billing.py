@@ -6,6 +6,7 @@ from models import db, User
 from utils.auth import get_actual_user
 
 billing_bp = Blueprint('billing_bp', __name__, url_prefix='/api/billing')
+LEMONSQUEEZY_API_URL = os.environ.get('LEMONSQUEEZY_API_URL', 'https://api.lemonsqueezy.com')
 
 @billing_bp.route('/create-portal-session', methods=['POST'])
 @login_required
@@ -21,7 +22,7 @@ def create_portal_session():
 
     try:
         # Retrieve the subscription to get a fresh customer_portal URL
-        url = f"https://api.lemonsqueezy.com/v1/subscriptions/{user.subscription_id}"
+        url = f"{LEMONSQUEEZY_API_URL}/v1/subscriptions/{user.subscription_id}"
         headers = {
             "Accept": "application/vnd.api+json",
             "Content-Type": "application/vnd.api+json",
@@ -1,6 +1,5 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Brand
-from sqlalchemy import func
 
 brands_bp = Blueprint('brands_bp', __name__)
 
@@ -8,20 +7,15 @@ brands_bp = Blueprint('brands_bp', __name__)
 def search_brands():
     """
     Searches for approved brands by name (case-insensitive).
-    Accepts a 'q' query parameter.
+    Accepts a 'q' query parameter. Prefix matches come first.
     """
     query = request.args.get('q', '', type=str)
     
     if not query:
         return jsonify([])
 
-    # Query for approved brands that match the search term
-    brands = Brand.query.filter(
-        Brand.is_approved == True,
-        Brand.name.ilike(f'%{query}%')
-    ).limit(10).all()
-    
-    brand_names = [brand.name for brand in brands]
+    # Served from the in-memory brand index, no database round trip
+    brand_names = current_app.brand_index.search(query, limit=10)
     
     return jsonify(brand_names)
 
@@ -40,7 +34,8 @@ def submit_brand():
     sanitized_name = brand_name.strip()
 
     # Check if the brand already exists (case-insensitive check)
-    existing_brand = Brand.query.filter(func.lower(Brand.name) == func.lower(sanitized_name)).first()
+    existing_brand_id = current_app.brand_service.resolve_id(sanitized_name)
+    existing_brand = db.session.get(Brand, existing_brand_id) if existing_brand_id else None
 
     if existing_brand:
         # Brand already exists, return success but indicate no action was taken.
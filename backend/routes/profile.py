@@ -5,6 +5,7 @@ from flask_login import login_required, current_user
 from models import db, User, NegativePrompt
 
 profile_bp = Blueprint('profile_bp', __name__, url_prefix='/api/profile')
+LEMONSQUEEZY_API_URL = os.environ.get('LEMONSQUEEZY_API_URL', 'https://api.lemonsqueezy.com')
 
 @profile_bp.route('/sync-subscription', methods=['POST'])
 @login_required
@@ -21,7 +22,7 @@ def sync_subscription():
 
     try:
         email = user.email
-        url = f"https://api.lemonsqueezy.com/v1/subscriptions?filter[user_email]={email}"
+        url = f"{LEMONSQUEEZY_API_URL}/v1/subscriptions?filter[user_email]={email}"
         headers = {
             "Accept": "application/vnd.api+json",
             "Content-Type": "application/vnd.api+json",
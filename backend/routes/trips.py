@@ -2,9 +2,13 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required
 from utils.limiter import limiter, get_user_specific_limit
 from utils.decorators import premium_required
-from models import db, Trip, ClothingItem, PackingList, PackingListItem, UserEssentialPreference, PackingListFeedback
+from models import db, Trip, ClothingItem, PackingList, PackingListItem, PackingListFeedback
 from utils.auth import get_actual_user
 from utils.personalization_service import summarize_feedback_for_ai
+from utils.packing_service import (
+    apply_essential_quantities, apply_packing_delta, build_packing_items, essential_quantities,
+    forecast_context, material_changes
+)
 from datetime import datetime
 
 trips_bp = Blueprint('trips', __name__)
@@ -62,6 +66,7 @@ def update_trip(trip_id):
 
     data = request.get_json()
     
+    previous_details = (trip.destination, trip.trip_type, trip.notes)
     trip.destination = data.get('destination', trip.destination)
     trip.trip_type = data.get('trip_type', trip.trip_type)
     trip.notes = data.get('notes', trip.notes)
@@ -78,9 +83,10 @@ def update_trip(trip_id):
     if trip.start_date > trip.end_date:
         return jsonify({'error': 'Start date must be before end date'}), 400
 
-    # If dates or destination changed, invalidate the old packing list
-    if (dates_changed or 'destination' in data) and trip.packing_list:
-        db.session.delete(trip.packing_list)
+    # Keep the packing list (and what's been packed) and bring it up to date on the next read
+    details_changed = previous_details != (trip.destination, trip.trip_type, trip.notes)
+    if (dates_changed or details_changed) and trip.packing_list:
+        trip.packing_list.needs_refresh = True
     
     db.session.commit()
     
@@ -121,6 +127,8 @@ def get_packing_list(trip_id):
     # Check if a packing list already exists
     existing_list = PackingList.query.filter_by(trip_id=trip_id).first()
     if existing_list:
+        if existing_list.needs_refresh and existing_list.status != 'completed':
+            return refresh_packing_list(existing_list, trip, user)
         # Make sure to serialize it correctly, including items
         return jsonify(existing_list.to_dict())
 
@@ -135,9 +143,10 @@ def get_packing_list(trip_id):
     if not weather_forecast or 'error' in weather_forecast:
         return jsonify({'error': 'Could not retrieve weather forecast for the destination.'}), 500
 
-    # 2. Get user's available wardrobe
-    available_items = ClothingItem.query.filter_by(user_id=user.id, is_clean=True).all()
-    wardrobe_data = [item.to_dict() for item in available_items]
+    # 2. Get user's available wardrobe (only the columns the prompt and matching use)
+    wardrobe_data = ClothingItem.project(
+        ClothingItem.query.filter_by(user_id=user.id, is_clean=True), ClothingItem.PACKING_FIELDS
+    )
 
     # 3. Get user's feedback history for personalization
     feedback_history = PackingListFeedback.query.filter_by(user_id=user.id).order_by(PackingListFeedback.created_at.desc()).limit(10).all()
@@ -159,56 +168,18 @@ def get_packing_list(trip_id):
         new_packing_list = PackingList(
             trip_id=trip.id, 
             user_id=user.id,
-            reasoning=packing_list_data.get('reasoning')
+            reasoning=packing_list_data.get('reasoning'),
+            generation_context=forecast_context(trip, weather_forecast)
         )
         db.session.add(new_packing_list)
-        
-        # 4a. Process AI-generated items and handle essentials to prevent duplicates
-        final_items = {}
-
-        # First, process items from the AI service
-        generated_items = packing_list_data.get('packing_list', {})
-        for category, items in generated_items.items():
-            for item_detail in items:
-                item_name = (item_detail['name'] if isinstance(item_detail, dict) else item_detail).strip()
-                normalized_name = item_name.lower()
-                
-                clothing_item = next((item for item in available_items if item.name.lower() == normalized_name), None)
-                
-                if normalized_name not in final_items:
-                    final_items[normalized_name] = PackingListItem(
-                        item_name=item_name,
-                        quantity=1,
-                        clothing_item_id=clothing_item.id if clothing_item else None
-                    )
-
-        # 4b. Second, process essentials, updating quantity if they already exist
-        essentials = {
-            'Socks': 'socks',
-            'Underwear': 'underwear',
-            'Pajamas': 'pajamas'
-        }
+
         trip_duration = (trip.end_date - trip.start_date).days + 1
-        
-        for item_name, item_type in essentials.items():
-            preference = UserEssentialPreference.query.filter_by(user_id=user.id, item_type=item_type).first()
-            
-            # Default quantity logic: 1 for pajamas, trip duration for others
-            default_quantity = 1 if item_type == 'pajamas' else trip_duration
-            quantity = preference.quantity if preference is not None else default_quantity
-            
-            if quantity > 0:
-                normalized_name = item_name.lower()
-                if normalized_name in final_items:
-                    # Item exists, just update its quantity
-                    final_items[normalized_name].quantity = quantity
-                else:
-                    # Item doesn't exist, create a new one
-                    final_items[normalized_name] = PackingListItem(
-                        item_name=item_name,
-                        quantity=quantity
-                    )
-        
+        final_items = build_packing_items(
+            packing_list_data.get('packing_list', {}),
+            wardrobe_data,
+            essential_quantities(user.id, trip_duration)
+        )
+
         # 4c. Add all the processed items to the packing list
         for item in final_items.values():
             new_packing_list.items.append(item)
@@ -221,6 +192,58 @@ def get_packing_list(trip_id):
         current_app.logger.error(f"Error creating packing list: {e}")
         return jsonify({'error': 'Failed to create and save packing list.'}), 500
 
+def refresh_packing_list(packing_list, trip, user):
+    """
+    Brings a packing list up to date after its trip was edited, keeping every
+    item (and its packed state) that still applies. Essentials are resized for
+    the new trip length locally; the AI is only asked for additions/removals
+    when the destination, activities or forecast changed materially.
+    """
+    trip_duration = (trip.end_date - trip.start_date).days + 1
+    try:
+        apply_essential_quantities(packing_list, essential_quantities(user.id, trip_duration))
+
+        weather_forecast = current_app.weather_service.get_forecast_for_trip(
+            destination=trip.destination,
+            start_date=trip.start_date,
+            end_date=trip.end_date
+        )
+        if not weather_forecast or 'error' in weather_forecast:
+            # Can't tell whether the weather changed; try again on the next read
+            db.session.commit()
+            return jsonify(packing_list.to_dict())
+
+        context = forecast_context(trip, weather_forecast)
+        changes = material_changes(packing_list.generation_context, context)
+        if changes:
+            wardrobe = ClothingItem.project(
+                ClothingItem.query.filter_by(user_id=user.id, is_clean=True), ClothingItem.PACKING_FIELDS
+            )
+            delta = current_app.ai_service.generate_packing_list_delta(
+                current_items=[item.item_name for item in packing_list.items],
+                wardrobe=wardrobe,
+                trip_details=trip.to_dict(),
+                weather_forecast=weather_forecast,
+                changes=changes
+            )
+            if 'error' in delta:
+                db.session.commit()
+                return jsonify(packing_list.to_dict())
+
+            apply_packing_delta(packing_list, delta, wardrobe)
+            if delta.get('reasoning'):
+                packing_list.reasoning = f"{packing_list.reasoning}\n\nUpdated: {delta['reasoning']}" if packing_list.reasoning else delta['reasoning']
+
+        packing_list.generation_context = context
+        packing_list.needs_refresh = False
+        db.session.commit()
+        return jsonify(packing_list.to_dict())
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error refreshing packing list: {e}")
+        return jsonify({'error': 'Failed to update packing list.'}), 500
+
 @trips_bp.route('/api/packing-list-items/<int:item_id>/toggle', methods=['POST'])
 @login_required
 def toggle_packed_item(item_id):
@@ -256,12 +279,13 @@ def complete_trip(trip_id):
         if item.is_packed and item.clothing_item_id is not None
     ]
     
-    # 3. Increment wear count for each packed item
+    # 3. Record a wear for all packed items at once; commits the status change with the
+    # wear counts, and rolls both back on failure
     if packed_clothing_item_ids:
-        for item_id in packed_clothing_item_ids:
-            current_app.laundry_service.increment_wear_count(item_id)
-
-    db.session.commit()
+        if not current_app.laundry_service.record_wear(user.id, packed_clothing_item_ids):
+            return jsonify({'error': 'Failed to complete trip'}), 500
+    else:
+        db.session.commit()
     
     return jsonify({'message': 'Trip marked as completed and packed items added to laundry.'})
 
@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator
+import numpy as np
+from openai import APIConnectionError, APITimeoutError, ConflictError, InternalServerError, RateLimitError
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit breaker is open."""
+
+class ResilientOpenAIClient:
+    """
+    Wraps an OpenAI client's chat completions with a per-call deadline, a few
+    retries with full-jitter backoff for transient errors, and a circuit
+    breaker.
+
+    The breaker opens when at least `min_requests` calls in the last
+    `window` seconds failed at a rate of `failure_threshold` or more; while
+    open every call raises CircuitOpenError at once so callers use their local
+    fallback. After `cooldown` seconds one trial call is let through (half
+    open): success closes the breaker, failure opens it again.
+
+    Latencies of successful calls and outcome counters are kept in process
+    for the admin health page.
+    """
+
+    RETRYABLE_ERRORS = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError, ConflictError)
+    # Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+    LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 20000, 40000)
+
+    def __init__(self, client, max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 4.0,
+                 failure_threshold: float = 0.5, min_requests: int = 10, window: int = 60, cooldown: int = 30):
+        self.client = client
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (monotonic time, succeeded) within `window`
+        self._state = 'closed'    # closed, open, half_open
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self._latencies_ms = deque(maxlen=1000)
+        self._histogram = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        self._counters = {'calls': 0, 'succeeded': 0, 'failed': 0, 'retries': 0, 'timeouts': 0,
+                          'short_circuited': 0, 'breaker_opened': 0}
+
+    # --- Circuit breaker ---
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being short-circuited (a due half-open trial counts as closed)."""
+        with self._lock:
+            return self._state == 'open' and time.monotonic() - self._opened_at < self.cooldown
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._state == 'open':
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self._counters['short_circuited'] += 1
+                    raise CircuitOpenError('AI service circuit breaker is open')
+                self._state = 'half_open'
+                self._trial_in_flight = False
+            if self._state == 'half_open':
+                if self._trial_in_flight:
+                    self._counters['short_circuited'] += 1
+                    raise CircuitOpenError('AI service circuit breaker is half open')
+                self._trial_in_flight = True
+            self._counters['calls'] += 1
+
+    def _record(self, succeeded: bool, latency_ms: float = None, timed_out: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._outcomes.append((now, succeeded))
+            while self._outcomes and now - self._outcomes[0][0] > self.window:
+                self._outcomes.popleft()
+
+            if succeeded:
+                self._counters['succeeded'] += 1
+                self._latencies_ms.append(latency_ms)
+                bucket = next((i for i, bound in enumerate(self.LATENCY_BUCKETS_MS) if latency_ms <= bound),
+                              len(self.LATENCY_BUCKETS_MS))
+                self._histogram[bucket] += 1
+            else:
+                self._counters['failed'] += 1
+                if timed_out:
+                    self._counters['timeouts'] += 1
+
+            if self._state == 'half_open':
+                self._trial_in_flight = False
+                if succeeded:
+                    self._state = 'closed'
+                    self._outcomes.clear()
+                else:
+                    self._open()
+            elif not succeeded and len(self._outcomes) >= self.min_requests:
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if failures / len(self._outcomes) >= self.failure_threshold and self._state == 'closed':
+                    self._open()
+
+    def _open(self) -> None:
+        self._state = 'open'
+        self._opened_at = time.monotonic()
+        self._counters['breaker_opened'] += 1
+        print(f"⚠️  AI circuit breaker opened, using local fallbacks for {self.cooldown}s")
+
+    # --- Calls ---
+
+    def _create_with_retries(self, deadline: float, kwargs: Dict[str, Any]):
+        """Calls chat.completions.create until it succeeds, the retries run out or the deadline passes."""
+        expires_at = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                raise APITimeoutError(request=None)
+            try:
+                return self.client.chat.completions.create(timeout=remaining, **kwargs)
+            except self.RETRYABLE_ERRORS:
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if attempt >= self.max_retries or time.monotonic() + delay >= expires_at:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self._counters['retries'] += 1
+                time.sleep(delay)
+
+    def chat_completion(self, deadline: float, **kwargs):
+        """chat.completions.create(**kwargs) within `deadline` seconds, retries included."""
+        self._acquire()
+        started = time.monotonic()
+        try:
+            response = self._create_with_retries(deadline, kwargs)
+        except Exception as e:
+            self._record(False, timed_out=isinstance(e, APITimeoutError))
+            raise
+        self._record(True, (time.monotonic() - started) * 1000)
+        return response
+
+    def chat_completion_stream(self, deadline: float, **kwargs) -> Iterator[Any]:
+        """
+        Streaming chat completion. Opening the stream is retried like
+        chat_completion; once chunks are flowing an error ends the stream. The
+        recorded latency is for the whole stream.
+        """
+        self._acquire()
+        started = time.monotonic()
+        stream = None
+        try:
+            stream = self._create_with_retries(deadline, {**kwargs, 'stream': True})
+            for chunk in stream:
+                yield chunk
+        except GeneratorExit:
+            # Consumer stopped early; not the service's fault
+            if hasattr(stream, 'close'):
+                stream.close()
+            self._record(True, (time.monotonic() - started) * 1000)
+            raise
+        except Exception as e:
+            self._record(False, timed_out=isinstance(e, APITimeoutError))
+            raise
+        self._record(True, (time.monotonic() - started) * 1000)
+
+    # --- Stats ---
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Breaker state, outcome counters, p50/p95/p99 latency and the latency histogram."""
+        with self._lock:
+            latencies = list(self._latencies_ms)
+            counters = dict(self._counters)
+            histogram = list(self._histogram)
+            state = self._state
+            if state == 'open' and time.monotonic() - self._opened_at >= self.cooldown:
+                state = 'half_open'
+            recent = len(self._outcomes)
+            recent_failures = sum(1 for _, ok in self._outcomes if not ok)
+
+        if latencies:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            latency = {'p50_ms': round(p50), 'p95_ms': round(p95), 'p99_ms': round(p99), 'samples': len(latencies)}
+        else:
+            latency = {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'samples': 0}
+
+        labels = [f"<={bound}ms" for bound in self.LATENCY_BUCKETS_MS] + [f">{self.LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'circuit_breaker': state,
+            'recent_error_rate': round(recent_failures / recent, 3) if recent else 0.0,
+            'counters': counters,
+            'latency': latency,
+            'latency_histogram': dict(zip(labels, histogram))
+        }
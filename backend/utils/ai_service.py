@@ -1,58 +1,29 @@
 from openai import OpenAI
+from flask import current_app, has_app_context
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 import re
 import random
+import numpy as np
 import time
-from collections import Counter
+import os
+import math
+import threading
+from collections import Counter, deque
 from datetime import datetime
+from utils import colors
+from utils.json_stream import StreamingJSONObject
+from utils.ai_client import ResilientOpenAIClient
+
 class AIOutfitService:
 
-    # A simplified color wheel for fashion.
-    COLOR_WHEEL = [
-        'red', 'red-orange', 'orange', 'yellow-orange', 'yellow', 
-        'yellow-green', 'green', 'blue-green', 'blue', 'blue-violet', 
-        'violet', 'red-violet'
-    ]
-    
-    # Map common clothing colors to the wheel
-    COLOR_MAP = {
-        'pink': 'red', 'rose': 'red-violet', 'burgundy': 'red', 'maroon': 'red',
-        'coral': 'red-orange', 'peach': 'orange', 'tan': 'yellow-orange', 'beige': 'yellow-orange',
-        'mustard': 'yellow', 'gold': 'yellow', 'lime': 'yellow-green', 'olive': 'yellow-green',
-        'teal': 'blue-green', 'turquoise': 'blue-green', 'aqua': 'blue-green', 'mint': 'green',
-        'navy': 'blue', 'sky blue': 'blue', 'royal blue': 'blue', 'indigo': 'blue-violet',
-        'purple': 'violet', 'lavender': 'violet', 'magenta': 'red-violet',
-        # Neutrals are handled separately but can have undertones
-        'brown': 'orange', 'cream': 'yellow', 'ivory': 'yellow',
-    }
+    # Shared with laundry sorting and gap analysis, see utils/colors.py
+    COLOR_WHEEL = colors.COLOR_WHEEL
+    COLOR_MAP = colors.COLOR_MAP
 
     def _get_color_relationships(self, color: str) -> Dict[str, List[str]]:
         """Finds analogous and complementary colors on the wheel."""
-        color = color.lower()
-        
-        # Normalize color name
-        base_color = self.COLOR_MAP.get(color, color)
-        
-        if base_color not in self.COLOR_WHEEL:
-            return {"analogous": [], "complementary": []}
-            
-        idx = self.COLOR_WHEEL.index(base_color)
-        num_colors = len(self.COLOR_WHEEL)
-        
-        # Analogous: one color on each side
-        analogous_colors = [
-            self.COLOR_WHEEL[(idx - 1 + num_colors) % num_colors],
-            self.COLOR_WHEEL[(idx + 1) % num_colors]
-        ]
-        
-        # Complementary: the color directly opposite
-        complementary_color = self.COLOR_WHEEL[(idx + num_colors // 2) % num_colors]
-        
-        return {
-            "analogous": analogous_colors,
-            "complementary": [complementary_color]
-        }
+        return colors.wheel_relationships(color)
 
     def _get_preferred_color_scheme(self, favorite_colors: List[str]) -> str:
         """Analyzes favorite colors to determine a preferred scheme."""
@@ -90,16 +61,53 @@ class AIOutfitService:
         return "random"
 
 
-    def __init__(self, api_key: str):
+    # Columns of the compact wardrobe table sent to the model, in order
+    PROMPT_ITEM_FIELDS = ['id', 'name', 'color', 'style', 'fabric', 'season', 'brand', 'mood_tags']
+    PROMPT_CATEGORIES = ['tops', 'bottoms', 'outerwear', 'shoes', 'dresses', 'accessories']
+    CATEGORY_TYPES = {
+        'tops': {'shirt', 't-shirt', 'blouse', 'sweater', 'tank-top'},
+        'bottoms': {'pants', 'jeans', 'shorts', 'skirt', 'leggings'},
+        'outerwear': {'jacket', 'coat', 'cardigan', 'blazer'},
+        'shoes': {'shoes', 'sneakers', 'boots', 'sandals', 'heels'},
+        'dresses': {'dress'},
+    }
+    # Items per category kept ahead of global relevance so every slot stays fillable
+    MIN_PROMPT_ITEMS_PER_CATEGORY = 3
+    # Rough tokens-per-character ratio for English text with the GPT-4o tokenizer
+    CHARS_PER_TOKEN = 4
+    # Seconds a model call may take, retries included, before falling back
+    OUTFIT_DEADLINE = float(os.environ.get('OPENAI_OUTFIT_DEADLINE', 20))
+    PACKING_DEADLINE = float(os.environ.get('OPENAI_PACKING_DEADLINE', 45))
+
+    def __init__(self, api_key: str, wardrobe_token_budget: int = None):
+        self.wardrobe_token_budget = wardrobe_token_budget or int(os.environ.get('OUTFIT_PROMPT_WARDROBE_TOKENS', 2500))
+        # Per-request prompt size records, newest last
+        self.prompt_stats = deque(maxlen=500)
+        self._stats_lock = threading.Lock()
+
         if api_key:
-            self.client = OpenAI(api_key=api_key)
+            # Retries and timeouts are handled by ResilientOpenAIClient
+            self.client = OpenAI(api_key=api_key, max_retries=0)
+            self.ai_client = ResilientOpenAIClient(self.client)
             self.client_available = True
         else:
             self.client = None
+            self.ai_client = None
             self.client_available = False
             print("⚠️  OpenAI API key not provided - using fallback outfit suggestions")
     
-    def generate_outfit_suggestion(self, available_items: List[Dict], weather: str, mood: str, season: str = "any", outfit_history: List[Dict] = None, negative_prompts: List[str] = None) -> Dict[str, Any]:
+    @property
+    def model_available(self) -> bool:
+        """An API key is configured and the circuit breaker isn't open."""
+        return self.client_available and not self.ai_client.is_open
+
+    def get_client_stats(self) -> Dict[str, Any]:
+        """Latency percentiles, failure counters and breaker state of model calls."""
+        if not self.ai_client:
+            return {'configured': False}
+        return {'configured': True, **self.ai_client.get_stats()}
+
+    def generate_outfit_suggestion(self, available_items: List[Dict], weather: str, mood: str, season: str = "any", outfit_history: List[Dict] = None, negative_prompts: List[str] = None, style_dna: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Generate outfit suggestion using OpenAI with enhanced prompting.
         This function now expects a pre-filtered list of available (e.g., clean, in-season) items.
@@ -112,21 +120,24 @@ class AIOutfitService:
                 "confidence": 0.0
             }
         
-        # If no OpenAI client, use enhanced fallback
-        if not self.client_available:
-            return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood)
+        # If no OpenAI client (or it is failing), use enhanced fallback
+        if not self.model_available:
+            return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood, season, outfit_history)
         
         # --- NEW: Shuffle wardrobe to increase prompt randomness ---
         random.shuffle(available_items)
 
         # Create enhanced prompt with randomization
-        prompt = self._create_enhanced_outfit_prompt(available_items, weather, mood, season, outfit_history, negative_prompts)
+        prompt_stats = {}
+        prompt = self._create_enhanced_outfit_prompt(available_items, weather, mood, season, outfit_history, negative_prompts, prompt_stats, style_dna)
         
         try:
             # Increase temperature for more creative, less deterministic suggestions.
             temperature = 0.7
             
-            response = self.client.chat.completions.create(
+            started = time.monotonic()
+            response = self.ai_client.chat_completion(
+                self.OUTFIT_DEADLINE,
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": self._get_system_prompt()},
@@ -138,6 +149,8 @@ class AIOutfitService:
                 frequency_penalty=0.1   # Avoid repetition
             )
             
+            self._record_prompt_stats(prompt_stats, response, started)
+
             content = response.choices[0].message.content.strip()
             
             # Try to parse JSON response
@@ -152,10 +165,10 @@ class AIOutfitService:
                         return result
                     else:
                         print("AI response validation failed, using fallback")
-                        return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood)
+                        return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood, season, outfit_history)
                 else:
                     print("No JSON found in AI response, using fallback")
-                    return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood)
+                    return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood, season, outfit_history)
                     
             except json.JSONDecodeError as e:
                 print(f"JSON parsing error: {e}")
@@ -163,11 +176,90 @@ class AIOutfitService:
             
         except Exception as e:
             print(f"AI service error: {e}")
-            return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood)
+            return self._enhanced_fallback_outfit_suggestion(available_items, weather, mood, season, outfit_history)
+
+    # Free-text fields of the outfit response that are streamed to the client as they arrive
+    STREAMED_FIELDS = ('reasoning', 'style_notes', 'color_story', 'weather_notes')
+
+    def stream_outfit_suggestion(self, available_items: List[Dict], weather: str, mood: str, season: str = "any", outfit_history: List[Dict] = None, negative_prompts: List[str] = None, style_dna: Dict[str, Any] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Streaming variant of generate_outfit_suggestion. Yields ('items', ids) as
+        soon as the model has listed its picks (only when they are all ids from
+        `available_items`), (field, text) deltas for the STREAMED_FIELDS, and
+        always ends with ('suggestion', dict): the parsed response, or the local
+        fallback when streaming isn't possible or the response doesn't validate.
+        The final suggestion's selected_items can differ from the streamed ids.
+        """
+        if not available_items or not self.model_available:
+            yield 'suggestion', self.generate_outfit_suggestion(available_items, weather, mood, season, outfit_history, negative_prompts, style_dna)
+            return
+
+        random.shuffle(available_items)
+        prompt_stats = {}
+        prompt = self._create_enhanced_outfit_prompt(available_items, weather, mood, season, outfit_history, negative_prompts, prompt_stats, style_dna)
+
+        available_ids = {item['id'] for item in available_items}
+        parser = StreamingJSONObject()
+        content = []
+        try:
+            started = time.monotonic()
+            stream = self.ai_client.chat_completion_stream(
+                self.OUTFIT_DEADLINE,
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": self._get_system_prompt()},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=1500,
+                presence_penalty=0.1,
+                frequency_penalty=0.1,
+                stream_options={"include_usage": True}
+            )
+            usage_chunk = None
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage_chunk = chunk  # the final chunk carries the billed token counts
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                if not content:
+                    prompt_stats['time_to_first_token_ms'] = round((time.monotonic() - started) * 1000)
+                content.append(text)
+                for kind, key, value in parser.feed(text):
+                    if kind == 'delta' and key in self.STREAMED_FIELDS:
+                        yield key, value
+                    elif kind == 'value' and key == 'selected_items' and isinstance(value, list):
+                        # Same id check as _validate_ai_response, so a pick the final
+                        # validation would throw away is never shown
+                        if value and all(isinstance(item_id, int) and item_id in available_ids for item_id in value):
+                            yield 'items', value
+            self._record_prompt_stats(prompt_stats, usage_chunk, started)
+        except Exception as e:
+            print(f"AI streaming error: {e}")
+            yield 'suggestion', self._enhanced_fallback_outfit_suggestion(available_items, weather, mood, season, outfit_history)
+            return
+
+        result = parser.result if parser.done else None
+        if result is None:
+            # Fall back to the non-streaming extraction if the object never closed cleanly
+            json_match = re.search(r'\{.*\}', ''.join(content), re.DOTALL)
+            try:
+                result = json.loads(json_match.group()) if json_match else None
+            except json.JSONDecodeError:
+                result = None
+
+        if result is not None and self._validate_ai_response(result, available_items):
+            yield 'suggestion', result
+        else:
+            print("Streamed AI response invalid, using fallback")
+            yield 'suggestion', self._enhanced_fallback_outfit_suggestion(available_items, weather, mood, season, outfit_history)
 
     def generate_packing_list(self, wardrobe: List[Dict], trip_details: Dict, weather_forecast: Dict, personalization_profile: str = None) -> Dict[str, Any]:
         """Generate a packing list for a trip using OpenAI."""
-        if not self.client_available:
+        if not self.model_available:
             return {"error": "AI service not available"}
 
         clean_items = [item for item in wardrobe if item.get('is_clean', True)]
@@ -180,7 +272,8 @@ class AIOutfitService:
         prompt = self._create_packing_list_prompt(clean_items, trip_details, weather_forecast, personalization_profile)
 
         try:
-            response = self.client.chat.completions.create(
+            response = self.ai_client.chat_completion(
+                self.PACKING_DEADLINE,
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": self._get_packing_system_prompt()},
@@ -202,6 +295,67 @@ class AIOutfitService:
             print(f"AI packing list service error: {e}")
             return {"error": "Failed to generate packing list from AI."}
 
+    def generate_packing_list_delta(self, current_items: List[str], wardrobe: List[Dict], trip_details: Dict,
+                                   weather_forecast: Dict, changes: List[str]) -> Dict[str, Any]:
+        """
+        Asks the model only for the changes an edited trip needs: items to add
+        and items (from `current_items`) to drop. Returns
+        {"add": {category: [names]}, "remove": [names], "reasoning": str} or {"error": ...}.
+        """
+        if not self.model_available:
+            return {"error": "AI service not available"}
+
+        wardrobe_rows = "\n".join(
+            "|".join(self._format_prompt_cell(item.get(field)) for field in ('name', 'type', 'style', 'fabric', 'season'))
+            for item in wardrobe
+        )
+        prompt = f"""
+A trip was edited after its packing list was made. Adjust the list for what changed; keep everything that still works.
+
+**What changed:**
+{chr(10).join(f"- {change}" for change in changes)}
+
+**Trip now:**
+- Destination: {trip_details.get('destination')}
+- Duration: {trip_details.get('duration_days')} days
+- Purpose/Type: {trip_details.get('trip_type', 'not specified')}
+- Notes: {trip_details.get('notes', 'none')}
+- Weather: {weather_forecast.get('forecast_summary_text')}
+
+**Current packing list:**
+{json.dumps(current_items)}
+
+**Clean wardrobe (name|type|style|fabric|season):**
+{wardrobe_rows}
+
+Socks, underwear and pajama quantities are handled separately; don't include them.
+Respond ONLY with JSON: {{"add": {{"<category>": ["<wardrobe item name or other item>", ...]}}, "remove": ["<name from the current list>", ...], "reasoning": "<one or two sentences on what changed and why>"}}
+"""
+        try:
+            response = self.ai_client.chat_completion(
+                self.PACKING_DEADLINE,
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": self._get_packing_system_prompt()},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.4,
+                max_tokens=800,
+            )
+            content = response.choices[0].message.content.strip()
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            if not json_match:
+                return {"error": "Failed to parse AI response."}
+            result = json.loads(json_match.group())
+            return {
+                "add": result.get("add") if isinstance(result.get("add"), dict) else {},
+                "remove": [name for name in result.get("remove", []) if isinstance(name, str)],
+                "reasoning": result.get("reasoning")
+            }
+        except Exception as e:
+            print(f"AI packing list update error: {e}")
+            return {"error": "Failed to update packing list from AI."}
+
     def _get_packing_system_prompt(self) -> str:
         """Generates the system prompt for the packing list feature."""
         return """
@@ -396,7 +550,119 @@ You MUST respond ONLY with a valid JSON object. Do not include any text before o
 }
 """
     
-    def _create_enhanced_outfit_prompt(self, available_items: List[Dict], weather: str, mood: str, season: str, outfit_history: List[Dict] = None, negative_prompts: List[str] = None) -> str:
+    def _categorize_items(self, items: List[Dict]) -> Dict[str, List[Dict]]:
+        """Groups items into outfit slots; unknown types count as accessories."""
+        categories = {category: [] for category in self.PROMPT_CATEGORIES}
+        for item in items:
+            item_type = (item.get('type') or '').lower()
+            category = next(
+                (name for name, types in self.CATEGORY_TYPES.items() if item_type in types),
+                'accessories'
+            )
+            categories[category].append(item)
+        return categories
+
+    def _estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+    def _record_prompt_stats(self, prompt_stats: Dict[str, Any], response, started: float) -> None:
+        """Keeps the prompt size and billed token counts of one model call."""
+        usage = getattr(response, 'usage', None)
+        record = {
+            **prompt_stats,
+            'timestamp': datetime.utcnow().isoformat(),
+            'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+            'completion_tokens': getattr(usage, 'completion_tokens', None),
+            'latency_ms': round((time.monotonic() - started) * 1000)
+        }
+        with self._stats_lock:
+            self.prompt_stats.append(record)
+        if has_app_context():
+            current_app.logger.debug(
+                f"Outfit prompt: {record['prompt_tokens']} prompt tokens (~{record['estimated_prompt_tokens']} estimated), "
+                f"{record['items_in_prompt']} items, {record['items_omitted']} omitted, {record['latency_ms']}ms"
+            )
+
+    def get_prompt_stats_summary(self) -> Dict[str, Any]:
+        """Aggregates the recorded outfit prompt sizes for the admin health page."""
+        with self._stats_lock:
+            records = list(self.prompt_stats)
+        if not records:
+            return {'requests': 0}
+
+        billed = [r['prompt_tokens'] for r in records if r['prompt_tokens'] is not None]
+        return {
+            'requests': len(records),
+            'avg_prompt_tokens': round(sum(billed) / len(billed)) if billed else None,
+            'max_prompt_tokens': max(billed) if billed else None,
+            'avg_items_omitted': round(sum(r['items_omitted'] for r in records) / len(records), 1),
+            'last': records[-1]
+        }
+
+    @staticmethod
+    def _format_prompt_cell(value) -> str:
+        if value is None:
+            return ''
+        if isinstance(value, (list, tuple)):
+            value = ';'.join(str(v) for v in value)
+        return str(value).replace('|', '/').replace('\n', ' ').strip()
+
+    def _encode_item_row(self, item: Dict) -> str:
+        return '|'.join(self._format_prompt_cell(item.get(field)) for field in self.PROMPT_ITEM_FIELDS)
+
+    def _prompt_relevance(self, item: Dict, season: str, mood: str, style_dna: Dict, recent_item_ids: set) -> int:
+        """How useful an item is to this request; used to decide what to drop when over budget."""
+        score = 0
+        item_season = (item.get('season') or 'all').lower()
+        if item_season in ('all', season.lower()):
+            score += 3
+        if mood.lower() in [str(tag).lower() for tag in (item.get('mood_tags') or [])]:
+            score += 2
+        if item.get('style') in style_dna.get('dominant_styles', []):
+            score += 1
+        if item.get('color') in style_dna.get('favorite_colors', []):
+            score += 1
+        if item.get('id') in recent_item_ids:
+            score -= 2
+        return score
+
+    def _select_prompt_items(self, wardrobe_by_category: Dict[str, List[Dict]], season: str, mood: str,
+                             style_dna: Dict, recent_item_ids: set) -> Dict[str, List[Dict]]:
+        """
+        Fits the wardrobe into the token budget. Items are ranked by relevance,
+        then id, so truncation is deterministic; each category keeps its best few
+        items first, then the rest are added in global rank order while they fit.
+        Kept items stay in their original order.
+        """
+        def rank(item):
+            return (-self._prompt_relevance(item, season, mood, style_dna, recent_item_ids), item['id'])
+
+        row_tokens = {}
+        for items in wardrobe_by_category.values():
+            for item in items:
+                row_tokens[item['id']] = self._estimate_tokens(self._encode_item_row(item)) + 1
+
+        remaining = self.wardrobe_token_budget
+        kept = set()
+
+        for category in self.PROMPT_CATEGORIES:
+            for item in sorted(wardrobe_by_category[category], key=rank)[:self.MIN_PROMPT_ITEMS_PER_CATEGORY]:
+                if row_tokens[item['id']] <= remaining:
+                    kept.add(item['id'])
+                    remaining -= row_tokens[item['id']]
+
+        all_items = [item for items in wardrobe_by_category.values() for item in items]
+        for item in sorted(all_items, key=rank):
+            if item['id'] not in kept and row_tokens[item['id']] <= remaining:
+                kept.add(item['id'])
+                remaining -= row_tokens[item['id']]
+
+        return {
+            category: [item for item in items if item['id'] in kept]
+            for category, items in wardrobe_by_category.items()
+        }
+
+    def _create_enhanced_outfit_prompt(self, available_items: List[Dict], weather: str, mood: str, season: str, outfit_history: List[Dict] = None, negative_prompts: List[str] = None, prompt_stats: Dict[str, Any] = None, style_dna: Dict[str, Any] = None) -> str:
         # Get recently worn items to avoid repetition
         recent_item_ids = []
         if outfit_history:
@@ -404,55 +670,29 @@ You MUST respond ONLY with a valid JSON object. Do not include any text before o
                 recent_item_ids.extend([item['id'] for item in outfit.get('clothing_items', [])])
         
         # Organize wardrobe by category for better AI understanding
-        wardrobe_by_category = {
-            'tops': [], 'bottoms': [], 'outerwear': [],
-            'shoes': [], 'accessories': [], 'dresses': []
-        }
-        for item in available_items:
-            item_type = item['type'].lower()
-            if item_type in ['shirt', 't-shirt', 'blouse', 'sweater', 'tank-top']:
-                wardrobe_by_category['tops'].append(item)
-            elif item_type in ['pants', 'jeans', 'shorts', 'skirt', 'leggings']:
-                wardrobe_by_category['bottoms'].append(item)
-            elif item_type in ['jacket', 'coat', 'cardigan', 'blazer']:
-                wardrobe_by_category['outerwear'].append(item)
-            elif item_type in ['shoes', 'sneakers', 'boots', 'sandals', 'heels']:
-                wardrobe_by_category['shoes'].append(item)
-            elif item_type == 'dress':
-                wardrobe_by_category['dresses'].append(item)
-            else:
-                wardrobe_by_category['accessories'].append(item)
+        wardrobe_by_category = self._categorize_items(available_items)
 
-        # Get User's Style DNA, now with mood context
-        style_dna = self._get_style_dna(available_items, outfit_history, mood)
+        # Get User's Style DNA, now with mood context. Callers normally pass it from the stored StyleProfile.
+        if style_dna is None:
+            style_dna = self._get_style_dna(available_items, outfit_history, mood)
         style_dna_prompt_section = ""
         if style_dna:
-            style_dna_prompt_section = f"USER'S {mood.upper()} STYLE DNA (for personalization):\n{json.dumps(style_dna, indent=2)}\n"
+            style_dna_prompt_section = f"USER'S {mood.upper()} STYLE DNA (for personalization):\n{json.dumps(style_dna, separators=(',', ':'))}\n"
 
         # --- NEW: Format Outfit History for Learning ---
         history_prompt_section = ""
         if outfit_history:
             liked_outfits_examples = []
             for outfit in outfit_history[-5:]: # Take last 5 approved outfits as examples
-                example = {
-                    "mood": outfit.get("mood"),
-                    "weather": outfit.get("weather"),
-                    "items": [
-                        {
-                            "name": item.get("name"),
-                            "type": item.get("type"),
-                            "style": item.get("style"),
-                            "color": item.get("color"),
-                        }
-                        for item in outfit.get("clothing_items", [])
-                    ],
-                }
-                liked_outfits_examples.append(example)
+                items = ", ".join(
+                    f"{item.get('name')} ({item.get('type')}/{item.get('style') or '-'}/{item.get('color') or '-'})"
+                    for item in outfit.get("clothing_items", [])
+                )
+                liked_outfits_examples.append(f"- {outfit.get('mood')} | {outfit.get('weather') or '-'} | {items}")
             
             if liked_outfits_examples:
-                history_prompt_section = f"""USER'S OUTFIT HISTORY (Examples of what they like):
-{json.dumps(liked_outfits_examples, indent=2)}
-"""
+                history_prompt_section = "USER'S OUTFIT HISTORY (Examples of what they like; mood | weather | name (type/style/color)):\n" \
+                                         + "\n".join(liked_outfits_examples) + "\n"
 
         mood_contexts = {
             'casual': ['relaxed and comfortable', 'everyday and effortless', 'laid-back and easy-going'],
@@ -473,7 +713,13 @@ You MUST respond ONLY with a valid JSON object. Do not include any text before o
         ])
         
         timestamp = int(time.time())
-        item_fields_to_include = ['id', 'name', 'color', 'style', 'fabric', 'season', 'brand', 'mood_tags']
+
+        prompt_items = self._select_prompt_items(wardrobe_by_category, season, mood, style_dna, set(recent_item_ids))
+        wardrobe_section = "\n".join(
+            f"{category.capitalize()}:\n"
+            + ("\n".join(self._encode_item_row(item) for item in prompt_items[category]) or "(none)")
+            for category in self.PROMPT_CATEGORIES
+        )
         
         negative_prompts_section = ""
         if negative_prompts:
@@ -510,13 +756,9 @@ OUTFIT RULES (You MUST follow these):
     -   **Accent Color (10%):** Use this for small accessories like a belt, scarf, or jewelry to add a pop of color.
     -   (Neutrals like black, white, grey, and beige can be used freely and don't strictly count towards this limit).
 
-AVAILABLE WARDROBE:
-Tops: {json.dumps([{k: v for k, v in item.items() if k in item_fields_to_include} for item in wardrobe_by_category['tops']], indent=2)}
-Bottoms: {json.dumps([{k: v for k, v in item.items() if k in item_fields_to_include} for item in wardrobe_by_category['bottoms']], indent=2)}
-Outerwear: {json.dumps([{k: v for k, v in item.items() if k in item_fields_to_include} for item in wardrobe_by_category['outerwear']], indent=2)}
-Shoes: {json.dumps([{k: v for k, v in item.items() if k in item_fields_to_include} for item in wardrobe_by_category['shoes']], indent=2)}
-Dresses: {json.dumps([{k: v for k, v in item.items() if k in item_fields_to_include} for item in wardrobe_by_category['dresses']], indent=2)}
-Accessories: {json.dumps([{k: v for k, v in item.items() if k in item_fields_to_include} for item in wardrobe_by_category['accessories']], indent=2)}
+AVAILABLE WARDROBE (one row per item, grouped by category; list values are separated by ';'):
+{'|'.join(self.PROMPT_ITEM_FIELDS)}
+{wardrobe_section}
 
 REQUIREMENTS:
 1. **Create a COMPLETE and LAYERED outfit.** Your goal is to create a full look, not just pick a few items.
@@ -540,6 +782,13 @@ RESPONSE FORMAT (JSON only):
     "confidence": 0.95
 }}
 """
+        if prompt_stats is not None:
+            items_in_prompt = sum(len(items) for items in prompt_items.values())
+            prompt_stats.update({
+                'estimated_prompt_tokens': self._estimate_tokens(self._get_system_prompt() + prompt),
+                'items_in_prompt': items_in_prompt,
+                'items_omitted': len(available_items) - items_in_prompt
+            })
         return prompt
 
     def _get_style_dna(self, available_items: List[Dict], outfit_history: List[Dict], mood: str) -> Dict[str, Any]:
@@ -577,13 +826,18 @@ RESPONSE FORMAT (JSON only):
                         if item.get('fabric'):
                             fabric_counter[item['fabric']] += 2
 
-        # Construct the Style DNA profile
-        favorite_colors = [color for color, count in color_counter.most_common(3)]
+        return self.summarize_style_dna({
+            'style': style_counter, 'color': color_counter, 'brand': brand_counter, 'fabric': fabric_counter
+        })
+
+    def summarize_style_dna(self, counters: Dict[str, Counter]) -> Dict[str, Any]:
+        """Builds the prompt's Style DNA from per-attribute counters (see StyleProfile.weighted_counts)."""
+        favorite_colors = [color for color, count in counters['color'].most_common(3)]
         style_dna = {
-            "dominant_styles": [style for style, count in style_counter.most_common(3)],
+            "dominant_styles": [style for style, count in counters['style'].most_common(3)],
             "favorite_colors": favorite_colors,
-            "preferred_brands": [brand for brand, count in brand_counter.most_common(3)],
-            "common_fabrics": [fabric for fabric, count in fabric_counter.most_common(3)],
+            "preferred_brands": [brand for brand, count in counters['brand'].most_common(3)],
+            "common_fabrics": [fabric for fabric, count in counters['fabric'].most_common(3)],
             "preferred_color_scheme": self._get_preferred_color_scheme(favorite_colors)
         }
         
@@ -592,70 +846,189 @@ RESPONSE FORMAT (JSON only):
         
         return style_dna
 
-    # Keep all other methods the same, but add randomization to fallback
-    def _enhanced_fallback_outfit_suggestion(self, available_items: List[Dict], weather: str, mood: str) -> Dict[str, Any]:
-        """Enhanced fallback with basic styling logic and randomization"""
-        
-        # Categorize items
-        tops = [item for item in available_items if item['type'] in ['shirt', 'blouse', 't-shirt', 'sweater']]
-        bottoms = [item for item in available_items if item['type'] in ['pants', 'jeans', 'skirt', 'shorts']]
-        dresses = [item for item in available_items if item['type'] == 'dress']
-        shoes = [item for item in available_items if item['type'] in ['shoes', 'sneakers', 'boots']]
-        outerwear = [item for item in available_items if item['type'] in ['jacket', 'coat', 'cardigan']]
-        
-        # RANDOMIZE selection
-        if tops: random.shuffle(tops)
-        if bottoms: random.shuffle(bottoms)
-        if dresses: random.shuffle(dresses)
-        if shoes: random.shuffle(shoes)
-        if outerwear: random.shuffle(outerwear)
-        
-        selected = []
-        reasoning_parts = []
-        
-        # Weather-based logic
-        temp_info = self._extract_temperature(weather)
-        is_cold = temp_info < 15 if temp_info else 'cold' in weather.lower()
-        is_rainy = 'rain' in weather.lower() or 'shower' in weather.lower()
-        
-        # Choose main pieces (with randomization)
-        if dresses and mood in ['date', 'elegant', 'party'] and random.random() > 0.3:
-            # Prefer dress for special occasions (but not always)
-            dress = dresses[0]  # Already shuffled
-            selected.append(dress['id'])
-            reasoning_parts.append(f"Selected {dress['name']} as it's perfect for a {mood} mood")
+    def _enhanced_fallback_outfit_suggestion(self, available_items: List[Dict], weather: str, mood: str, season: str = "any", outfit_history: List[Dict] = None) -> Dict[str, Any]:
+        """Best outfit from the local engine, used whenever the model isn't called or fails."""
+        recent_item_ids = set()
+        for outfit in (outfit_history or [])[-5:]:
+            recent_item_ids.update(item.get('id') for item in outfit.get('clothing_items', []))
+
+        outfits = self.generate_local_outfits(available_items, weather, mood, season, recent_item_ids, top_k=1)
+        if outfits:
+            return outfits[0]
+
+        return {
+            "selected_items": [],
+            "reasoning": "I couldn't put together a complete outfit from your clean clothes. Time to do some laundry or add a few basics!",
+            "style_notes": self._get_mood_style_tips(mood),
+            "weather_notes": f"Appropriate for {weather} conditions",
+            "confidence": 0.0,
+            "source": "local"
+        }
+
+    # --- Local outfit engine ---
+
+    # Candidates kept per slot after pruning by single-item score
+    ENGINE_CANDIDATES = {'tops': 8, 'bottoms': 8, 'dresses': 6, 'shoes': 6, 'outerwear': 5}
+
+    @staticmethod
+    def _color_index(item: Dict) -> int:
+        """Palette id of an item's color; the engine indexes colors.HARMONY_MATRIX with it."""
+        return colors.canonical_id(item.get('color_id'), item.get('color')) or colors.OTHER
+
+    def _item_scores(self, items: List[Dict], mood: str, season: str, recent_item_ids: set) -> np.ndarray:
+        """Vector of single-item scores: season fit, mood tags and style, recent-wear penalty."""
+        mood = (mood or '').lower()
+        season = (season or 'any').lower()
+        item_seasons = np.array([(item.get('season') or 'all').lower() for item in items])
+        in_season = (item_seasons == 'all') | (item_seasons == season) | (season == 'any')
+        mood_tagged = np.array([mood in [str(t).lower() for t in (item.get('mood_tags') or [])] for item in items])
+        style_match = np.array([(item.get('style') or '').lower() == mood for item in items])
+        recent = np.array([item.get('id') in recent_item_ids for item in items])
+        return 2.0 * in_season + 1.5 * mood_tagged + 1.0 * style_match - 2.0 * recent
+
+    def generate_local_outfits(self, available_items: List[Dict], weather: str, mood: str, season: str = "any",
+                               recent_item_ids: set = None, top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Constraint-based outfit search without the model. Enumerates
+        (top + bottom | dress) + shoes + optional outerwear over the best few
+        candidates per slot, scores every combination at once with NumPy
+        (color harmony, season, temperature, mood, recent wear) and returns the
+        top_k as suggestion dicts.
+        """
+        recent_item_ids = recent_item_ids or set()
+        categories = self._categorize_items(available_items)
+        if not categories['shoes'] or not (categories['dresses'] or (categories['tops'] and categories['bottoms'])):
+            return []
+
+        temperature = self._extract_temperature(weather or '')
+        weather_lower = (weather or '').lower()
+        is_cold = temperature < 15 if temperature is not None else 'cold' in weather_lower
+        is_hot = temperature is not None and temperature >= 24
+        is_rainy = 'rain' in weather_lower or 'shower' in weather_lower or 'snow' in weather_lower
+
+        harmony = colors.HARMONY_MATRIX
+        slots = {}
+        for slot, limit in self.ENGINE_CANDIDATES.items():
+            items = categories[slot]
+            if not items:
+                slots[slot] = ([], np.zeros(0), np.zeros(0, dtype=int))
+                continue
+            scores = self._item_scores(items, mood, season, recent_item_ids)
+            # Prune to the best candidates; ties go to the lower id so results are stable
+            order = sorted(range(len(items)), key=lambda i: (-scores[i], items[i]['id']))[:limit]
+            slots[slot] = (
+                [items[i] for i in order],
+                scores[order],
+                np.array([self._color_index(items[i]) for i in order], dtype=int)
+            )
+
+        shoes, shoe_scores, shoe_colors = slots['shoes']
+        outer, outer_scores, outer_colors = slots['outerwear']
+        # Outerwear slot 0 means "none". A layer has to earn its place: it is only
+        # worth adding when it's cold or wet, and is strongly discouraged when hot.
+        layer_bonus = 3.0 if (is_cold or is_rainy) else (-5.0 if is_hot else -2.0)
+        outer_scores = np.concatenate([[0.0], 0.25 * outer_scores + layer_bonus])
+
+        candidates = []
+        bases = []
+        if slots['tops'][0] and slots['bottoms'][0]:
+            bases.append(('separates', slots['tops'], slots['bottoms']))
+        if slots['dresses'][0]:
+            bases.append(('dress', slots['dresses'], None))
+
+        for kind, first, second in bases:
+            first_items, first_scores, first_colors = first
+            if second is not None:
+                second_items, second_scores, second_colors = second
+            else:
+                second_items, second_scores, second_colors = [None], np.zeros(1), np.array([colors.OTHER])
+
+            # Axes: first piece x second piece x shoes x outerwear (+ none)
+            base = first_scores[:, None] + second_scores[None, :]
+            color_fit = harmony[first_colors[:, None], second_colors[None, :]] if second is not None \
+                else np.ones((len(first_items), 1))
+            score = (base + 2.0 * color_fit)[:, :, None] + shoe_scores[None, None, :] \
+                + harmony[first_colors[:, None, None], shoe_colors[None, None, :]] \
+                + (harmony[second_colors[None, :, None], shoe_colors[None, None, :]] if second is not None else 0.0)
+            score = score[:, :, :, None] + outer_scores[None, None, None, :]
+            if len(outer):
+                outer_fit = harmony[first_colors[:, None], outer_colors[None, :]]
+                score[:, :, :, 1:] += 0.5 * outer_fit[:, None, None, :]
+
+            # Best shoes/outerwear for each base, so the top_k differ in their main pieces
+            finish = score.reshape(score.shape[0], score.shape[1], -1)
+            best_finish = finish.argmax(axis=2)
+            core = finish.max(axis=2).ravel()
+            take = min(top_k, core.size)
+            for index in np.argpartition(-core, take - 1)[:take]:
+                i, j = np.unravel_index(index, best_finish.shape)
+                k, o = np.unravel_index(best_finish[i, j], score.shape[2:])
+                pieces = [first_items[i]] + ([second_items[j]] if second is not None else []) + [shoes[k]]
+                if o > 0:
+                    pieces.append(outer[o - 1])
+                candidates.append((float(core[index]), kind, pieces))
+
+        candidates.sort(key=lambda c: (-c[0], [p['id'] for p in c[2]]))
+        best_score = candidates[0][0] if candidates else 1.0
+        return [
+            self._describe_local_outfit(pieces, kind, score, best_score, weather, mood, is_cold or is_rainy,
+                                        season, recent_item_ids)
+            for score, kind, pieces in candidates[:top_k]
+        ]
+
+    # What colors.relation says about an outfit's main pair, for the local reasoning
+    COLOR_RELATION_NOTES = {
+        'neutral': 'A neutral keeps the colors easy together',
+        'monochromatic': 'The colors stay in one family',
+        'analogous': 'The colors sit next to each other on the wheel',
+        'complementary': 'The colors are complementary',
+        'split-complementary': 'The colors are split-complementary',
+        'triadic': 'The colors form a triadic mix',
+        'clash': 'The colors are a bold mix',
+    }
+
+    def _local_outfit_notes(self, pieces: List[Dict], season: str, recent_item_ids: set) -> List[str]:
+        """Sentences on the engine's scoring terms (color harmony, season, recent wear) for one outfit."""
+        notes = []
+        # The main pair: top and bottom, or the dress and its shoes
+        pair = (self._color_index(pieces[0]), self._color_index(pieces[1]))
+        if colors.OTHER not in pair:
+            notes.append(self.COLOR_RELATION_NOTES.get(colors.relation(*pair)))
+
+        season = (season or 'any').lower()
+        if season != 'any' and all((piece.get('season') or 'all').lower() in ('all', season) for piece in pieces):
+            notes.append(f"Every piece suits {season}")
+
+        worn = [piece['name'] for piece in pieces if piece.get('id') in recent_item_ids]
+        if worn:
+            notes.append(f"You wore the {' and the '.join(worn)} recently")
+        elif recent_item_ids:
+            notes.append("You haven't worn any of it recently")
+        return [note for note in notes if note]
+
+    def _describe_local_outfit(self, pieces: List[Dict], kind: str, score: float, best_score: float,
+                               weather: str, mood: str, needs_layer: bool, season: str = "any",
+                               recent_item_ids: set = None) -> Dict[str, Any]:
+        names = [piece['name'] for piece in pieces]
+        if kind == 'dress':
+            reasoning = f"The {names[0]} carries the look on its own for a {mood} mood, finished with the {names[1]}"
         else:
-            # Top + bottom combination
-            if tops:
-                top = tops[0]  # Already shuffled
-                selected.append(top['id'])
-                reasoning_parts.append(f"Chose {top['name']} for the top")
-            
-            if bottoms:
-                bottom = bottoms[0]  # Already shuffled
-                selected.append(bottom['id'])
-                reasoning_parts.append(f"Paired with {bottom['name']} for the bottom")
-        
-        # Add shoes
-        if shoes:
-            shoe = shoes[0]  # Already shuffled
-            selected.append(shoe['id'])
-            reasoning_parts.append(f"Added {shoe['name']} to complete the look")
-        
-        # Add outerwear for cold weather (sometimes)
-        if (is_cold or is_rainy) and outerwear and random.random() > 0.4:
-            jacket = outerwear[0]  # Already shuffled
-            selected.append(jacket['id'])
-            reasoning_parts.append(f"Added {jacket['name']} for warmth/protection")
-        
+            reasoning = f"The {names[0]} with the {names[1]} sets the tone for a {mood} mood, finished with the {names[2]}"
+        has_layer = len(pieces) > (2 if kind == 'dress' else 3)
+        if has_layer:
+            reasoning += f", and the {names[-1]} on top for {'warmth' if needs_layer else 'a bit of structure'}"
+        piece_colors = [piece.get('color') for piece in pieces if piece.get('color')]
+
         return {
-            "selected_items": selected,
-            "reasoning": ". ".join(reasoning_parts) + f". This combination works well for {mood} mood and {weather} weather.",
+            "selected_items": [piece['id'] for piece in pieces],
+            "reasoning": ". ".join([reasoning] + self._local_outfit_notes(pieces, season, recent_item_ids or set())) + ".",
             "style_notes": self._get_mood_style_tips(mood),
+            "color_story": ", ".join(dict.fromkeys(piece_colors)) if piece_colors else "",
             "weather_notes": f"Appropriate for {weather} conditions",
-            "confidence": round(random.uniform(0.6, 0.8), 2)  # Randomize confidence
+            "confidence": round(0.6 + 0.3 * max(0.0, min(1.0, score / best_score)) if best_score > 0 else 0.6, 2),
+            "source": "local"
         }
-    
+
     # Keep all other methods the same...
     def _validate_ai_response(self, response: Dict, available_items: List[Dict]) -> bool:
         """Validate AI response structure and content"""
@@ -738,7 +1111,7 @@ RESPONSE FORMAT (JSON only):
     def _extract_temperature(self, weather: str) -> int:
         """Extract temperature from weather string"""
         import re
-        temp_match = re.search(r'(\d+)°?[CF]?', weather)
+        temp_match = re.search(r'(-?\d+)°?[CF]?', weather)
         return int(temp_match.group(1)) if temp_match else None
     
     def _get_mood_style_tips(self, mood: str) -> str:
@@ -0,0 +1,101 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from models import Brand
+
+class BrandIndex:
+    """
+    In-process typeahead index over approved brand names.
+
+    Prefix lookups bisect a sorted array of case-folded names; infix lookups
+    intersect trigram posting lists and then confirm the substring. The index is
+    rebuilt from the Brand table on first use, whenever brand moderation changes
+    the approved set, and after `max_age` seconds so other worker processes pick
+    up changes made elsewhere.
+    """
+
+    def __init__(self, max_age: int = 300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._built_at = 0.0
+
+    @staticmethod
+    def _trigrams(text: str) -> Set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def refresh(self) -> None:
+        """Rebuilds the index from approved brands. Must run inside an app context."""
+        names = sorted(
+            (name for (name,) in Brand.query.filter_by(is_approved=True).with_entities(Brand.name)),
+            key=str.casefold
+        )
+        folded = [name.casefold() for name in names]
+
+        trigrams: Dict[str, List[int]] = defaultdict(list)
+        for position, name in enumerate(folded):
+            for trigram in self._trigrams(name):
+                trigrams[trigram].append(position)
+
+        # Readers take a reference to the whole snapshot, so swapping it is atomic
+        with self._lock:
+            self._snapshot = (names, folded, dict(trigrams))
+            self._built_at = time.monotonic()
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._built_at > self.max_age:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Returns up to `limit` approved brand names containing `query`
+        (case-insensitive), prefix matches first, each group alphabetical.
+        """
+        needle = (query or '').strip().casefold()
+        if not needle:
+            return []
+
+        names, folded, trigrams = self._current()
+
+        start = bisect.bisect_left(folded, needle)
+        prefix_positions = []
+        for position in range(start, len(folded)):
+            if len(prefix_positions) >= limit or not folded[position].startswith(needle):
+                break
+            prefix_positions.append(position)
+
+        results = [names[position] for position in prefix_positions]
+        if len(results) >= limit:
+            return results
+
+        infix_positions = self._infix_candidates(needle, folded, trigrams)
+        matched = set(prefix_positions)
+        for position in infix_positions:
+            if position not in matched and needle in folded[position]:
+                results.append(names[position])
+                if len(results) >= limit:
+                    break
+
+        return results
+
+    def _infix_candidates(self, needle: str, folded: List[str],
+                          trigrams: Dict[str, List[int]]) -> List[int]:
+        if len(needle) < 3:
+            # Too short for trigrams; the approved list is small enough to scan
+            return list(range(len(folded)))
+
+        candidates: Optional[Set[int]] = None
+        # Intersect the rarest posting lists first
+        for trigram in sorted(self._trigrams(needle), key=lambda t: len(trigrams.get(t, ()))):
+            postings = trigrams.get(trigram)
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates.intersection(postings)
+            if not candidates:
+                return []
+        return sorted(candidates)
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import func
+from models import Brand
+
+class BrandResolutionService:
+    """
+    Resolves brand names to Brand ids for item writes.
+
+    Keeps an LRU map of lowercased name -> id in process so that repeated saves
+    (and bulk imports) don't query the brand table. Misses go to the database
+    through the functional index on lower(name), which the map's keys match so
+    both agree on which spellings are one brand. Only hits are cached, so a brand
+    submitted in another worker is found on the next lookup. Admin brand
+    moderation invalidates the map, and it is dropped after `max_age` seconds so
+    other worker processes never hold on to a deleted brand for long.
+    """
+
+    def __init__(self, max_size: int = 2048, max_age: int = 300):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()
+        self._created_at = time.monotonic()
+
+    def resolve_id(self, brand_name: Optional[str]) -> Optional[int]:
+        """Returns the id of the brand named `brand_name` (case-insensitive), or None."""
+        if not brand_name or not brand_name.strip():
+            return None
+        # str.lower(), not casefold(): it must match the SQL lower() below ('Straße' vs 'STRASSE')
+        key = brand_name.strip().lower()
+
+        with self._lock:
+            if time.monotonic() - self._created_at > self.max_age:
+                self._ids.clear()
+                self._created_at = time.monotonic()
+            brand_id = self._ids.get(key)
+            if brand_id is not None:
+                self._ids.move_to_end(key)
+                return brand_id
+
+        row = Brand.query.with_entities(Brand.id)\
+            .filter(func.lower(Brand.name) == key)\
+            .first()
+        if not row:
+            return None
+
+        with self._lock:
+            self._ids[key] = row.id
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+        return row.id
+
+    def invalidate(self, brand_name: Optional[str] = None) -> None:
+        """Drops one cached name, or the whole map when no name is given."""
+        with self._lock:
+            if brand_name is None:
+                self._ids.clear()
+                self._created_at = time.monotonic()
+            else:
+                self._ids.pop(brand_name.strip().lower(), None)
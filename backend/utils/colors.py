@@ -0,0 +1,204 @@
+"""
+Canonical color palette shared by laundry sorting, wardrobe gap analysis and
+outfit scoring.
+
+Free-text colors are normalized to a palette id once, when an item is written
+(ClothingItem.color_id), so that the services only do table lookups. Every
+per-color attribute below is precomputed and indexed by that id.
+"""
+import re
+from typing import Dict, List, Optional
+import numpy as np
+
+# A simplified color wheel for fashion.
+COLOR_WHEEL = [
+    'red', 'red-orange', 'orange', 'yellow-orange', 'yellow',
+    'yellow-green', 'green', 'blue-green', 'blue', 'blue-violet',
+    'violet', 'red-violet'
+]
+
+# Map common clothing colors to the wheel
+COLOR_MAP = {
+    'pink': 'red', 'rose': 'red-violet', 'burgundy': 'red', 'maroon': 'red',
+    'coral': 'red-orange', 'peach': 'orange', 'tan': 'yellow-orange', 'beige': 'yellow-orange',
+    'mustard': 'yellow', 'gold': 'yellow', 'lime': 'yellow-green', 'olive': 'yellow-green',
+    'teal': 'blue-green', 'turquoise': 'blue-green', 'aqua': 'blue-green', 'mint': 'green',
+    'navy': 'blue', 'sky blue': 'blue', 'royal blue': 'blue', 'indigo': 'blue-violet',
+    'purple': 'violet', 'lavender': 'violet', 'magenta': 'red-violet',
+    # Neutrals are handled separately but can have undertones
+    'brown': 'orange', 'cream': 'yellow', 'ivory': 'yellow',
+}
+
+# (name, is_neutral, laundry load, wardrobe family). Ids are list positions and
+# are stored on ClothingItem.color_id, so only ever append to this list.
+PALETTE = [
+    ('other', False, 'colors', 'colors'),
+    ('black', True, 'darks', 'darks'),
+    ('charcoal', True, 'darks', 'darks'),
+    ('grey', True, 'colors', 'colors'),
+    ('white', True, 'whites', 'lights'),
+    ('cream', True, 'whites', 'lights'),
+    ('ivory', True, 'whites', 'lights'),
+    ('beige', True, 'whites', 'lights'),
+    ('tan', True, 'colors', 'colors'),
+    ('brown', True, 'colors', 'colors'),
+    ('khaki', True, 'colors', 'colors'),
+    ('navy', True, 'darks', 'blues'),
+    ('denim', True, 'colors', 'blues'),
+    ('blue', False, 'colors', 'blues'),
+    ('sky blue', False, 'colors', 'blues'),
+    ('royal blue', False, 'colors', 'blues'),
+    ('indigo', False, 'colors', 'blues'),
+    ('red', False, 'colors', 'reds'),
+    ('burgundy', False, 'colors', 'reds'),
+    ('maroon', False, 'colors', 'reds'),
+    ('pink', False, 'colors', 'reds'),
+    ('rose', False, 'colors', 'colors'),
+    ('coral', False, 'colors', 'colors'),
+    ('orange', False, 'colors', 'colors'),
+    ('peach', False, 'colors', 'colors'),
+    ('yellow', False, 'colors', 'colors'),
+    ('mustard', False, 'colors', 'colors'),
+    ('gold', False, 'colors', 'colors'),
+    ('green', False, 'colors', 'colors'),
+    ('olive', False, 'colors', 'colors'),
+    ('lime', False, 'colors', 'colors'),
+    ('mint', False, 'colors', 'colors'),
+    ('teal', False, 'colors', 'colors'),
+    ('turquoise', False, 'colors', 'colors'),
+    ('aqua', False, 'colors', 'colors'),
+    ('purple', False, 'colors', 'colors'),
+    ('violet', False, 'colors', 'colors'),
+    ('lavender', False, 'colors', 'colors'),
+    ('magenta', False, 'colors', 'colors'),
+    ('dark', False, 'darks', 'darks'),
+]
+
+OTHER = 0
+COLOR_IDS = {name: color_id for color_id, (name, _, _, _) in enumerate(PALETTE)}
+
+# Spellings and shades that map onto a palette entry
+ALIASES = {
+    'gray': 'grey', 'light grey': 'grey', 'light gray': 'grey', 'silver': 'grey', 'heather grey': 'grey',
+    'dark grey': 'charcoal', 'dark gray': 'charcoal', 'off white': 'cream', 'off-white': 'cream',
+    'camel': 'tan', 'sand': 'beige', 'nude': 'beige', 'chocolate': 'brown',
+    'dark blue': 'navy', 'light blue': 'sky blue', 'baby blue': 'sky blue', 'cobalt': 'royal blue',
+    'jeans': 'denim', 'wine': 'burgundy', 'dark red': 'burgundy', 'blush': 'pink', 'hot pink': 'pink',
+    'salmon': 'coral', 'rust': 'orange', 'khaki green': 'olive', 'forest green': 'green', 'emerald': 'green',
+    'sage': 'mint', 'lilac': 'lavender', 'plum': 'purple', 'fuchsia': 'magenta',
+}
+
+# Longest names first so "sky blue" wins over "blue" when scanning free text
+_SCAN_ORDER = sorted(
+    [(name, name) for name in COLOR_IDS if name != 'other'] + list(ALIASES.items()),
+    key=lambda pair: -len(pair[0])
+)
+_DARK_SHADE = re.compile(r'\bdark\b')
+_SCAN_PATTERNS = [(re.compile(r'\b' + re.escape(text) + r'\b'), name) for text, name in _SCAN_ORDER]
+
+NEUTRAL = np.array([is_neutral for _, is_neutral, _, _ in PALETTE])
+LAUNDRY_GROUP = [load for _, _, load, _ in PALETTE]
+COLOR_FAMILY = [family for _, _, _, family in PALETTE]
+# Position on COLOR_WHEEL, or -1 for neutrals and unplaced colors
+WHEEL_POSITION = np.array([
+    -1 if is_neutral else (
+        COLOR_WHEEL.index(COLOR_MAP.get(name, name)) if COLOR_MAP.get(name, name) in COLOR_WHEEL else -1
+    )
+    for name, is_neutral, _, _ in PALETTE
+])
+
+
+def normalize_color(color: Optional[str]) -> Optional[int]:
+    """Maps a free-text color to a palette id; None when no color was given."""
+    if not color or not color.strip():
+        return None
+    text = color.strip().lower()
+    if text in COLOR_IDS:
+        return COLOR_IDS[text]
+    if text in ALIASES:
+        return COLOR_IDS[ALIASES[text]]
+    if _DARK_SHADE.search(text):
+        return COLOR_IDS['dark']
+    for pattern, name in _SCAN_PATTERNS:
+        if pattern.search(text):
+            return COLOR_IDS[name]
+    return OTHER
+
+
+def canonical_id(color_id: Optional[int], color: Optional[str]) -> Optional[int]:
+    """The stored palette id, or the normalized text for rows written before color_id existed."""
+    return color_id if color_id is not None else normalize_color(color)
+
+
+def _build_relations():
+    """
+    Pairwise relation and harmony score for every palette pair: 'neutral' when
+    either side is neutral, otherwise by distance on the wheel.
+    """
+    n = len(PALETTE)
+    wheel = len(COLOR_WHEEL)
+    # Same, analogous, -, -, triadic, split-complementary, complementary
+    by_distance = [('monochromatic', 0.8), ('analogous', 0.9), ('clash', 0.3), ('clash', 0.2),
+                   ('triadic', 0.6), ('split-complementary', 0.7), ('complementary', 0.85)]
+    relations = [[None] * n for _ in range(n)]
+    harmony = np.full((n, n), 0.5)
+    for a in range(n):
+        for b in range(n):
+            if NEUTRAL[a] or NEUTRAL[b]:
+                relations[a][b], harmony[a, b] = 'neutral', 1.0
+            elif WHEEL_POSITION[a] >= 0 and WHEEL_POSITION[b] >= 0:
+                gap = abs(int(WHEEL_POSITION[a]) - int(WHEEL_POSITION[b]))
+                relations[a][b], harmony[a, b] = by_distance[min(gap, wheel - gap)]
+    return relations, harmony
+
+RELATIONS, HARMONY_MATRIX = _build_relations()
+
+
+def harmony(a: Optional[int], b: Optional[int]) -> float:
+    """Harmony between two palette ids in [0, 1]; unknown colors score 0.5."""
+    if a is None or b is None:
+        return 0.5
+    return float(HARMONY_MATRIX[a, b])
+
+
+def relation(a: Optional[int], b: Optional[int]) -> Optional[str]:
+    """'complementary', 'analogous', 'neutral', ... or None when unknown."""
+    if a is None or b is None:
+        return None
+    return RELATIONS[a][b]
+
+
+def laundry_group(color_id: Optional[int]) -> str:
+    """'whites', 'darks' or 'colors'."""
+    return LAUNDRY_GROUP[color_id] if color_id is not None else 'colors'
+
+
+def color_family(color_id: Optional[int]) -> str:
+    """Wardrobe color family: 'darks', 'lights', 'blues', 'reds' or 'colors'."""
+    return COLOR_FAMILY[color_id] if color_id is not None else 'colors'
+
+
+def is_neutral(color_id: Optional[int]) -> bool:
+    return color_id is not None and bool(NEUTRAL[color_id])
+
+
+_WHEEL_INDEX = {name: position for position, name in enumerate(COLOR_WHEEL)}
+_WHEEL_RELATIONSHIPS = [
+    {
+        "analogous": [COLOR_WHEEL[(i - 1) % len(COLOR_WHEEL)], COLOR_WHEEL[(i + 1) % len(COLOR_WHEEL)]],
+        "complementary": [COLOR_WHEEL[(i + len(COLOR_WHEEL) // 2) % len(COLOR_WHEEL)]]
+    }
+    for i in range(len(COLOR_WHEEL))
+]
+
+
+def wheel_relationships(color: str) -> Dict[str, List[str]]:
+    """Analogous and complementary wheel colors for a wheel or clothing color name."""
+    text = (color or '').strip().lower()
+    base = COLOR_MAP.get(text, text)
+    if base in _WHEEL_INDEX:
+        return _WHEEL_RELATIONSHIPS[_WHEEL_INDEX[base]]
+    position = WHEEL_POSITION[normalize_color(text) or OTHER]
+    if position < 0:
+        return {"analogous": [], "complementary": []}
+    return _WHEEL_RELATIONSHIPS[int(position)]
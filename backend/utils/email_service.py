@@ -11,6 +11,8 @@ class EmailService:
         if self.api_key:
             self.configuration = brevo_python.Configuration()
             self.configuration.api_key['api-key'] = self.api_key
+            if os.environ.get('BREVO_API_URL'):
+                self.configuration.host = os.environ['BREVO_API_URL']
             self.api_instance = transactional_emails_api.TransactionalEmailsApi(
                 brevo_python.ApiClient(self.configuration)
             )
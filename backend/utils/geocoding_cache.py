@@ -0,0 +1,115 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from models import GeocodedLocation, db
+
+class GeocodingCache:
+    """
+    Location string -> coordinates, shared by every user and process.
+
+    Lookups go to an in-process LRU first, then the geocoded_location table,
+    so the geocoding API is only called once per distinct (normalized)
+    location across the whole user base. Coordinates never expire; places
+    the geocoder didn't know are remembered for `negative_ttl` so that typos
+    aren't looked up on every request but new or misspelt places get another
+    chance later.
+    """
+
+    def __init__(self, max_entries: int = 2048, negative_ttl: timedelta = timedelta(days=7)):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # key -> (coords or None, monotonic expiry or None)
+        self._entries = OrderedDict()
+        self._counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stored': 0}
+
+    @staticmethod
+    def normalize(location: Optional[str]) -> str:
+        """'  Paris ,FR' -> 'paris,fr'"""
+        text = ' '.join((location or '').lower().split())
+        return re.sub(r'\s*,\s*', ',', text)[:200]
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _remember(self, key: str, coords: Optional[Dict[str, float]], expires_in: Optional[float]) -> None:
+        expires_at = time.monotonic() + expires_in if expires_in is not None else None
+        with self._lock:
+            self._entries[key] = (coords, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, location: str) -> Tuple[bool, Optional[Dict[str, float]]]:
+        """(True, coords or None) when the answer is cached, (False, None) when the geocoder must be asked."""
+        key = self.normalize(location)
+        if not key:
+            return True, None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                coords, expires_at = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return True, coords
+                del self._entries[key]
+
+        try:
+            row = db.session.execute(
+                select(GeocodedLocation.lat, GeocodedLocation.lon, GeocodedLocation.found, GeocodedLocation.created_at)
+                .where(GeocodedLocation.location == key)
+            ).first()
+        except Exception as e:
+            print(f"Geocoding cache read error: {e}")
+            row = None
+
+        if row is not None:
+            if row.found:
+                coords = {"lat": row.lat, "lon": row.lon}
+                self._remember(key, coords, None)
+                self._count('db_hits')
+                return True, coords
+            remaining = (row.created_at + self.negative_ttl - datetime.utcnow()).total_seconds()
+            if remaining > 0:
+                self._remember(key, None, remaining)
+                self._count('db_hits')
+                return True, None
+
+        self._count('misses')
+        return False, None
+
+    def put(self, location: str, coords: Optional[Dict[str, float]]) -> None:
+        """Stores a geocoder answer; `coords` None records an unknown place."""
+        key = self.normalize(location)
+        if not key:
+            return
+        self._remember(key, coords, None if coords else self.negative_ttl.total_seconds())
+
+        # Own short transaction, so the caller's pending changes aren't committed with it
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(delete(GeocodedLocation).where(GeocodedLocation.location == key))
+                connection.execute(insert(GeocodedLocation).values(
+                    location=key,
+                    lat=coords['lat'] if coords else None,
+                    lon=coords['lon'] if coords else None,
+                    found=coords is not None,
+                    created_at=datetime.utcnow()
+                ))
+            self._count('stored')
+        except IntegrityError:
+            pass  # Stored concurrently by another worker
+        except Exception as e:
+            print(f"Geocoding cache write error: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, 'memory_entries': len(self._entries)}
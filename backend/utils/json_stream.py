@@ -0,0 +1,210 @@
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+class StreamingJSONObject:
+    """
+    Incremental parser for one top-level JSON object arriving in chunks (e.g.
+    a streamed model completion). Text before the opening brace is ignored.
+
+    `feed(chunk)` yields:
+      ('delta', key, text)  decoded text as it arrives for top-level string values
+      ('value', key, value) each top-level value once it is complete
+
+    Nested arrays and objects are reported once, as a whole, when they close.
+    Completed values are also collected in `result`; `done` is set on the
+    closing brace.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.result: Dict[str, Any] = {}
+        self.done = False
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'start'  # start, key, colon, value, string, nested, scalar, comma
+        self._key = None
+        self._token = []        # key or string value characters
+        self._raw_start = 0     # start of a nested/scalar value in _buffer
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> Iterator[Tuple]:
+        if self.done or not chunk:
+            return
+        self._buffer += chunk
+        while self._pos < len(self._buffer) and not self.done:
+            consumed = yield from self._step()
+            if not consumed:
+                break  # need more input (incomplete escape sequence)
+        # Keep the buffer from growing with text that has been fully handled
+        if self._state not in ('nested', 'scalar') and self._pos > 0:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+    def _step(self):
+        char = self._buffer[self._pos]
+        state = self._state
+
+        if state == 'start':
+            if char == '{':
+                self._state = 'key'
+            self._pos += 1
+
+        elif state == 'key':
+            if char == '"':
+                text, end = self._read_string(self._pos + 1)
+                if end is None:
+                    return False
+                self._key = text
+                self._state = 'colon'
+                self._pos = end
+            else:
+                if char == '}':
+                    self.done = True
+                self._pos += 1
+
+        elif state == 'colon':
+            if char == ':':
+                self._state = 'value'
+            self._pos += 1
+
+        elif state == 'value':
+            if char.isspace():
+                self._pos += 1
+            elif char == '"':
+                self._state = 'string'
+                self._token = []
+                self._pos += 1
+            elif char in '[{':
+                self._state = 'nested'
+                self._raw_start = self._pos
+                self._depth = 0
+                self._in_string = False
+                self._escaped = False
+            else:
+                self._state = 'scalar'
+                self._raw_start = self._pos
+
+        elif state == 'string':
+            start = self._pos
+            pieces = []
+            while self._pos < len(self._buffer):
+                char = self._buffer[self._pos]
+                if char == '"':
+                    break
+                if char == '\\':
+                    decoded, length = self._decode_escape(self._pos)
+                    if decoded is None:
+                        break
+                    pieces.append(decoded)
+                    self._pos += length
+                else:
+                    pieces.append(char)
+                    self._pos += 1
+            text = ''.join(pieces)
+            if text:
+                self._token.append(text)
+                yield ('delta', self._key, text)
+            if self._pos < len(self._buffer) and self._buffer[self._pos] == '"':
+                self._pos += 1
+                yield from self._complete(''.join(self._token))
+            elif self._pos == start:
+                return False
+
+        elif state == 'nested':
+            while self._pos < len(self._buffer):
+                char = self._buffer[self._pos]
+                self._pos += 1
+                if self._in_string:
+                    if self._escaped:
+                        self._escaped = False
+                    elif char == '\\':
+                        self._escaped = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in '[{':
+                    self._depth += 1
+                elif char in ']}':
+                    self._depth -= 1
+                    if self._depth == 0:
+                        raw = self._buffer[self._raw_start:self._pos]
+                        yield from self._complete(self._loads(raw))
+                        break
+
+        elif state == 'scalar':
+            while self._pos < len(self._buffer) and self._buffer[self._pos] not in ',}':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                raw = self._buffer[self._raw_start:self._pos].strip()
+                yield from self._complete(self._loads(raw))
+
+        elif state == 'comma':
+            if char == ',':
+                self._state = 'key'
+            elif char == '}':
+                self.done = True
+            self._pos += 1
+
+        return True
+
+    def _complete(self, value):
+        self.result[self._key] = value
+        self._state = 'comma'
+        yield ('value', self._key, value)
+
+    @staticmethod
+    def _loads(raw: str):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def _read_string(self, pos: int):
+        """Reads a whole string starting after its opening quote; (None, None) if it isn't complete yet."""
+        pieces = []
+        while pos < len(self._buffer):
+            char = self._buffer[pos]
+            if char == '"':
+                return ''.join(pieces), pos + 1
+            if char == '\\':
+                decoded, length = self._decode_escape(pos)
+                if decoded is None:
+                    return None, None
+                pieces.append(decoded)
+                pos += length
+            else:
+                pieces.append(char)
+                pos += 1
+        return None, None
+
+    def _decode_escape(self, pos: int):
+        """Decodes the escape at `pos`; (None, 0) if the sequence is still incomplete."""
+        if pos + 1 >= len(self._buffer):
+            return None, 0
+        code = self._buffer[pos + 1]
+        if code == 'u':
+            digits = self._buffer[pos + 2:pos + 6]
+            if len(digits) < 4:
+                return None, 0
+            try:
+                code_point = int(digits, 16)
+            except ValueError:
+                return digits, 6
+            if 0xD800 <= code_point < 0xDC00:
+                # High surrogate: wait for the low half so emoji decode to one character
+                low = self._buffer[pos + 6:pos + 12]
+                if len(low) < 6:
+                    return None, 0
+                if low.startswith('\\u'):
+                    try:
+                        low_point = int(low[2:], 16)
+                    except ValueError:
+                        low_point = 0
+                    if 0xDC00 <= low_point < 0xE000:
+                        return chr(0x10000 + ((code_point - 0xD800) << 10) + (low_point - 0xDC00)), 12
+            return chr(code_point), 6
+        return self._ESCAPES.get(code, code), 2
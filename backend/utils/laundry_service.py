@@ -1,35 +1,62 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+from sqlalchemy import func, update
 from sqlalchemy.orm import selectinload
 from models import ClothingItem, User, db, Notification
+from utils.colors import canonical_id, laundry_group
 import json
 
 class LaundryIntelligenceService:
     
     @staticmethod
-    def increment_wear_count(item_id: int) -> bool:
-        """Increment wear count for an item and update laundry status"""
+    def record_wear(user_id: int, item_ids: List[int]) -> bool:
+        """
+        Records one wear for each of the user's items and updates their laundry
+        status: one UPDATE for the counters, one pass for wash urgency, one
+        notification check and a single commit (which also commits any pending
+        changes the caller added to the session).
+        """
         try:
-            item = ClothingItem.query.get(item_id)
-            if not item:
-                return False
-            
-            # Increment counters
-            item.wear_count = (item.wear_count or 0) + 1
-            item.wear_count_since_wash = (item.wear_count_since_wash or 0) + 1
-            item.last_worn = datetime.utcnow()
-            
-            # Update wash recommendation
-            wash_rec = item.get_wash_recommendation()
-            item.wash_urgency = wash_rec
-            
-            # Mark as needing washing if urgent
-            if wash_rec in ['high', 'urgent']:
-                item.needs_washing = True
-                
-                # Create a notification if urgency is high or urgent
+            item_ids = list(set(item_ids))
+            if not item_ids:
+                return True
+
+            owned = ClothingItem.query.filter(
+                ClothingItem.user_id == user_id,
+                ClothingItem.id.in_(item_ids)
+            )
+            owned.update({
+                ClothingItem.wear_count: func.coalesce(ClothingItem.wear_count, 0) + 1,
+                ClothingItem.wear_count_since_wash: func.coalesce(ClothingItem.wear_count_since_wash, 0) + 1,
+                ClothingItem.last_worn: datetime.utcnow()
+            }, synchronize_session=False)
+
+            thresholds = User.query.get(user_id).get_laundry_thresholds()
+            rows = owned.with_entities(
+                ClothingItem.id, ClothingItem.type, ClothingItem.fabric, ClothingItem.wear_count_since_wash
+            ).all()
+
+            updates = []
+            needs_alert = False
+            for item_id, item_type, fabric, wear_count_since_wash in rows:
+                threshold = ClothingItem.get_wash_threshold(item_type, fabric, thresholds)
+                wash_rec = ClothingItem.get_wash_urgency(wear_count_since_wash, threshold)
+                values = {'id': item_id, 'wash_urgency': wash_rec}
+                # Mark as needing washing if urgent
+                if wash_rec in ['high', 'urgent']:
+                    values['needs_washing'] = True
+                    needs_alert = True
+                # If very dirty, mark as dirty
+                if wash_rec == 'urgent':
+                    values['is_clean'] = False
+                updates.append(values)
+
+            if updates:
+                db.session.execute(update(ClothingItem), updates)
+
+            if needs_alert:
                 existing_notification = Notification.query.filter_by(
-                    user_id=item.user_id, 
+                    user_id=user_id,
                     link="/dashboard/laundry",
                     is_read=False
                 ).first()
@@ -37,24 +64,20 @@ class LaundryIntelligenceService:
                 if not existing_notification:
                     message = f"You have items that need washing soon. Check your laundry list."
                     notification = Notification(
-                        user_id=item.user_id,
+                        user_id=user_id,
                         message=message,
                         link="/dashboard/laundry"
                     )
                     db.session.add(notification)
 
-            # If very dirty, mark as dirty
-            if wash_rec == 'urgent':
-                item.is_clean = False
-            
             db.session.commit()
             return True
-            
+
         except Exception as e:
-            print(f"Error incrementing wear count: {e}")
+            print(f"Error recording wear: {e}")
             db.session.rollback()
             return False
-    
+
     @staticmethod
     def mark_items_washed(item_ids: List[int]) -> bool:
         """Mark items as washed and reset counters"""
@@ -124,9 +147,12 @@ class LaundryIntelligenceService:
             # Get all user's items, eagerly loading the owner to prevent N+1 queries
             items = ClothingItem.query.options(selectinload(ClothingItem.owner)).filter_by(user_id=user_id).all()
             
+            # Serialize every item once; the alert lists below share these dicts
+            serialized = ClothingItem.serialize_many(items)
+
             # Get all items that are not clean or are marked as needing washing
             items_needing_wash = [
-                item.to_dict() for item in items if not item.is_clean or item.needs_washing
+                data for item, data in zip(items, serialized) if not item.is_clean or item.needs_washing
             ]
             
             # Categorize by urgency from the items that need washing
@@ -135,9 +161,10 @@ class LaundryIntelligenceService:
             medium_priority = [item for item in items_needing_wash if item.get('wash_urgency') == 'medium']
 
             # Check for overdue items (not worn in a long time)
+            now = datetime.utcnow()
             overdue_items = [
-                item.to_dict() for item in items 
-                if item.last_worn and (datetime.utcnow() - item.last_worn).days > 30
+                data for item, data in zip(items, serialized)
+                if item.last_worn and (now - item.last_worn).days > 30
             ]
             
             # Calculate laundry load suggestions from all items that need washing
@@ -173,17 +200,17 @@ class LaundryIntelligenceService:
         delicates = []
         
         for item in items_needing_wash:
-            color = item.get('color', '').lower()
-            fabric = item.get('fabric', '').lower()
+            fabric = (item.get('fabric') or '').lower()
+            load = laundry_group(canonical_id(item.get('color_id'), item.get('color')))
             
             # Check for delicates first
             if ('silk' in fabric or 'wool' in fabric or 'lace' in fabric or 
                 item.get('dry_clean_only', False)):
                 delicates.append(item)
             # Then categorize by color
-            elif any(white_color in color for white_color in ['white', 'cream', 'ivory', 'beige']):
+            elif load == 'whites':
                 whites.append(item)
-            elif any(dark_color in color for dark_color in ['black', 'navy', 'dark', 'charcoal']):
+            elif load == 'darks':
                 darks.append(item)
             else:
                 colors.append(item)
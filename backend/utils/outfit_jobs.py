@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from models import OutfitJob, db
+
+class OutfitJobService:
+    """
+    Background worker pool for async outfit generation (`/api/get-outfit?async=1`).
+
+    Jobs are rows in `outfit_job`, so any worker process can answer polls and
+    SSE subscriptions; the thread that runs a job lives in the process that
+    accepted it. A job left unfinished for longer than `stale_after` (e.g.
+    because that process restarted) is reported as failed. `on_failed(job)`
+    runs in the transaction that marks a job failed here.
+    """
+
+    def __init__(self, app, max_workers: int = 4, stale_after: int = 10 * 60,
+                 on_failed: Optional[Callable[[OutfitJob], None]] = None):
+        self.app = app
+        self.stale_after = timedelta(seconds=stale_after)
+        self.on_failed = on_failed
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='outfit-job')
+
+    def submit(self, job_id: str, runner: Callable[[str], None]) -> None:
+        """Runs `runner(job_id)` on the pool inside an app context."""
+        self._executor.submit(self._run, job_id, runner)
+
+    def _run(self, job_id: str, runner: Callable[[str], None]) -> None:
+        with self.app.app_context():
+            try:
+                runner(job_id)
+            except Exception as e:
+                print(f"Outfit job {job_id} failed: {e}")
+                db.session.rollback()
+                self._fail(job_id, 'Failed to generate outfit.')
+            finally:
+                db.session.remove()
+
+    def _fail(self, job_id: str, message: str) -> None:
+        try:
+            job = OutfitJob.query.get(job_id)
+            if job and not job.is_finished:
+                job.status = 'failed'
+                job.status_code = 500
+                job.result = {'error': message}
+                job.completed_at = datetime.utcnow()
+                if self.on_failed:
+                    self.on_failed(job)
+                db.session.commit()
+        except Exception as e:
+            print(f"Could not mark outfit job {job_id} as failed: {e}")
+            db.session.rollback()
+
+    def expire_if_stale(self, job: OutfitJob) -> None:
+        """Fails a job whose worker has gone away."""
+        if not job.is_finished and datetime.utcnow() - job.created_at > self.stale_after:
+            self._fail(job.id, 'Outfit generation timed out.')
@@ -0,0 +1,152 @@
+from models import PackingListItem, UserEssentialPreference
+
+# Essentials added to every packing list: display name -> UserEssentialPreference.item_type
+ESSENTIALS = {
+    'Socks': 'socks',
+    'Underwear': 'underwear',
+    'Pajamas': 'pajamas'
+}
+
+def essential_quantities(user_id, trip_duration):
+    """
+    Quantity of each essential for a trip, keyed by display name: the user's
+    saved preference, otherwise one per day (a single pair of pajamas).
+    Preferences are read in one query.
+    """
+    preferences = dict(
+        UserEssentialPreference.query
+        .with_entities(UserEssentialPreference.item_type, UserEssentialPreference.quantity)
+        .filter(UserEssentialPreference.user_id == user_id,
+                UserEssentialPreference.item_type.in_(ESSENTIALS.values()))
+        .all()
+    )
+    quantities = {}
+    for item_name, item_type in ESSENTIALS.items():
+        # Default quantity logic: 1 for pajamas, trip duration for others
+        default_quantity = 1 if item_type == 'pajamas' else trip_duration
+        quantities[item_name] = preferences.get(item_type, default_quantity)
+    return quantities
+
+def build_packing_items(generated_items, wardrobe, quantities):
+    """
+    Turns the AI's {category: [name or {"name": ...}]} lists plus essential
+    quantities into PackingListItems keyed by normalized name, linking names
+    that match a wardrobe item (dicts with at least `id` and `name`).
+    """
+    # Normalized name -> first wardrobe item with that name
+    items_by_name = {}
+    for item in wardrobe:
+        items_by_name.setdefault(item['name'].strip().lower(), item)
+
+    final_items = {}
+
+    # First, process items from the AI service
+    for category, items in generated_items.items():
+        for item_detail in items:
+            item_name = (item_detail['name'] if isinstance(item_detail, dict) else item_detail).strip()
+            normalized_name = item_name.lower()
+            if normalized_name in final_items:
+                continue
+
+            clothing_item = items_by_name.get(normalized_name)
+            final_items[normalized_name] = PackingListItem(
+                item_name=item_name,
+                quantity=1,
+                clothing_item_id=clothing_item['id'] if clothing_item else None
+            )
+
+    # Second, process essentials, updating quantity if they already exist
+    for item_name, quantity in quantities.items():
+        if quantity > 0:
+            normalized_name = item_name.lower()
+            if normalized_name in final_items:
+                # Item exists, just update its quantity
+                final_items[normalized_name].quantity = quantity
+            else:
+                # Item doesn't exist, create a new one
+                final_items[normalized_name] = PackingListItem(
+                    item_name=item_name,
+                    quantity=quantity
+                )
+
+    return final_items
+
+# Forecast shifts smaller than this (°C) don't change what's worth packing
+MATERIAL_TEMP_CHANGE = 5
+WET_CONDITIONS = ('rain', 'drizzle', 'shower', 'thunder', 'snow', 'sleet')
+
+def forecast_context(trip, weather_forecast):
+    """What a packing list depends on, stored on the list so later edits can be diffed against it."""
+    daily = weather_forecast.get('daily_detail') or []
+    conditions = [str(day.get('condition', '')).lower() for day in daily]
+    conditions.append(str(weather_forecast.get('most_common_condition', '')).lower())
+    return {
+        'destination': trip.destination,
+        'trip_type': trip.trip_type,
+        'notes': trip.notes,
+        'trip_duration': (trip.end_date - trip.start_date).days + 1,
+        'average_temp': weather_forecast.get('average_temp'),
+        'temp_min': min((day['temp_min'] for day in daily if day.get('temp_min') is not None), default=None),
+        'temp_max': max((day['temp_max'] for day in daily if day.get('temp_max') is not None), default=None),
+        'wet': any(word in condition for condition in conditions for word in WET_CONDITIONS),
+        'snow': any('snow' in condition for condition in conditions),
+    }
+
+def material_changes(previous, current):
+    """
+    Human-readable differences between two forecast contexts that could change
+    what to pack. A different trip length alone isn't one; essentials absorb it.
+    """
+    if not previous:
+        return ['The trip details changed since this list was made.']
+
+    changes = []
+    if (previous.get('destination') or '').strip().lower() != (current.get('destination') or '').strip().lower():
+        changes.append(f"Destination changed from {previous.get('destination')} to {current.get('destination')}.")
+    if previous.get('trip_type') != current.get('trip_type'):
+        changes.append(f"Trip type changed from {previous.get('trip_type') or 'unspecified'} to {current.get('trip_type') or 'unspecified'}.")
+    if (previous.get('notes') or '') != (current.get('notes') or ''):
+        changes.append(f"Trip notes are now: {current.get('notes') or 'none'}.")
+
+    for field, label in (('average_temp', 'Average temperature'), ('temp_min', 'Lowest temperature'), ('temp_max', 'Highest temperature')):
+        before, after = previous.get(field), current.get(field)
+        if before is not None and after is not None and abs(after - before) >= MATERIAL_TEMP_CHANGE:
+            changes.append(f"{label} goes from {before}°C to {after}°C.")
+    if previous.get('wet') != current.get('wet'):
+        changes.append('Rain or snow is now expected.' if current.get('wet') else 'No rain or snow is expected any more.')
+    if previous.get('snow') != current.get('snow') and current.get('snow'):
+        changes.append('Snow is now expected.')
+    return changes
+
+def apply_essential_quantities(packing_list, quantities):
+    """Sets essential quantities for the new trip length in place, keeping packed state."""
+    existing = {item.item_name.strip().lower(): item for item in packing_list.items}
+    for item_name, quantity in quantities.items():
+        item = existing.get(item_name.lower())
+        if item is not None:
+            if quantity > 0:
+                item.quantity = quantity
+            elif not item.is_packed:
+                packing_list.items.remove(item)
+        elif quantity > 0:
+            packing_list.items.append(PackingListItem(item_name=item_name, quantity=quantity))
+
+def apply_packing_delta(packing_list, delta, wardrobe):
+    """
+    Applies an AI delta ({"add": {...}, "remove": [...]}) to a packing list.
+    Essentials and items the user already packed are never removed; names
+    already on the list aren't added twice.
+    """
+    existing = {item.item_name.strip().lower(): item for item in packing_list.items}
+    essentials = {name.lower() for name in ESSENTIALS}
+
+    for name in delta.get('remove', []):
+        item = existing.get(name.strip().lower())
+        if item is not None and not item.is_packed and name.strip().lower() not in essentials:
+            packing_list.items.remove(item)
+            del existing[name.strip().lower()]
+
+    additions = build_packing_items(delta.get('add', {}), wardrobe, {})
+    for normalized_name, item in additions.items():
+        if normalized_name not in existing and normalized_name not in essentials:
+            packing_list.items.append(item)
@@ -0,0 +1,249 @@
+import re
+import threading
+import time
+from typing import List, Optional
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.exc import DatabaseError
+from models import Brand, ClothingItem, db
+
+class WardrobeSearchService:
+    """
+    Full-text search over a user's wardrobe.
+
+    SQLite keeps a separate FTS5 table (`clothing_item_fts`, rowid = item id).
+    PostgreSQL keeps a `search_vector` tsvector column on `clothing_item` with a
+    GIN index. Both are created by migration and indexed from the same document:
+    name, color, style, type, brand and the mood/custom tags.
+
+    Items are (re)indexed by ORM hooks whenever they are inserted, deleted or an
+    indexed attribute changes, however they were written. Bulk query deletes
+    bypass the hooks and must call remove_user_items. On a database without the
+    index (db.create_all() before ensure_index) writes skip it quietly and search
+    falls back to substring matching; a missing index is looked up again every
+    MISSING_INDEX_RECHECK seconds in case a migration has since created it.
+    """
+
+    FTS_TABLE = 'clothing_item_fts'
+    MISSING_INDEX_RECHECK = 60
+
+    _index_lock = threading.Lock()
+    _index_state = {}  # engine url -> (index exists, monotonic time checked)
+
+    # Attributes the search document is built from; other updates skip reindexing
+    INDEXED_ATTRIBUTES = ('user_id', 'name', 'color', 'style', 'type', 'brand_id', 'mood_tags', 'custom_tags')
+
+    # Same document _item_fields builds, for backfilling the SQLite index in one statement
+    _SQLITE_BACKFILL = f"""
+        INSERT INTO {FTS_TABLE} (rowid, user_id, name, color, style, type, brand, tags)
+        SELECT ci.id, ci.user_id, ci.name, coalesce(ci.color, ''), coalesce(ci.style, ''), ci.type,
+               coalesce((SELECT b.name FROM brand AS b WHERE b.id = ci.brand_id), ''),
+               trim(
+                   coalesce((SELECT group_concat(value, ' ') FROM json_each(ci.mood_tags)), '') || ' ' ||
+                   coalesce((SELECT group_concat(value, ' ') FROM json_each(ci.custom_tags)), '')
+               )
+        FROM clothing_item AS ci
+    """
+
+    @staticmethod
+    def ensure_index() -> None:
+        """
+        Creates the SQLite FTS5 table for databases built with db.create_all()
+        rather than migrations. PostgreSQL gets its column and index from migrations.
+        """
+        if WardrobeSearchService._is_postgres():
+            return
+        if not WardrobeSearchService._index_exists(db.session.connection()):
+            db.session.execute(text(
+                f"CREATE VIRTUAL TABLE {WardrobeSearchService.FTS_TABLE} "
+                "USING fts5(user_id UNINDEXED, name, color, style, type, brand, tags)"
+            ))
+            db.session.commit()
+            WardrobeSearchService._remember_index(db.engine, True)
+        WardrobeSearchService.sync_index()
+
+    @staticmethod
+    def sync_index() -> None:
+        """
+        Rebuilds the SQLite FTS5 table when its row count no longer matches
+        clothing_item, e.g. for rows written while the index was missing.
+        Does nothing when the table doesn't exist yet (it's made by migration).
+        """
+        if WardrobeSearchService._is_postgres() or not WardrobeSearchService._index_exists(db.session.connection()):
+            return
+        table = WardrobeSearchService.FTS_TABLE
+        indexed = db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+        if indexed == db.session.execute(text("SELECT count(*) FROM clothing_item")).scalar():
+            return
+        print(f"Search index out of sync ({indexed} indexed rows), rebuilding")
+        db.session.execute(text(f"DELETE FROM {table}"))
+        db.session.execute(text(WardrobeSearchService._SQLITE_BACKFILL))
+        db.session.commit()
+
+    @staticmethod
+    def _index_exists(connection) -> bool:
+        if WardrobeSearchService._is_postgres(connection):
+            query = text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'clothing_item' AND column_name = 'search_vector'"
+            )
+            return connection.execute(query).first() is not None
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': WardrobeSearchService.FTS_TABLE}
+        ).first() is not None
+
+    @classmethod
+    def _remember_index(cls, engine, exists: bool) -> None:
+        with cls._index_lock:
+            cls._index_state[str(engine.url)] = (exists, time.monotonic())
+
+    @classmethod
+    def index_available(cls, connection=None) -> bool:
+        """Whether the database has the search index, looked up once per engine (and again later while missing)."""
+        connection = connection or db.session.connection()
+        with cls._index_lock:
+            state = cls._index_state.get(str(connection.engine.url))
+        if state is not None and (state[0] or time.monotonic() - state[1] < cls.MISSING_INDEX_RECHECK):
+            return state[0]
+        exists = cls._index_exists(connection)
+        cls._remember_index(connection.engine, exists)
+        return exists
+
+    @staticmethod
+    def _is_postgres(connection=None) -> bool:
+        return (connection or db.engine).dialect.name == 'postgresql'
+
+    @staticmethod
+    def _tokenize(search_term: str) -> List[str]:
+        return re.findall(r'\w+', (search_term or '').lower())
+
+    @staticmethod
+    def _item_fields(item: ClothingItem, brand_name: Optional[str]) -> dict:
+        tags = list(item.mood_tags or []) + list(item.custom_tags or [])
+        return {
+            'name': item.name or '',
+            'color': item.color or '',
+            'style': item.style or '',
+            'type': item.type or '',
+            'brand': brand_name or '',
+            'tags': ' '.join(str(tag) for tag in tags),
+        }
+
+    @staticmethod
+    def index_item(connection, item: ClothingItem) -> None:
+        """(Re)indexes a flushed item on `connection`, inside the flush that wrote it."""
+        if not WardrobeSearchService.index_available(connection):
+            return
+        brand_name = None
+        if item.brand_id is not None:
+            # Read through the flush's connection; lazy-loading item.brand mid-flush isn't safe
+            brand_name = connection.execute(select(Brand.name).where(Brand.id == item.brand_id)).scalar()
+        fields = WardrobeSearchService._item_fields(item, brand_name)
+        try:
+            # Savepoint so a failed index write doesn't abort the caller's transaction
+            with connection.begin_nested():
+                if WardrobeSearchService._is_postgres(connection):
+                    document = ' '.join(fields.values())
+                    connection.execute(
+                        text("UPDATE clothing_item SET search_vector = to_tsvector('simple', :document) WHERE id = :id"),
+                        {'document': document, 'id': item.id}
+                    )
+                else:
+                    connection.execute(
+                        text(f"DELETE FROM {WardrobeSearchService.FTS_TABLE} WHERE rowid = :id"),
+                        {'id': item.id}
+                    )
+                    connection.execute(
+                        text(
+                            f"INSERT INTO {WardrobeSearchService.FTS_TABLE} "
+                            "(rowid, user_id, name, color, style, type, brand, tags) "
+                            "VALUES (:id, :user_id, :name, :color, :style, :type, :brand, :tags)"
+                        ),
+                        {'id': item.id, 'user_id': item.user_id, **fields}
+                    )
+        except DatabaseError as e:
+            print(f"Search index update skipped for item {item.id}: {e}")
+
+    @staticmethod
+    def remove_item(connection, item_id: int) -> None:
+        """Drops an item from the SQLite index. PostgreSQL rows carry their own vector."""
+        if WardrobeSearchService._is_postgres(connection) or not WardrobeSearchService.index_available(connection):
+            return
+        try:
+            with connection.begin_nested():
+                connection.execute(
+                    text(f"DELETE FROM {WardrobeSearchService.FTS_TABLE} WHERE rowid = :id"),
+                    {'id': item_id}
+                )
+        except DatabaseError as e:
+            print(f"Search index removal skipped for item {item_id}: {e}")
+
+    @staticmethod
+    def remove_user_items(user_id: int) -> None:
+        """Drops all of a user's items from the SQLite index."""
+        if WardrobeSearchService._is_postgres() or not WardrobeSearchService.index_available():
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(
+                    text(f"DELETE FROM {WardrobeSearchService.FTS_TABLE} WHERE user_id = :user_id"),
+                    {'user_id': user_id}
+                )
+        except DatabaseError as e:
+            print(f"Search index removal skipped for user {user_id}: {e}")
+
+    @staticmethod
+    def search(user_id: int, search_term: str) -> Optional[List[int]]:
+        """
+        Returns the ids of the user's items matching every word of `search_term`
+        as a prefix, best match first. Returns None when the search index is not
+        available so callers can fall back to substring matching.
+        """
+        tokens = WardrobeSearchService._tokenize(search_term)
+        if not tokens:
+            return []
+        if not WardrobeSearchService.index_available():
+            return None
+
+        try:
+            # Savepoint so a missing index doesn't poison the caller's transaction
+            with db.session.begin_nested():
+                if WardrobeSearchService._is_postgres():
+                    rows = db.session.execute(
+                        text(
+                            "SELECT id FROM clothing_item "
+                            "WHERE user_id = :user_id AND search_vector @@ to_tsquery('simple', :query) "
+                            "ORDER BY ts_rank(search_vector, to_tsquery('simple', :query)) DESC, id"
+                        ),
+                        {'user_id': user_id, 'query': ' & '.join(f'{token}:*' for token in tokens)}
+                    )
+                else:
+                    rows = db.session.execute(
+                        text(
+                            f"SELECT rowid FROM {WardrobeSearchService.FTS_TABLE} "
+                            f"WHERE {WardrobeSearchService.FTS_TABLE} MATCH :query AND user_id = :user_id "
+                            "ORDER BY rank, rowid"
+                        ),
+                        {'user_id': user_id, 'query': ' '.join(f'"{token}"*' for token in tokens)}
+                    )
+                return [row[0] for row in rows]
+        except DatabaseError as e:
+            print(f"Full-text search unavailable, falling back to substring search: {e}")
+            return None
+
+
+@event.listens_for(ClothingItem, 'after_insert')
+def _index_inserted_item(mapper, connection, item):
+    WardrobeSearchService.index_item(connection, item)
+
+
+@event.listens_for(ClothingItem, 'after_update')
+def _reindex_updated_item(mapper, connection, item):
+    state = inspect(item)
+    if any(state.attrs[name].history.has_changes() for name in WardrobeSearchService.INDEXED_ATTRIBUTES):
+        WardrobeSearchService.index_item(connection, item)
+
+
+@event.listens_for(ClothingItem, 'after_delete')
+def _unindex_deleted_item(mapper, connection, item):
+    WardrobeSearchService.remove_item(connection, item.id)
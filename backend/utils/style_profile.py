@@ -0,0 +1,121 @@
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from models import Brand, ClothingItem, Outfit, StyleProfile, db, outfit_items
+
+class StyleProfileService:
+    """
+    Maintains the persisted StyleProfile counts behind Style DNA.
+
+    Item and outfit writes call the `*_item` / `record_outfit` hooks before
+    committing, so the profile changes in the same transaction as the data it
+    summarizes. The hooks only touch a profile that already exists; a missing
+    one is built from the database on first read, which then includes the
+    change anyway.
+    """
+
+    @staticmethod
+    def _for_update(user_id: int) -> Optional[StyleProfile]:
+        return StyleProfile.query.filter_by(user_id=user_id).with_for_update().first()
+
+    @staticmethod
+    def build(user_id: int) -> StyleProfile:
+        """Computes a user's profile from scratch (grouped counts, no row scans in Python)."""
+        profile = StyleProfile(user_id=user_id, wardrobe_counts={}, outfit_counts={})
+
+        columns = {
+            'style': ClothingItem.style,
+            'color': ClothingItem.color,
+            'brand': Brand.name,
+            'fabric': ClothingItem.fabric,
+        }
+        wardrobe_counts = {}
+        outfit_counts = {}
+        for field, column in columns.items():
+            rows = db.session.query(column, func.count())\
+                .select_from(ClothingItem)\
+                .outerjoin(Brand, Brand.id == ClothingItem.brand_id)\
+                .filter(ClothingItem.user_id == user_id, column.isnot(None), column != '')\
+                .group_by(column)\
+                .all()
+            wardrobe_counts[field] = {value: count for value, count in rows}
+
+            rows = db.session.query(func.lower(Outfit.mood), column, func.count())\
+                .select_from(Outfit)\
+                .join(outfit_items, outfit_items.c.outfit_id == Outfit.id)\
+                .join(ClothingItem, ClothingItem.id == outfit_items.c.clothing_item_id)\
+                .outerjoin(Brand, Brand.id == ClothingItem.brand_id)\
+                .filter(Outfit.user_id == user_id, Outfit.was_actually_worn == True,
+                        column.isnot(None), column != '')\
+                .group_by(func.lower(Outfit.mood), column)\
+                .all()
+            for mood, value, count in rows:
+                outfit_counts.setdefault(mood or '', {}).setdefault(field, {})[value] = count
+
+        profile.wardrobe_counts = wardrobe_counts
+        profile.outfit_counts = outfit_counts
+        return profile
+
+    @classmethod
+    def get(cls, user_id: int) -> StyleProfile:
+        """Returns the user's profile, building and storing it on first use."""
+        profile = db.session.get(StyleProfile, user_id)
+        if profile is not None:
+            return profile
+
+        profile = cls.build(user_id)
+        try:
+            db.session.add(profile)
+            db.session.commit()
+        except IntegrityError:
+            # Built concurrently by another request
+            db.session.rollback()
+            profile = db.session.get(StyleProfile, user_id)
+        return profile
+
+    @classmethod
+    def add_item(cls, item: ClothingItem) -> None:
+        profile = cls._for_update(item.user_id)
+        if profile:
+            profile.add_item(StyleProfile.item_attributes(item))
+
+    @classmethod
+    def update_item(cls, item: ClothingItem, previous_attributes: Dict) -> None:
+        """`previous_attributes` is StyleProfile.item_attributes(item) taken before the edit."""
+        current_attributes = StyleProfile.item_attributes(item)
+        if current_attributes == previous_attributes:
+            return
+        profile = cls._for_update(item.user_id)
+        if profile:
+            profile.remove_item(previous_attributes)
+            profile.add_item(current_attributes)
+
+    @classmethod
+    def remove_item(cls, item: ClothingItem) -> None:
+        profile = cls._for_update(item.user_id)
+        if profile:
+            profile.remove_item(StyleProfile.item_attributes(item))
+
+    @classmethod
+    def record_outfit(cls, outfit: Outfit, items: List[ClothingItem]) -> None:
+        if not outfit.was_actually_worn:
+            return
+        profile = cls._for_update(outfit.user_id)
+        if profile:
+            profile.add_outfit(outfit.mood, [StyleProfile.item_attributes(item) for item in items])
+
+    @classmethod
+    def reset_outfits(cls, user_id: int) -> None:
+        profile = cls._for_update(user_id)
+        if profile:
+            profile.outfit_counts = {}
+
+    @staticmethod
+    def drop_for_brand(brand_id: int) -> None:
+        """
+        Deletes the profiles of users who own items of a brand about to be
+        deleted, since the counts are keyed by brand name. They're rebuilt
+        from the database on next read.
+        """
+        owners = select(ClothingItem.user_id).where(ClothingItem.brand_id == brand_id).distinct()
+        StyleProfile.query.filter(StyleProfile.user_id.in_(owners)).delete(synchronize_session=False)
@@ -0,0 +1,102 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+class OutfitSuggestionCache:
+    """
+    In-process cache of AI outfit suggestions.
+
+    Entries are keyed by a fingerprint of the clean wardrobe (item ids plus the
+    attributes the model sees), a bucketed weather descriptor, mood, season,
+    collection and the user's negative prompts. Each entry holds a few
+    alternative suggestions so that "show me another" requests with
+    `exclude_ids` can be answered from cache too. Entries expire after `ttl`
+    seconds and the least recently used ones are evicted past `max_entries`.
+    """
+
+    # Item attributes that change what the model would suggest. Wear counters are
+    # left out on purpose so that wearing an outfit doesn't invalidate the cache.
+    ITEM_VERSION_FIELDS = ('name', 'type', 'style', 'color', 'season', 'fabric',
+                           'pattern', 'fit', 'brand', 'mood_tags', 'custom_tags')
+    TEMPERATURE_BAND = 5
+
+    def __init__(self, max_entries: int = 1000, ttl: int = 3 * 60 * 60, max_alternatives: int = 5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_alternatives = max_alternatives
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _digest(value) -> str:
+        return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def wardrobe_fingerprint(cls, wardrobe: List[Dict]) -> str:
+        versions = sorted(
+            [item['id']] + [item.get(field) for field in cls.ITEM_VERSION_FIELDS]
+            for item in wardrobe
+        )
+        return cls._digest(versions)
+
+    @classmethod
+    def weather_bucket(cls, weather_data: Optional[Dict]) -> str:
+        """Temperature band plus main condition, e.g. '10-15C:rain'."""
+        if not weather_data or weather_data.get('temperature') is None:
+            return 'unknown'
+        low = (int(weather_data['temperature']) // cls.TEMPERATURE_BAND) * cls.TEMPERATURE_BAND
+        condition = (weather_data.get('main_condition') or '').lower()
+        return f"{low}-{low + cls.TEMPERATURE_BAND}C:{condition}"
+
+    @classmethod
+    def make_key(cls, user_id: int, wardrobe: List[Dict], weather_data: Optional[Dict], mood: str,
+                 season: str, negative_prompts: List[str], collection_slug: Optional[str] = None) -> str:
+        return cls._digest([
+            user_id,
+            cls.wardrobe_fingerprint(wardrobe),
+            cls.weather_bucket(weather_data),
+            (mood or '').lower(),
+            season,
+            collection_slug or '',
+            cls._digest(sorted(negative_prompts or [])),
+        ])
+
+    def get(self, key: str, exclude_ids: List[int] = None) -> Optional[Dict]:
+        """Returns a cached suggestion that uses none of `exclude_ids`, or None."""
+        excluded = set(exclude_ids or [])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry['created_at'] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            for suggestion in entry['alternatives']:
+                if not excluded.intersection(suggestion.get('selected_items', [])):
+                    return copy.deepcopy(suggestion)
+        return None
+
+    def put(self, key: str, suggestion: Dict) -> None:
+        """Adds a suggestion as another alternative for `key`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry['created_at'] > self.ttl:
+                entry = {'created_at': time.monotonic(), 'alternatives': []}
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            alternatives = entry['alternatives']
+            alternatives.append(copy.deepcopy(suggestion))
+            del alternatives[:-self.max_alternatives]
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
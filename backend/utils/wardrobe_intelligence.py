@@ -3,125 +3,58 @@ from typing import List, Dict, Any, Tuple
 from sqlalchemy import func, distinct, cast, Date
 from sqlalchemy.orm import selectinload
 from models import ClothingItem, Outfit, User, UserActivity, db, Notification
+from utils.colors import canonical_id, color_family
 from collections import defaultdict, Counter
-import json
 import statistics
 
 class WardrobeIntelligenceService:
+
+    # Display name and description for each smart collection, keyed by slug.
+    # The seasonal collection's text depends on the current season.
+    COLLECTION_DETAILS = {
+        'work': ('👔 Work & Professional', 'Your professional wardrobe essentials'),
+        'casual': ('😌 Casual & Weekend', 'Relaxed and comfortable pieces'),
+        'special': ('💕 Date Night & Special', 'For special occasions and nights out'),
+        'active': ('🏃‍♂️ Active & Sporty', 'For workouts and active days'),
+        'seasonal': ('🌟 {season} Favorites', 'Perfect for {season} weather'),
+        'favorites': ('⭐ Your Favorites', 'Your most-worn items'),
+        'underused': ('💤 Ready for Rotation', 'Great pieces waiting to be rediscovered'),
+    }
     
     @staticmethod
     def get_smart_collections(user_id: int) -> Dict[str, Any]:
         """Generate smart collections based on user's wardrobe and patterns"""
         try:
             items = ClothingItem.query.options(selectinload(ClothingItem.owner)).filter_by(user_id=user_id).all()
-            outfits = Outfit.query.options(
-                selectinload(Outfit.clothing_items).selectinload(ClothingItem.owner)
-            ).filter_by(user_id=user_id).all()
-            
-            collections = {}
-            
-            # Work/Professional Collection
-            work_items = [
-                item.to_dict() for item in items 
-                if item.style and 'formal' in item.style.lower() or 'business' in item.style.lower()
-                or any(tag in (item.mood_tags or '') for tag in ['professional', 'formal'])
-            ]
-            if work_items:
-                collections['work'] = {
-                    'name': '👔 Work & Professional',
-                    'items': work_items,
-                    'count': len(work_items),
-                    'description': 'Your professional wardrobe essentials'
-                }
-            
-            # Casual Weekend Collection
-            casual_items = [
-                item.to_dict() for item in items 
-                if item.style and 'casual' in item.style.lower()
-                or any(tag in (item.mood_tags or '') for tag in ['casual', 'cozy'])
-            ]
-            if casual_items:
-                collections['casual'] = {
-                    'name': '😌 Casual & Weekend',
-                    'items': casual_items,
-                    'count': len(casual_items),
-                    'description': 'Relaxed and comfortable pieces'
-                }
-            
-            # Date Night/Special Occasions
-            special_items = [
-                item.to_dict() for item in items 
-                if item.style and ('elegant' in item.style.lower() or 'trendy' in item.style.lower())
-                or any(tag in (item.mood_tags or '') for tag in ['date', 'party', 'elegant'])
-            ]
-            if special_items:
-                collections['special'] = {
-                    'name': '💕 Date Night & Special',
-                    'items': special_items,
-                    'count': len(special_items),
-                    'description': 'For special occasions and nights out'
-                }
-            
-            # Active/Sporty Collection
-            active_items = [
-                item.to_dict() for item in items 
-                if item.style and 'sporty' in item.style.lower()
-                or any(tag in (item.mood_tags or '') for tag in ['sporty', 'athletic'])
-                or item.type in ['workout', 'athletic', 'sportswear']
-            ]
-            if active_items:
-                collections['active'] = {
-                    'name': '🏃‍♂️ Active & Sporty',
-                    'items': active_items,
-                    'count': len(active_items),
-                    'description': 'For workouts and active days'
-                }
-            
-            # Seasonal Collections
+
+            # An item can appear in several collections, so serialize each one only once
+            serialized = {
+                item.id: data for item, data in zip(items, ClothingItem.serialize_many(items))
+            }
             current_season = WardrobeIntelligenceService._get_current_season()
-            seasonal_items = [
-                item.to_dict() for item in items 
-                if item.season == current_season or item.season == 'all'
-            ]
-            if seasonal_items:
-                collections['seasonal'] = {
-                    'name': f'🌟 {current_season.title()} Favorites',
-                    'items': seasonal_items,
-                    'count': len(seasonal_items),
-                    'description': f'Perfect for {current_season} weather'
-                }
-            
-            # Most Worn Collection (based on actual data)
-            most_worn_items = sorted(
-                [item for item in items if (item.wear_count or 0) > 0],
-                key=lambda x: x.wear_count or 0,
-                reverse=True
-            )[:10]
-            
-            if most_worn_items:
-                collections['favorites'] = {
-                    'name': '⭐ Your Favorites',
-                    'items': [item.to_dict() for item in most_worn_items],
-                    'count': len(most_worn_items),
-                    'description': 'Your most-worn items'
-                }
-            
-            # Underused Collection (for rotation suggestions)
-            underused_items = [
-                item for item in items 
-                if (item.wear_count or 0) < 2 and item.created_at 
-                and (datetime.utcnow() - item.created_at).days > 30
-            ]
             
-            if underused_items:
-                collections['underused'] = {
-                    'name': '💤 Ready for Rotation',
-                    'items': [item.to_dict() for item in underused_items],
-                    'count': len(underused_items),
-                    'description': 'Great pieces waiting to be rediscovered'
-                }
+            # Membership comes from the same SQL rules get_single_smart_collection uses,
+            # one boolean column per collection, so both endpoints always agree
+            slugs = list(WardrobeIntelligenceService.COLLECTION_DETAILS)
+            rows = db.session.query(
+                ClothingItem.id,
+                *(
+                    db.case((WardrobeIntelligenceService._collection_filter(slug, current_season), True), else_=False).label(slug)
+                    for slug in slugs
+                )
+            ).filter(ClothingItem.user_id == user_id).all()
+            member_ids = {slug: {row.id for row in rows if getattr(row, slug)} for slug in slugs}
+            members = {slug: [item for item in items if item.id in member_ids[slug]] for slug in slugs}
+
+            # Most Worn Collection, in the same order and size as the single-collection query
+            members['favorites'] = sorted(members['favorites'], key=lambda item: (-(item.wear_count or 0), item.id))[:10]
             
-            return collections
+            return {
+                slug: WardrobeIntelligenceService._build_collection(
+                    slug, [serialized[item.id] for item in collection_items], current_season
+                )
+                for slug, collection_items in members.items() if collection_items
+            }
             
         except Exception as e:
             print(f"Error generating smart collections: {e}")
@@ -131,14 +64,74 @@ class WardrobeIntelligenceService:
     def get_single_smart_collection(user_id: int, collection_slug: str) -> Dict[str, Any]:
         """
         Retrieves a single smart collection by its slug.
-        This is a temporary method until collections are moved to the database.
+        The membership rules run in the database, so only that collection's items are loaded.
         """
         try:
-            all_collections = WardrobeIntelligenceService.get_smart_collections(user_id)
-            return all_collections.get(collection_slug)
+            if collection_slug not in WardrobeIntelligenceService.COLLECTION_DETAILS:
+                return None
+
+            current_season = WardrobeIntelligenceService._get_current_season()
+            query = ClothingItem.query.options(selectinload(ClothingItem.owner)).filter(
+                ClothingItem.user_id == user_id,
+                WardrobeIntelligenceService._collection_filter(collection_slug, current_season)
+            )
+            if collection_slug == 'favorites':
+                query = query.order_by(ClothingItem.wear_count.desc(), ClothingItem.id).limit(10)
+
+            items = query.all()
+            if not items:
+                return None
+
+            return WardrobeIntelligenceService._build_collection(
+                collection_slug, ClothingItem.serialize_many(items), current_season
+            )
         except Exception as e:
             print(f"Error getting single smart collection {collection_slug}: {e}")
             return None
+
+    @staticmethod
+    def _collection_filter(collection_slug: str, current_season: str):
+        """SQL criterion selecting the members of a smart collection."""
+        style = func.lower(ClothingItem.style)
+
+        if collection_slug == 'work':
+            return db.or_(
+                style.contains('formal'), style.contains('business'),
+                ClothingItem.has_any_tag('mood_tags', ['professional', 'formal'])
+            )
+        if collection_slug == 'casual':
+            return db.or_(style.contains('casual'), ClothingItem.has_any_tag('mood_tags', ['casual', 'cozy']))
+        if collection_slug == 'special':
+            return db.or_(
+                style.contains('elegant'), style.contains('trendy'),
+                ClothingItem.has_any_tag('mood_tags', ['date', 'party', 'elegant'])
+            )
+        if collection_slug == 'active':
+            return db.or_(
+                style.contains('sporty'),
+                ClothingItem.has_any_tag('mood_tags', ['sporty', 'athletic']),
+                ClothingItem.type.in_(['workout', 'athletic', 'sportswear'])
+            )
+        if collection_slug == 'seasonal':
+            return ClothingItem.season.in_([current_season, 'all'])
+        if collection_slug == 'favorites':
+            return ClothingItem.wear_count > 0
+        if collection_slug == 'underused':
+            return db.and_(
+                db.or_(ClothingItem.wear_count == None, ClothingItem.wear_count < 2),
+                ClothingItem.created_at <= datetime.utcnow() - timedelta(days=31)
+            )
+        raise ValueError(f"Unknown smart collection: {collection_slug}")
+
+    @staticmethod
+    def _build_collection(collection_slug: str, items: List[Dict], current_season: str) -> Dict[str, Any]:
+        name, description = WardrobeIntelligenceService.COLLECTION_DETAILS[collection_slug]
+        return {
+            'name': name.format(season=current_season.title()),
+            'items': items,
+            'count': len(items),
+            'description': description.format(season=current_season)
+        }
     
     @staticmethod
     def get_wardrobe_gaps(user_id: int) -> Dict[str, Any]:
@@ -159,17 +152,7 @@ class WardrobeIntelligenceService:
             color_families = defaultdict(int)
             for item in items:
                 if item.color:
-                    color = item.color.lower()
-                    if any(c in color for c in ['black', 'dark', 'charcoal']):
-                        color_families['darks'] += 1
-                    elif any(c in color for c in ['white', 'cream', 'ivory', 'beige']):
-                        color_families['lights'] += 1
-                    elif any(c in color for c in ['blue', 'navy']):
-                        color_families['blues'] += 1
-                    elif any(c in color for c in ['red', 'pink', 'burgundy']):
-                        color_families['reds'] += 1
-                    else:
-                        color_families['colors'] += 1
+                    color_families[color_family(canonical_id(item.color_id, item.color))] += 1
             
             gaps = []
             recommendations = []
@@ -271,8 +254,8 @@ class WardrobeIntelligenceService:
             # Get recently worn items to avoid
             recently_worn = set()
             for outfit in recent_outfits:
-                for item in outfit.clothing_items:
-                    recently_worn.add(item.id)
+                for item in outfit.snapshot_items():
+                    recently_worn.add(item['id'])
             
             # Prioritize underused items
             underused_items = [
@@ -284,7 +267,7 @@ class WardrobeIntelligenceService:
             mood_appropriate = []
             for item in items:
                 if item.mood_tags:
-                    tags = json.loads(item.mood_tags) if isinstance(item.mood_tags, str) else item.mood_tags
+                    tags = item.mood_tags
                     if mood.lower() in [tag.lower() for tag in tags]:
                         mood_appropriate.append(item)
             
@@ -430,9 +413,7 @@ class AnalyticsService:
         """Get comprehensive usage analytics for user's wardrobe"""
         try:
             items = ClothingItem.query.options(selectinload(ClothingItem.owner)).filter_by(user_id=user_id).all()
-            outfits = Outfit.query.options(
-                selectinload(Outfit.clothing_items).selectinload(ClothingItem.owner)
-            ).filter_by(user_id=user_id).all()
+            outfits = Outfit.query.filter_by(user_id=user_id).all()
             
             # Most/Least worn analysis
             items_with_wear = [(item, item.wear_count or 0) for item in items]
@@ -0,0 +1,94 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+from utils.geocoding_cache import GeocodingCache
+
+class _Flight:
+    """One upstream fetch that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class WeatherCache:
+    """
+    In-process cache of current-weather lookups, keyed by normalized location
+    and shared by every user in the worker.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted past `max_entries`. Concurrent misses for the same location are
+    coalesced (single flight): the first caller fetches, the others wait for
+    its result, so a burst of requests from one city costs one upstream call.
+    Failed fetches are not cached; every waiter gets the same error.
+    """
+
+    def __init__(self, ttl: int = 600, max_entries: int = 1000, wait_timeout: float = 25):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (monotonic fetch time, value)
+        self._in_flight = {}
+        self._counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0, 'evictions': 0}
+
+    def get_or_fetch(self, location: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """The cached weather for `location`, calling `fetch()` at most once per key at a time on a miss."""
+        key = GeocodingCache.normalize(location)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return copy.deepcopy(entry[1])
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self._counters['misses'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                raise TimeoutError(f"Timed out waiting for the weather lookup for '{key}'")
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._counters['errors'] += 1
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = (time.monotonic(), flight.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters['evictions'] += 1
+            return copy.deepcopy(flight.value)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses'] + self._counters['coalesced']
+            return {
+                **self._counters,
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl,
+                'hit_rate': round((self._counters['hits'] + self._counters['coalesced']) / lookups, 3) if lookups else 0.0
+            }
@@ -1,12 +1,31 @@
 import requests
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional
 from datetime import date, timedelta
 
 class WeatherService:
-    def __init__(self, api_key: str):
+    # Per-request timeout, and the overall budget for current conditions plus forecast
+    REQUEST_TIMEOUT = float(os.environ.get('WEATHER_REQUEST_TIMEOUT', 10))
+    CURRENT_WEATHER_DEADLINE = float(os.environ.get('WEATHER_DEADLINE', 8))
+
+    def __init__(self, api_key: str, geocoding_cache=None, weather_cache=None, pool_size: int = 16):
         self.api_key = api_key
-        self.base_url = "https://api.openweathermap.org/data"
+        self.geocoding_cache = geocoding_cache
+        self.weather_cache = weather_cache
+
+        # One keep-alive connection pool for every call, instead of a new TLS handshake per request
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        # Current conditions and the forecast are fetched side by side
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='weather')
+        # Overridable so load tests can point at a local stand-in
+        self.api_url = os.environ.get('OPENWEATHER_API_URL', 'https://api.openweathermap.org').rstrip('/')
+        self.base_url = f"{self.api_url}/data"
         self.client_available = api_key
         
         if not self.client_available:
@@ -16,20 +35,27 @@ class WeatherService:
         """Get latitude and longitude for a location string."""
         if not self.client_available:
             return None
+
+        if self.geocoding_cache:
+            cached, coords = self.geocoding_cache.get(location)
+            if cached:
+                return coords
         
         try:
-            url = f"https://api.openweathermap.org/geo/1.0/direct"
+            url = f"{self.api_url}/geo/1.0/direct"
             params = {
                 'q': location,
                 'limit': 1,
                 'appid': self.api_key
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             data = response.json()
-            if data:
-                return {"lat": data[0]["lat"], "lon": data[0]["lon"]}
-            return None
+            coords = {"lat": data[0]["lat"], "lon": data[0]["lon"]} if data else None
+            # Only answers are cached; a failed request is retried next time
+            if self.geocoding_cache:
+                self.geocoding_cache.put(location, coords)
+            return coords
         except requests.exceptions.RequestException as e:
             print(f"Geocoding request error: {e}")
             return None
@@ -56,7 +82,7 @@ class WeatherService:
                 'appid': self.api_key,
                 'units': 'metric'
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             forecast_data = response.json()
 
@@ -113,48 +139,68 @@ class WeatherService:
         """Get current weather for location with enhanced data"""
         if not self.client_available:
             return self._get_mock_weather(location)
-        
+
         try:
-            # Get current weather
-            current_url = f"{self.base_url}/2.5/weather"
-            params = {
-                'q': location,
-                'appid': self.api_key,
-                'units': 'metric'
-            }
-            
-            response = requests.get(current_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Get forecast for additional context
-            forecast_data = self._get_forecast(location)
-            
-            return {
-                'temperature': round(data['main']['temp']),
-                'feels_like': round(data['main']['feels_like']),
-                'condition': data['weather'][0]['description'].title(),
-                'main_condition': data['weather'][0]['main'].lower(),
-                'humidity': data['main']['humidity'],
-                'wind_speed': round(data['wind'].get('speed', 0) * 3.6, 1),  # Convert m/s to km/h
-                'pressure': data['main']['pressure'],
-                'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
-                'uv_index': forecast_data.get('uv_index', 'N/A'),
-                'sunrise': data['sys']['sunrise'],
-                'sunset': data['sys']['sunset'],
-                'location': f"{data['name']}, {data['sys']['country']}",
-                'icon': data['weather'][0]['icon'],
-                'hourly_forecast': forecast_data.get('hourly', [])
-            }
-            
+            if self.weather_cache:
+                return self.weather_cache.get_or_fetch(location, lambda: self._fetch_current_weather(location))
+            return self._fetch_current_weather(location)
+        except TimeoutError:
+            print(f"Weather lookup for {location} missed its deadline")
+            return self._get_mock_weather(location)
         except requests.exceptions.RequestException as e:
             print(f"Weather service request error: {e}")
             return self._get_mock_weather(location)
         except Exception as e:
             print(f"Weather service error: {e}")
             return self._get_mock_weather(location)
+
+    def _fetch_current_weather(self, location: str) -> Dict:
+        """
+        Current conditions plus the short forecast from the API, requested in
+        parallel within CURRENT_WEATHER_DEADLINE. Raises if current conditions
+        fail or run late (so nothing bad is cached); a late or failed forecast
+        just leaves the hourly detail empty.
+        """
+        started = time.monotonic()
+        current = self._executor.submit(self._get_current_conditions, location)
+        forecast = self._executor.submit(self._get_forecast, location)
+
+        data = current.result(timeout=self.CURRENT_WEATHER_DEADLINE)
+        remaining = self.CURRENT_WEATHER_DEADLINE - (time.monotonic() - started)
+        try:
+            forecast_data = forecast.result(timeout=max(remaining, 0))
+        except TimeoutError:
+            print(f"Forecast for {location} missed the weather deadline")
+            forecast_data = {'hourly': [], 'uv_index': 'N/A'}
+        
+        return {
+            'temperature': round(data['main']['temp']),
+            'feels_like': round(data['main']['feels_like']),
+            'condition': data['weather'][0]['description'].title(),
+            'main_condition': data['weather'][0]['main'].lower(),
+            'humidity': data['main']['humidity'],
+            'wind_speed': round(data['wind'].get('speed', 0) * 3.6, 1),  # Convert m/s to km/h
+            'pressure': data['main']['pressure'],
+            'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
+            'uv_index': forecast_data.get('uv_index', 'N/A'),
+            'sunrise': data['sys']['sunrise'],
+            'sunset': data['sys']['sunset'],
+            'location': f"{data['name']}, {data['sys']['country']}",
+            'icon': data['weather'][0]['icon'],
+            'hourly_forecast': forecast_data.get('hourly', [])
+        }
     
+    def _get_current_conditions(self, location: str) -> Dict:
+        current_url = f"{self.base_url}/2.5/weather"
+        params = {
+            'q': location,
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+        response = self.http.get(current_url, params=params, timeout=self.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
     def _get_forecast(self, location: str) -> Dict:
         """Get weather forecast for additional context"""
         try:
@@ -166,7 +212,7 @@ class WeatherService:
                 'cnt': 8  # Next 24 hours (3-hour intervals)
             }
             
-            response = requests.get(forecast_url, params=params, timeout=10)
+            response = self.http.get(forecast_url, params=params, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()